@@ -0,0 +1,102 @@
+"""
+Dashboard log processing on synthetic logs.
+
+Compares the original iterrows open-position matcher and sidebar builder
+against logview.py, checks they agree, then times the vectorized path and
+a cold LogTail load on 10^6 rows.
+
+    python bench_logview.py [rows]
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from logview import LOG_COLUMNS, LogTail, build_feed_html, compute_open_positions, normalize_log, unmatched_opens
+
+
+def synthetic_log(n: int, tickers: int = 20000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    series = np.array(["KXNBAGAME", "KXNCAAMBGAME", "KXNCAAWBGAME", "KXBTC15M"])
+    names = np.array([f"{series[i % 4]}-26FEB{i % 28:02d}T{i:05d}-T{i % 97}" for i in range(tickers)])
+    action = rng.choice(["open", "close", "sl", "resolved"], n, p=[0.5, 0.4, 0.05, 0.05])
+    df = pd.DataFrame({
+        "ticker": names[rng.integers(0, tickers, n)],
+        "dir": rng.choice(["YES", "no"], n),
+        "action": action,
+        "price": np.round(rng.uniform(0.01, 0.99, n), 2),
+        "effect": np.where(action == "open", 0.0, np.round(rng.normal(0, 0.1, n), 4)),
+    })
+    return normalize_log(df)
+
+
+def legacy_open_positions(df: pd.DataFrame) -> pd.DataFrame:
+    stacks = {}
+    for _, row in df.iterrows():
+        t = row["ticker"]
+        stacks.setdefault(t, [])
+
+        if row["action"] == "open":
+            stacks[t].append({"price": row["price"], "dir": row["dir"]})
+        elif row["action"] == "close" and stacks[t]:
+            stacks[t].pop()
+
+    recs = []
+    for t, stack in stacks.items():
+        if not stack:
+            continue
+        prices = [p["price"] for p in stack if pd.notna(p["price"])]
+        recs.append({
+            "ticker": t,
+            "direction": stack[-1]["dir"].upper(),
+            "avg_open_price": sum(prices) / len(prices) if prices else None,
+        })
+    return pd.DataFrame(recs).sort_values("ticker")[["ticker", "direction", "avg_open_price"]]
+
+
+def vectorized_open_positions(df: pd.DataFrame) -> pd.DataFrame:
+    return compute_open_positions(unmatched_opens(df[df["action"].isin(["open", "close"])]))
+
+
+def timed(fn, *args):
+    t0 = perf_counter()
+    out = fn(*args)
+    return out, perf_counter() - t0
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    # correctness and the legacy baseline on a slice iterrows can finish
+    small = synthetic_log(100_000)
+    old, t_old = timed(legacy_open_positions, small)
+    new, t_new = timed(vectorized_open_positions, small)
+    pd.testing.assert_frame_equal(old.reset_index(drop=True), new.reset_index(drop=True), check_dtype=False)
+    print(f"open positions, {len(small):,} rows: iterrows {t_old:.2f}s | vectorized {t_new:.3f}s "
+          f"| {t_old / t_new:.0f}x, {len(new):,} open")
+
+    big = synthetic_log(n)
+    new, t_new = timed(vectorized_open_positions, big)
+    print(f"open positions, {n:,} rows: vectorized {t_new:.3f}s "
+          f"(iterrows extrapolated ~{t_old * n / len(small):.0f}s)")
+
+    trades = big[big["action"].isin(["open", "close"])]
+    _, t_html = timed(build_feed_html, trades, 8)
+    print(f"sidebar html: {t_html * 1000:.2f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.csv")
+        big[LOG_COLUMNS].to_csv(path, index=False)
+
+        tail = LogTail(path)
+        _, t_cold = timed(tail.poll)
+
+        with open(path, "a") as f:
+            f.write("KXBTC15M-NEW-T1,YES,open,0.9,0\n")
+        _, t_warm = timed(tail.poll)
+
+    print(f"LogTail: cold load {t_cold:.2f}s, one appended row {t_warm * 1000:.2f}ms, "
+          f"{len(tail.open_positions()):,} open, kpis={tuple(round(k, 4) for k in tail.kpis())}")
@@ -0,0 +1,473 @@
+"""
+Log state for dashboard.py, kept free of Streamlit so it can be
+benchmarked and reused (see bench_logview.py).
+"""
+import io
+import json
+import os
+import select
+import socket
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+series_ns = SimpleNamespace(**{
+    "NBA": "KXNBAGAME",
+    "NCAA_BB_M": "KXNCAAMBGAME",
+    "NCAA_BB_W": "KXNCAAWBGAME",
+})
+
+SERIES_MAP = {
+    series_ns.NBA: "NBA",
+    series_ns.NCAA_BB_M: "NCAA MBB",
+    series_ns.NCAA_BB_W: "NCAA WBB",
+}
+
+BUS_PATH = "/tmp/kalshi-bot.sock"  # bus.BUS_PATH on the bot side
+LOG_COLUMNS = ["ticker", "dir", "action", "price", "effect"]
+MAX_CHART_POINTS = 2000
+
+
+def normalize_log(df: pd.DataFrame, first_event: int = 1) -> pd.DataFrame:
+    df.columns = [c.lower() for c in df.columns]
+
+    for col in LOG_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+
+    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    df["effect"] = pd.to_numeric(df["effect"], errors="coerce").fillna(0.0)
+    df["action"] = df["action"].astype(str).str.lower()
+    df["dir"] = df["dir"].astype(str)
+
+    df["event"] = range(first_event, first_event + len(df))
+    return df
+
+
+def unmatched_opens(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The open rows of df still waiting for a close. A close takes the most
+    recent open on its ticker (a stack per ticker) and is ignored when that
+    ticker has nothing open.
+
+    Vectorized: the per ticker running sum of +1 opens / -1 closes, floored
+    at zero by subtracting its running minimum, is the stack depth after
+    each row. An open that lifted the depth to d is still on the stack if
+    the depth never drops below d afterwards.
+    """
+    if df.empty:
+        return df
+
+    tickers = pd.factorize(df["ticker"])[0]  # group on ints, not strings
+    is_open = (df["action"] == "open").to_numpy()
+    step = pd.Series(np.where(is_open, 1, -1), index=df.index)
+
+    running = step.groupby(tickers).cumsum()
+    depth = running - running.groupby(tickers).cummin().clip(upper=0)
+    depth_after = depth.iloc[::-1].groupby(tickers[::-1]).cummin().iloc[::-1]
+
+    return df[is_open & (depth_after >= depth).to_numpy()]
+
+
+def compute_open_positions(opens: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per ticker with unmatched opens: direction of the latest open
+    and the mean price of all of them.
+    """
+    if opens.empty:
+        return pd.DataFrame(columns=["ticker", "direction", "avg_open_price"])
+
+    g = opens.groupby("ticker", sort=True)
+    out = pd.DataFrame({
+        "direction": g["dir"].last().str.upper(),
+        "avg_open_price": g["price"].mean(),
+    }).reset_index()
+    return out[["ticker", "direction", "avg_open_price"]]
+
+
+def compute_kpis(closes: int, realized: float, wins: int) -> tuple[float, float, float]:
+    # Only closes count for win rate and realized effect
+    if not closes:
+        return 0.0, 0.0, 0.0
+    return float(realized), wins / closes, realized / closes
+
+
+class LogTail:
+    """
+    Incremental reader for the bot's log.csv.
+
+    poll() reads only the bytes appended since the last call (up to the
+    last complete line) and folds the new rows into running state: unmatched
+    opens, close KPIs, the cumulative effect series and the last
+    few rows for the tables. A refresh costs O(new rows), not O(history).
+    A truncated or replaced file starts over from byte 0.
+
+    push() applies "log" events from the bot's bus instead. Events are
+    numbered by row, so rows that arrive both ways are only counted once,
+    and a gap in the numbering falls back to reading the file.
+    """
+
+    RECENT_MAX = 200  # upper bound of the "last N events" slider
+    FEED_MAX = 8
+
+    def __init__(self, path: str):
+        self.path = path
+        self._reset(None)
+
+    def _reset(self, inode):
+        self.inode = inode
+        self.offset = 0
+        self.columns = None
+        self.disk_rows = 0  # rows read from the file so far
+        self.announced = 0  # highest row number seen on the bus
+
+        self.n_events = 0
+        self.opens = None  # unmatched open rows, typed like the first chunk
+        self.closes = 0
+        self.realized = 0.0
+        self.wins = 0
+        self._cum = np.empty(1024)  # cumulative effect per event, grown by doubling
+        self.recent = deque(maxlen=self.RECENT_MAX)
+        self.feed = deque(maxlen=self.FEED_MAX)
+
+    def poll(self) -> int:
+        """
+        Apply whatever was appended since the last poll. Returns the number of new rows.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self._reset(stat.st_ino)
+        if stat.st_size == self.offset:
+            return 0
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+
+        # leave a half written last line for the next poll
+        end = data.rfind(b"\n")
+        if end < 0:
+            return 0
+        data = data[:end + 1]
+        self.offset += len(data)
+
+        if self.columns is None:
+            nl = data.index(b"\n")
+            first = data[:nl].decode().strip().lower()
+            if "action" in first:
+                self.columns = [c.strip() for c in first.split(",")]
+                data = data[nl + 1:]
+            else:
+                self.columns = LOG_COLUMNS
+        if not data.strip():
+            return 0
+
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=self.columns)
+        chunk = normalize_log(chunk, self.disk_rows + 1)
+        self.disk_rows += len(chunk)
+
+        # rows already pushed over the bus
+        chunk = chunk[chunk["event"] > self.n_events]
+        if chunk.empty:
+            return 0
+        self._apply(chunk)
+        return len(chunk)
+
+    def push(self, events: list[dict]) -> int:
+        """
+        Apply bus "log" events. Returns the number of new rows, reads the
+        file instead when events were missed.
+        """
+        rows = [e for e in events if e["event"] > self.n_events]
+        if not rows:
+            return 0
+        self.announced = max(self.announced, rows[-1]["event"])
+        if rows[0]["event"] != self.n_events + 1:
+            return self.poll()
+
+        chunk = pd.DataFrame([e["row"] for e in rows], columns=LOG_COLUMNS)
+        self._apply(normalize_log(chunk, self.n_events + 1))
+        return len(chunk)
+
+    def _apply(self, chunk: pd.DataFrame):
+        self.n_events = int(chunk["event"].iloc[-1])
+
+        # only opens on tickers in this chunk can change
+        trades = chunk.loc[chunk["action"].isin(["open", "close"]), ["event"] + LOG_COLUMNS]
+        if self.opens is None:
+            self.opens = unmatched_opens(trades)
+        elif not trades.empty:
+            touched = self.opens["ticker"].isin(trades["ticker"].unique())
+            both = pd.concat([self.opens[touched], trades], ignore_index=True)
+            self.opens = pd.concat([self.opens[~touched], unmatched_opens(both)], ignore_index=True)
+
+        closes = chunk.loc[chunk["action"] == "close", "effect"]
+        self.closes += len(closes)
+        self.realized += float(closes.sum())
+        self.wins += int((closes > 0).sum())
+
+        done = int(chunk["event"].iloc[0]) - 1
+        if self.n_events > len(self._cum):
+            grown = np.empty(max(self.n_events, 2 * len(self._cum)))
+            grown[:done] = self._cum[:done]
+            self._cum = grown
+        start = self._cum[done - 1] if done else 0.0
+        self._cum[done:self.n_events] = start + chunk["effect"].to_numpy().cumsum()
+
+        self.recent.extend(chunk.tail(self.RECENT_MAX).to_dict("records"))
+        self.feed.extend(trades.tail(self.FEED_MAX).to_dict("records"))
+
+    @property
+    def behind(self) -> bool:
+        """
+        True after a bus gap the file has not caught up with yet.
+        """
+        return self.n_events < self.announced
+
+    # ------------- views -------------
+
+    def open_positions(self) -> pd.DataFrame:
+        if self.opens is None:
+            return compute_open_positions(pd.DataFrame(columns=LOG_COLUMNS))
+        return compute_open_positions(self.opens)
+
+    def kpis(self) -> tuple[float, float, float]:
+        return compute_kpis(self.closes, self.realized, self.wins)
+
+    @property
+    def cum_effect(self) -> np.ndarray:
+        return self._cum[:self.n_events]
+
+    def effect_series(self) -> pd.DataFrame:
+        # the full series can be millions of points, chart an even sample
+        n = self.n_events
+        idx = np.unique(np.linspace(0, n - 1, min(n, MAX_CHART_POINTS)).astype(int))
+        return pd.DataFrame({"event": idx + 1, "cum_effect": self._cum[idx]})
+
+    def recent_df(self, n: int) -> pd.DataFrame:
+        rows = list(self.recent)[-n:]
+        return pd.DataFrame(rows, columns=["event"] + LOG_COLUMNS)
+
+    def feed_df(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self.feed), columns=["event"] + LOG_COLUMNS)
+
+
+FEED_CSS = """
+<style>
+.glass-feed-wrap {
+    margin-top: 0.5rem;
+}
+.glass-pill {
+    position: relative;
+    border-radius: 0.9rem;
+    padding: 0.55rem 0.7rem;
+    margin-bottom: 0.5rem;
+    background: linear-gradient(
+        135deg,
+        rgba(15,23,42,0.96),
+        rgba(31,41,55,0.9)
+    );
+    border: 1px solid rgba(148,163,184,0.35);
+    box-shadow:
+        0 14px 30px rgba(15,23,42,0.8),
+        inset 0 0 0 1px rgba(15,23,42,0.8);
+    backdrop-filter: blur(10px);
+    -webkit-backdrop-filter: blur(10px);
+    font-size: 0.75rem;
+    color: #e5e7eb;
+}
+.glass-pill-header {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin-bottom: 0.15rem;
+}
+.glass-pill-ticker {
+    font-family: system-ui, -apple-system, BlinkMacSystemFont, sans-serif;
+    font-size: 0.78rem;
+    font-weight: 600;
+    color: #f9fafb;
+    overflow: hidden;
+    text-overflow: ellipsis;
+    white-space: nowrap;
+    max-width: 9.5rem;
+}
+.glass-pill-tag-open,
+.glass-pill-tag-close {
+    font-size: 0.68rem;
+    font-weight: 600;
+    padding: 0.08rem 0.45rem;
+    border-radius: 999px;
+    border: 1px solid;
+}
+.glass-pill-tag-open {
+    background: radial-gradient(circle at top right, rgba(34,197,94,0.18), rgba(6,95,70,0.5));
+    color: #bbf7d0;
+    border-color: rgba(34,197,94,0.7);
+}
+.glass-pill-tag-close {
+    background: radial-gradient(circle at top right, rgba(248,113,113,0.22), rgba(127,29,29,0.6));
+    color: #fee2e2;
+    border-color: rgba(248,113,113,0.85);
+}
+.glass-pill-body {
+    font-size: 0.72rem;
+    color: #cbd5f5;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+.glass-pill-left {
+    display: inline-flex;
+    align-items: center;
+    gap: 0.35rem;
+}
+.glass-pill-right {
+    display: inline-flex;
+    align-items: center;
+    gap: 0.35rem;
+}
+.glass-pill-series {
+    font-size: 0.7rem;
+    text-transform: uppercase;
+    letter-spacing: 0.04em;
+    color: #9ca3af;
+}
+.glass-dir-plain {
+    font-size: 0.72rem;
+    font-weight: 600;
+    color: #e5e7eb;
+}
+.glass-pill-label {
+    opacity: 0.7;
+}
+.glass-pill-separator {
+    opacity: 0.6;
+}
+</style>
+"""
+
+
+def short_label(tickers: pd.Series) -> pd.Series:
+    """
+    "KXNBAGAME-26FEB11LALGSW-GSW" -> "LALGSW (GSW)", long two part
+    tickers are cut to 15 chars.
+    """
+    tickers = tickers.where(tickers.map(lambda t: isinstance(t, str)), "unknown")
+    parts = tickers.str.split("-")
+    tail = parts.str[-2].fillna("")
+    side = parts.str[-1].fillna("")
+    clean = tail.str.lstrip("0123456789")
+    clean = clean.where(clean != "", tail)
+
+    short = tickers.where(tickers.str.len() <= 18, tickers.str[:15] + "...")
+    return (clean + " (" + side + ")").where(parts.str.len() >= 3, short)
+
+
+def series_label(tickers: pd.Series) -> pd.Series:
+    prefix = tickers.astype(str).str.split("-").str[0]
+    return prefix.map(SERIES_MAP).fillna(prefix).where(tickers.map(lambda t: isinstance(t, str)), "")
+
+
+def build_feed_html(df: pd.DataFrame, max_items: int = 8) -> str:
+    """
+    Sidebar pills for the newest open/close rows, newest first, built with
+    column wise string ops instead of a loop over rows.
+    """
+    notif = df.tail(max_items).iloc[::-1]
+    if notif.empty:
+        return ""
+
+    is_open = notif["action"] == "open"
+    ticker = notif["ticker"].astype(str)
+    price = notif["price"].map(lambda p: f"{p:.3f}" if pd.notna(p) else "n/a")
+    effect = (notif["effect"] * 100).map("{:.2f}%".format)
+
+    pills = (
+        '\n<div class="glass-pill" title="' + ticker + '">\n'
+        '  <div class="glass-pill-header">\n'
+        '    <div class="glass-pill-ticker">' + short_label(notif["ticker"]) + '</div>\n'
+        '    <div class="' + is_open.map({True: "glass-pill-tag-open", False: "glass-pill-tag-close"}) + '">'
+        + is_open.map({True: "OPEN", False: "CLOSE"}) + '</div>\n'
+        '  </div>\n'
+        '  <div class="glass-pill-body">\n'
+        '    <div class="glass-pill-left">\n'
+        '      <span class="glass-pill-series">' + series_label(notif["ticker"]) + '</span>\n'
+        '    </div>\n'
+        '    <div class="glass-pill-right">\n'
+        '      <span class="glass-dir-plain">' + notif["dir"].astype(str).str.upper() + '</span>\n'
+        '      <span class="glass-pill-separator">•</span>\n'
+        '      <span class="glass-pill-label">' + is_open.map({True: "@", False: "PnL"}) + '</span>\n'
+        '      <span>' + price.where(is_open, effect) + '</span>\n'
+        '    </div>\n'
+        '  </div>\n'
+        '</div>\n'
+    )
+    return FEED_CSS + '<div class="glass-feed-wrap"><h4>Recent actions</h4>' + "".join(pills) + "</div>"
+
+
+class Subscriber:
+    """
+    Client for the bot's Unix socket bus (bus.Publisher): newline delimited
+    JSON events. wait() blocks until something arrives or the timeout
+    passes and returns the decoded events. It reconnects on its own and
+    returns [] while the bot is not running.
+    """
+
+    def __init__(self, path: str = BUS_PATH):
+        self.path = path
+        self._sock = None
+        self._partial = b""
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def _connect(self) -> bool:
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+        except OSError:
+            return False
+        sock.setblocking(False)
+        self._sock = sock
+        self._partial = b""
+        return True
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def wait(self, timeout: float) -> list[dict]:
+        if self._sock is None and not self._connect():
+            time.sleep(timeout)
+            return []
+
+        ready, _, _ = select.select([self._sock], [], [], timeout)
+        if not ready:
+            return []
+
+        data = self._partial
+        while True:
+            try:
+                got = self._sock.recv(1 << 20)
+            except BlockingIOError:
+                break
+            except OSError:
+                got = b""
+            if not got:
+                self.close()
+                break
+            data += got
+
+        end = data.rfind(b"\n")
+        self._partial = data[end + 1:]
+        return [json.loads(line) for line in data[:end].split(b"\n") if line] if end >= 0 else []
@@ -0,0 +1,217 @@
+import threading
+from time import time as utime
+
+from pykalshi import Action
+from rich import print
+
+
+class Account:
+    """
+    Balance, exposure per market and the kill switch, kept current without
+    any network call on the tick path.
+
+    Two sources feed it:
+        - on_order() is hooked into an OrderEngine and applies every fill
+          the moment the worker sees it: cash moves by count * limit price,
+          the market's contract count and cost basis move with it.
+        - reconcile() replaces cash and portfolio value with
+          fetch_balance() and, when it returns something, the per market
+          exposure with fetch_positions(). By default those are
+          portfolio.get_balance() and portfolio.get_positions(), shard.py
+          passes readers of the coordinator's figures instead. A background
+          thread runs it every RECONCILE_SEC, and FILL_SYNC_SEC after a fill
+          so fees and the exchange's own marks catch up quickly.
+
+    Every attribute a strategy reads (total, cash, killed, exposure()) is a
+    plain lookup. killed is re-evaluated on every update, it trips when
+    total drops under floor or kill() is called, and only reset() clears it.
+    Amounts are in cents like the API.
+    """
+
+    RECONCILE_SEC = 10.0
+    FILL_SYNC_SEC = 1.0
+
+    def __init__(self, client, floor: float = 0, orders=None, clock=utime, background: bool = True,
+                 fetch_balance=None, fetch_positions=None):
+        self.client = client
+        self.floor = floor
+        self.clock = clock
+
+        self.cash = 0.0
+        self.portfolio_value = 0.0
+        self.total = 0.0
+        self.exposure_total = 0.0
+        self._exposure = {}   # ticker -> cost basis of open contracts, cents
+        self._contracts = {}  # ticker -> open contracts
+        self.killed = False
+        self.kill_reason = None
+        self.synced_at = None
+        self.fills = 0
+
+        # () -> (cash, portfolio value) and () -> {ticker: (contracts, exposure)} or None
+        self.fetch_balance = fetch_balance or self._rest_balance
+        self.fetch_positions = fetch_positions or self._rest_positions
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._next_sync = 0.0
+        self._closed = False
+        self._thread = None
+
+        if orders is not None:
+            self.attach(orders)
+        if background:
+            self._thread = threading.Thread(target=self._run, name="account", daemon=True)
+            self._thread.start()
+
+    # ------------- reads -------------
+
+    def exposure(self, ticker: str) -> float:
+        return self._exposure.get(ticker, 0.0)
+
+    def contracts(self, ticker: str) -> float:
+        return self._contracts.get(ticker, 0)
+
+    def summary(self) -> str:
+        state = f"KILLED({self.kill_reason})" if self.killed else "ok"
+        return (f"bal={self.total:.0f} cash={self.cash:.0f} exposure={self.exposure_total:.0f} "
+                f"markets={len(self._contracts)} {state}")
+
+    # ------------- updates -------------
+
+    def attach(self, orders):
+        orders.on_done.append(self.on_order)
+
+    def on_order(self, ticker, action, side, cents: int, count: int, order):
+        """
+        OrderEngine callback with the final order, runs on the order worker.
+        """
+        filled = _filled(order, count)
+        if not filled:
+            return
+        cost = filled * cents
+        sign = 1 if action == Action.BUY else -1
+
+        with self._lock:
+            self.cash -= sign * cost
+            self.portfolio_value += sign * cost
+            n = self._contracts.get(ticker, 0) + sign * filled
+            if n > 0:
+                self._contracts[ticker] = n
+                self._set_exposure(ticker, max(0.0, self._exposure.get(ticker, 0.0) + sign * cost))
+            else:
+                self._contracts.pop(ticker, None)
+                self._set_exposure(ticker, 0.0)
+            self.fills += 1
+            self._update()
+
+        # pull the exchange's numbers soon, they include fees
+        self._next_sync = min(self._next_sync, self.clock() + self.FILL_SYNC_SEC)
+        self._wake.set()
+
+    def reconcile(self):
+        cash, value = self.fetch_balance()
+        positions = self.fetch_positions()
+
+        with self._lock:
+            self.cash = float(cash)
+            self.portfolio_value = float(value)
+            if positions is not None:
+                self._contracts = {t: n for t, (n, _) in positions.items() if n}
+                self._exposure = {t: e for t, (n, e) in positions.items() if n}
+                self.exposure_total = float(sum(self._exposure.values()))
+            self.synced_at = self.clock()
+            self._update()
+
+    def kill(self, reason: str = "manual"):
+        with self._lock:
+            self._trip(reason)
+
+    def reset(self):
+        with self._lock:
+            self.killed = False
+            self.kill_reason = None
+            self._update()
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    # ------------- internals -------------
+
+    def _set_exposure(self, ticker, cents):
+        self.exposure_total += cents - self._exposure.get(ticker, 0.0)
+        if cents:
+            self._exposure[ticker] = cents
+        else:
+            self._exposure.pop(ticker, None)
+
+    def _update(self):
+        self.total = self.cash + self.portfolio_value
+        if not self.killed and self.synced_at is not None and self.total < self.floor:
+            self._trip(f"balance {self.total:.0f} < {self.floor:.0f}")
+
+    def _trip(self, reason):
+        if not self.killed:
+            self.killed = True
+            self.kill_reason = reason
+            print(f"[red bold][KILL] {reason}")
+
+    def _rest_balance(self):
+        bal = self.client.portfolio.get_balance()
+        return bal.balance, bal.portfolio_value
+
+    def _rest_positions(self):
+        return rest_positions(self.client)
+
+    def _run(self):
+        while not self._closed:
+            wait = self._next_sync - self.clock()
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            self._next_sync = self.clock() + self.RECONCILE_SEC
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"[ERR][account] reconcile: {type(e).__name__}: {e}")
+
+
+def rest_positions(client):
+    """
+    {ticker: (contracts, exposure in cents)} from portfolio.get_positions(),
+    or None when the client has no such call or it failed.
+    """
+    get = getattr(client.portfolio, "get_positions", None)
+    if get is None:
+        return None
+    try:
+        rows = get()
+    except Exception as e:
+        print(f"[ERR][account] positions: {type(e).__name__}: {e}")
+        return None
+
+    out = {}
+    for p in rows:
+        n = getattr(p, "position", None)
+        if n is None:
+            n = float(getattr(p, "position_fp", 0) or 0)
+        e = getattr(p, "market_exposure", None)
+        if e is None:
+            e = float(getattr(p, "market_exposure_dollars", 0) or 0) * 100
+        out[p.ticker] = (abs(n), float(e))
+    return out
+
+
+def _filled(order, count) -> float:
+    n = getattr(order, "fill_count", None)
+    if n is None:
+        fp = getattr(order, "fill_count_fp", None)
+        if fp is not None:
+            n = float(fp)
+    if n is None:
+        n = count if getattr(order, "status", None) == "executed" else 0
+    return n
@@ -1,26 +1,45 @@
 import asyncio
-import pmxt
 from dotenv import load_dotenv
 from os import getenv
 from rich import print
 import json
-from dateutil import parser
-from pykalshi import MarketStatus, KalshiClient, Action, Side, TimeInForce
-from time import sleep, time as utime
-from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import (
-    OrderArgs,
-    OrderType,
-    OpenOrderParams,
-    BalanceAllowanceParams,
-    AssetType,
-)
-from py_clob_client.order_builder.constants import BUY, SELL
-from eth_account import Account
-from redeem import redeem
+from pykalshi import MarketStatus, KalshiClient, Action, Side, TimeInForce, Feed, TickerMessage
+from time import sleep, time as utime, perf_counter
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from redeem import Redeemer
+from poly import PolyBook, POLY_MARKET_WS
+from legrisk import LegRisk
+from latency import Latency
+
+# py_clob_client (which pulls in eth_account and friends) is imported by
+# _import_clob() on a startup thread, pmxt by Arb._connect_pmxt(), web3 by
+# the Redeemer on its first batch. bench_startup.py measures the difference.
+ClobClient = OrderArgs = OrderType = BalanceAllowanceParams = AssetType = BUY = SELL = None
+
+
+def _import_clob():
+    global ClobClient, OrderArgs, OrderType, BalanceAllowanceParams, AssetType, BUY, SELL
+    from py_clob_client.client import ClobClient
+    from py_clob_client.clob_types import (
+        OrderArgs,
+        OrderType,
+        BalanceAllowanceParams,
+        AssetType,
+    )
+    from py_clob_client.order_builder.constants import BUY, SELL
 
 
 class Arb:
+    EXEC_WORKERS = 4           # order threads, warmed at startup
+    METRICS_PORT = 9102        # /metrics scrape endpoint, LATENCY_PORT overrides
+    HB_SEC = 60
+
+    CLOB_API = "https://clob.polymarket.com"
+    SIGNATURE_TYPE = 0
+    CHAIN_ID = 137
+
     def __init__(self):
         # detection threshold for gross edge
         self.threshold = 0.13      # 13 percent gross edge to trigger
@@ -29,40 +48,159 @@ class Arb:
         self.pad = 0.01            # price padding on each venue
 
         load_dotenv(".env")
-        CLOB_API = "https://clob.polymarket.com"
-        SIGNATURE_TYPE = 0
 
-        self.auth_client = ClobClient(
-            CLOB_API,
+        # nothing here touches the network, the Polymarket clients are built
+        # by connect() at the start of run()
+        self.auth_client = None    # py_clob_client ClobClient
+        self.poly = None           # pmxt.Polymarket
+        self.kalshi = KalshiClient.from_env(demo=False)
+
+        self.positions = {}
+
+        # order legs run here, threads are spun up before the first trade
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.EXEC_WORKERS, thread_name_prefix="arb-exec"
+        )
+        # file writes and other side effects, never on the order path
+        self.io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arb-io")
+        self._warm_executor()
+
+        # (token_id, price_cents) -> signed Poly BUY order for self.qty
+        self._presigned = {}
+        self._presign_lock = threading.Lock()
+
+        # detection -> second leg submitted, in ms, one entry per trade
+        self.exec_latency = deque(maxlen=500)
+        # per stage histograms: quote wake-up, order round trips, detection to legs out
+        self.lat = Latency("arb").serve(self.METRICS_PORT)
+
+        # exposure per leg and unwinding of one sided fills
+        self.legs = LegRisk(self)
+
+        # CTF redemptions run on their own thread, picks up IDS.txt leftovers on start
+        self.redeemer = Redeemer().start()
+
+    # --------------- Startup ---------------
+
+    def connect(self):
+        """
+        Build the Polymarket clients on threads, side by side: the CLOB
+        client (import, derive_api_key, connection warm up) and pmxt. Both
+        are independent of each other and of the Kalshi side, so run()
+        starts them before the Kalshi Feed handshake and only waits for
+        them once the Feed is subscribed. Returns an awaitable, the
+        threads are already running when it returns.
+        """
+        loop = asyncio.get_running_loop()
+        return asyncio.gather(
+            loop.run_in_executor(None, self._connect_clob),
+            loop.run_in_executor(None, self._connect_pmxt),
+        )
+
+    def _connect_clob(self):
+        _import_clob()
+        client = ClobClient(
+            self.CLOB_API,
             key=getenv("POLY_PRIV_KEY"),
-            chain_id=137,
-            signature_type= SIGNATURE_TYPE,
+            chain_id=self.CHAIN_ID,
+            signature_type=self.SIGNATURE_TYPE,
             funder=getenv("WALLET_ADDRESS"),
         )
+        client.set_api_creds(client.derive_api_key())
+        self.auth_client = client
 
-        creds = self.auth_client.derive_api_key()
-        self.auth_client.set_api_creds(creds)
+        # open the CLOB connection on an order thread, so the first arb does not pay for it
+        try:
+            self.executor.submit(client.get_ok).result()
+        except Exception as e:
+            print(f"[red]CLOB warmup failed: {e}[/red]")
 
-        balance = self.auth_client.get_balance_allowance(
-            BalanceAllowanceParams(asset_type=AssetType.COLLATERAL)
-        )
+        # informational only, nothing waits for it
+        self.io_pool.submit(self._print_balance)
+
+    def _connect_pmxt(self):
+        import pmxt
+
+        self.poly = pmxt.Polymarket()
+
+    def _print_balance(self):
+        try:
+            balance = self.auth_client.get_balance_allowance(
+                BalanceAllowanceParams(asset_type=AssetType.COLLATERAL)
+            )
+        except Exception as e:
+            print(f"[red]USDC balance failed: {e}[/red]")
+            return
         usdc_balance = int(balance["balance"]) / 1e6
         print(f"[green]USDC Balance: ${usdc_balance:.2f}[/green]")
 
-        self.poly = pmxt.Polymarket()
-        self.kalshi = KalshiClient.from_env(demo=False)
+    # --------------- Execution setup ---------------
 
-        self.positions = {}
+    def _warm_executor(self):
+        """
+        Make the pool start all of its threads now, so the first arb does
+        not pay for it. connect() warms the CLOB connection.
+        """
+        barrier = threading.Barrier(self.EXEC_WORKERS)
+        for f in [self.executor.submit(barrier.wait) for _ in range(self.EXEC_WORKERS)]:
+            f.result()
+
+    def prepare_poly_orders(self, token_ids):
+        """
+        Sign a BUY for self.qty at every 1c tick for each token.
+
+        Polymarket orders are EIP712 signed over price and size, so a
+        template cannot be signed without a price. Signing the whole ladder
+        up front means buy_poly only has to look the order up.
+        """
+        signed = {}
+        for token_id in token_ids:
+            for cents in range(1, 100):
+                try:
+                    signed[(token_id, cents)] = self.auth_client.create_order(
+                        OrderArgs(token_id=token_id, price=cents / 100, size=self.qty, side=BUY)
+                    )
+                except Exception as e:
+                    print(f"[red]Poly presign {cents}c failed: {e}[/red]")
+                    break
+
+        with self._presign_lock:
+            self._presigned = signed
+        print(f"[cyan]Presigned {len(signed)} Poly orders[/cyan]")
+
+    def _take_presigned(self, token_id, price):
+        """
+        The presigned order at exactly this price, or None. An off-grid
+        price gets None so the caller signs it fresh, rounding to the
+        nearest cent could go above the limit.
+        """
+        cents = round(price * 100)
+        if abs(price * 100 - cents) > 1e-6:
+            return None
+        with self._presign_lock:
+            return self._presigned.pop((token_id, cents), None)
+
+    def _append_line(self, path, line):
+        try:
+            with open(path, "a") as f:
+                f.write(line)
+        except Exception as e:
+            print(f"[red]Error writing {path}: {e}[/red]")
 
     # --------------- Kalshi and Poly helpers (sync) ---------------
 
-    def buy_kalshi(self, ticker, side, max_base_price):
+    def buy_kalshi(self, ticker, side, max_base_price, sent=None):
         """
         Place a FOK buy on Kalshi at (max_base_price + pad).
         max_base_price is in dollars.
+        sent, if given, is a list the submit timestamp is appended to.
         """
         limit_cents = int((max_base_price + self.pad) * 100)
 
+        if sent is not None:
+            sent.append(perf_counter())
+
+        t_send = self.lat.now()
         try:
             if side == Side.NO:
                 order = self.kalshi.portfolio.place_order(
@@ -85,6 +223,7 @@ class Arb:
         except Exception as e:
             print(f"[red]Kalshi order exception: {e}[/red]")
             return None
+        self.lat.record("kalshi_ack", t_send)
 
         # FOK should either execute or not, but keep legacy cancel logic
         if order is None:
@@ -112,43 +251,96 @@ class Arb:
 
         return order_after_cancel
 
-    def buy_poly(self, token_id, base_price, condition_id):
+    def buy_poly(self, token_id, base_price, condition_id, sent=None, fok=False):
         """
-        Place a GTC buy on Polymarket.
+        Place a GTC (or FOK if fok) buy on Polymarket.
         base_price is the price BEFORE pad. Final limit = base_price + pad.
+        Uses the presigned order for that price when there is one.
+        sent, if given, is a list the submit timestamp is appended to.
         """
         final_price = base_price + self.pad
-        limit_order = OrderArgs(
-            token_id=token_id,
-            price=final_price,   # final price per share
-            size=self.qty,
-            side=BUY,
-        )
 
+        signed_order = self._take_presigned(token_id, final_price)
+        if signed_order is None:
+            limit_order = OrderArgs(
+                token_id=token_id,
+                price=final_price,   # final price per share
+                size=self.qty,
+                side=BUY,
+            )
+
+            t_sign = self.lat.now()
+            try:
+                signed_order = self.auth_client.create_order(limit_order)
+            except Exception as e:
+                print(f"[red]Poly create_order exception: {e}[/red]")
+                return None
+            self.lat.record("poly_sign", t_sign)
+
+        if sent is not None:
+            sent.append(perf_counter())
+
+        t_send = self.lat.now()
         try:
-            signed_order = self.auth_client.create_order(limit_order)
+            response = self.auth_client.post_order(
+                signed_order, OrderType.FOK if fok else OrderType.GTC
+            )
         except Exception as e:
-            print(f"[red]Poly create_order exception: {e}[/red]")
+            print(f"[red]Poly post_order exception: {e}[/red]")
             return None
+        self.lat.record("poly_ack", t_send)
 
-        print(f"[yellow]Poly order signed at {final_price:.4f}[/yellow]")
+        self.io_pool.submit(self._append_line, "IDS.txt", f"{condition_id}\n")
+
+        return response
+
+    def sell_kalshi(self, ticker, side, min_base_price):
+        """
+        FOK sell on Kalshi at (min_base_price - pad), floored at 1c.
+        """
+        limit_cents = max(1, int((min_base_price - self.pad) * 100))
+        price_kw = {"no_price": limit_cents} if side == Side.NO else {"yes_price": limit_cents}
 
         try:
-            response = self.auth_client.post_order(signed_order, OrderType.GTC)
+            return self.kalshi.portfolio.place_order(
+                ticker,
+                Action.SELL,
+                side,
+                count=self.qty,
+                time_in_force=TimeInForce.FOK,
+                **price_kw,
+            )
         except Exception as e:
-            print(f"[red]Poly post_order exception: {e}[/red]")
+            print(f"[red]Kalshi sell exception: {e}[/red]")
             return None
 
-        print("[cyan]Poly order placed[/cyan]")
-        print(response)
+    def sell_poly(self, token_id, base_price):
+        """
+        FOK sell on Polymarket at (base_price - pad), floored at 1c.
+        """
+        final_price = max(0.01, round(base_price - self.pad, 2))
 
         try:
-            with open("IDS.txt", "a") as f:
-                f.write(f"{condition_id}\n")
+            signed_order = self.auth_client.create_order(
+                OrderArgs(token_id=token_id, price=final_price, size=self.qty, side=SELL)
+            )
+            return self.auth_client.post_order(signed_order, OrderType.FOK)
         except Exception as e:
-            print(f"[red]Error writing IDS.txt: {e}[/red]")
+            print(f"[red]Poly sell exception: {e}[/red]")
+            return None
 
-        return response
+    @staticmethod
+    def poly_filled(response):
+        """
+        Infer a fill from a post_order response's takingAmount.
+        """
+        if response is None:
+            return False
+        try:
+            ta = response.get("takingAmount")
+            return bool(ta and float(ta) > 0)
+        except Exception:
+            return False
 
     # --------------- Async arb execution ---------------
 
@@ -161,45 +353,55 @@ class Arb:
         poly_token_id,
         poly_base_price,
         condition_id,
+        t_detect=None,
     ):
         """
-        Execute Kalshi and Poly legs concurrently using asyncio.
+        Execute Kalshi and Poly legs concurrently on the arb executor.
         kalshi_max_base and poly_base_price are precomputed base prices (without pad).
+        t_detect is the perf_counter() reading when the edge was seen.
         """
         loop = asyncio.get_running_loop()
-
-        print(
-            f"[magenta]Executing arb {leg_name}[/magenta]\n"
-            f"  Kalshi side: {kalshi_side.name}, max_base={kalshi_max_base:.4f}, "
-            f"Poly base={poly_base_price:.4f} (final={poly_base_price + self.pad:.4f})\n"
-            f"  ticker={ticker}, condition_id={condition_id}"
-        )
+        if t_detect is None:
+            t_detect = perf_counter()
+        sent = []
 
         kalshi_future = loop.run_in_executor(
-            None, self.buy_kalshi, ticker, kalshi_side, kalshi_max_base
+            self.executor, self.buy_kalshi, ticker, kalshi_side, kalshi_max_base, sent
         )
         poly_future = loop.run_in_executor(
-            None, self.buy_poly, poly_token_id, poly_base_price, condition_id
+            self.executor, self.buy_poly, poly_token_id, poly_base_price, condition_id, sent
         )
 
         kalshi_order, poly_response = await asyncio.gather(
             kalshi_future, poly_future
         )
 
+        # both legs are out, now there is time to talk about it
+        if len(sent) == 2:
+            detect_ms = (max(sent) - t_detect) * 1000
+            self.exec_latency.append(detect_ms)
+            self.lat.record_us("second_leg", detect_ms * 1000)
+            print(f"[cyan]{leg_name} detect->second leg {detect_ms:.1f}ms[/cyan]")
+
+        print(
+            f"[magenta]Executed arb {leg_name}[/magenta]\n"
+            f"  Kalshi side: {kalshi_side.name}, max_base={kalshi_max_base:.4f}, "
+            f"Poly base={poly_base_price:.4f} (final={poly_base_price + self.pad:.4f})\n"
+            f"  ticker={ticker}, condition_id={condition_id}"
+        )
+        print(poly_response)
+
         # Evaluate fills
         kalshi_status = getattr(kalshi_order, "status", None) if kalshi_order is not None else None
         kalshi_filled = kalshi_status == "executed"
 
-        poly_filled = False
+        poly_filled = self.poly_filled(poly_response)
         poly_status_str = "unknown"
         if poly_response is None:
             poly_status_str = "no_response"
         else:
-            # Try to infer fill from response fields
             try:
-                ta = poly_response.get("takingAmount")
-                poly_filled = bool(ta and float(ta) > 0)
-                poly_status_str = f"takingAmount={ta}"
+                poly_status_str = f"takingAmount={poly_response.get('takingAmount')}"
             except Exception:
                 poly_status_str = "no_takingAmount_field"
 
@@ -211,13 +413,15 @@ class Arb:
 
         if kalshi_filled and poly_filled:
             print("[green]Both legs filled successfully[/green]")
+            self.legs.add("kalshi", ticker, self.qty)
+            self.legs.add("poly", poly_token_id, self.qty)
             return True, True
 
         if kalshi_filled and not poly_filled:
-            print("[red]WARNING: Kalshi filled, Poly did NOT fill. Naked on Kalshi.[/red]")
+            print("[red]WARNING: Kalshi filled, Poly did NOT fill. Naked on Kalshi, unwinding.[/red]")
 
         if not kalshi_filled and poly_filled:
-            print("[red]WARNING: Poly filled, Kalshi did NOT fill. Naked on Poly.[/red]")
+            print("[red]WARNING: Poly filled, Kalshi did NOT fill. Naked on Poly, unwinding.[/red]")
 
         if not kalshi_filled and not poly_filled:
             print("[yellow]Both legs failed or did not fill[/yellow]")
@@ -226,157 +430,241 @@ class Arb:
 
     # --------------- Main loop ---------------
 
-    async def run(self):
+    def load_market(self):
+        """
+        Current KXBTC15M market and its Polymarket twin.
+        Returns (ticker, close_ts, yes_token_id, no_token_id, condition_id).
+        """
+        ticker, close = self._kalshi_market()
+        return (ticker, close, *self._poly_market(close))
+
+    def _kalshi_market(self):
+        from dateutil import parser
+
         market = self.kalshi.get_markets(
             limit=100,
             mve_filter="exclude",
             status=MarketStatus.OPEN,
             series_ticker="KXBTC15M",
         )[0]
-        ticker = market.ticker
-        close = int(parser.isoparse(market.close_time).timestamp())
-        entered = False
-        condition_id = None
-
-        print(f"[cyan]Starting arb loop on ticker {ticker}[/cyan]")
-
-        while True:
-            now = utime()
-
-            if now > close:
-                print("[yellow]Market closed, resetting...[/yellow]")
-                print("[yellow]Sleeping for 90 seconds...[/yellow]")
-                await asyncio.sleep(90)
-
-                market = self.kalshi.get_markets(
-                    limit=100,
-                    mve_filter="exclude",
-                    status=MarketStatus.OPEN,
-                    series_ticker="KXBTC15M",
-                )[0]
-                ticker = market.ticker
-                close = int(parser.isoparse(market.close_time).timestamp())
-                entered = False
-
-                print(f"[cyan]New market detected: {ticker}[/cyan]")
+        return market.ticker, int(parser.isoparse(market.close_time).timestamp())
 
-                # Try redeem previous condition if available
-                if condition_id is not None:
-                    try:
-                        print("[yellow]TRYING TO REDEEM PAST MARKET...[/yellow]")
-                        txn = redeem(condition_id)
-                        with open("reciept.txt", "a") as f:
-                            f.write(f"{ticker} - {condition_id} - {txn}\n")
-                    except Exception as e:
-                        print(f"[red]Redeem failed: {e}[/red]")
-                condition_id = None
-
-            if entered:
-                print("[yellow]Already entered in this market, skipping...[/yellow]")
-                await asyncio.sleep(10)
-                continue
-
-            # get Kalshi quotes
-            k = self.kalshi.get_market(ticker)
-            ky = float(k.yes_ask / 100) if k.yes_ask is not None else None
-            kn = float(k.no_ask / 100) if k.no_ask is not None else None
-
-            if ky is None or kn is None:
-                print("[red]Missing Kalshi quotes, retrying...[/red]")
-                await asyncio.sleep(1)
-                continue
-
-            # get Polymarket quotes
-            p = self.poly.call_api(
-                "getMarketBySlug", {"slug": f"btc-updown-15m-{close - 900}"}
-            )
-            yes_id, no_id = json.loads(p["clobTokenIds"])
-            condition_id = p["conditionId"]
-
-            best_ask = p.get("bestAsk")
-            best_bid = p.get("bestBid")
-
-            if best_ask is None or best_bid is None:
-                print("[red]Missing Polymarket bestAsk or bestBid, retrying...[/red]")
-                await asyncio.sleep(1)
-                continue
+    def _poly_market(self, close):
+        """
+        Polymarket twin of the Kalshi market closing at close, and start
+        presigning its orders. Returns (yes_token_id, no_token_id, condition_id).
+        """
+        p = self.poly.call_api(
+            "getMarketBySlug", {"slug": f"btc-updown-15m-{close - 900}"}
+        )
+        yes_id, no_id = json.loads(p["clobTokenIds"])
 
-            py = float(best_ask)           # YES on Poly
-            pn = 1.0 - py                  # NO synthetic price
+        with self._presign_lock:
+            self._presigned = {}
+        self.io_pool.submit(self.prepare_poly_orders, [yes_id, no_id])
 
-            gross_edge_yes = 1.0 - (ky + pn)   # YES Kalshi, NO Poly
-            gross_edge_no = 1.0 - (kn + py)    # NO Kalshi, YES Poly
+        return yes_id, no_id, p["conditionId"]
 
-            print(
-                f"[white]Ky: {ky:.4f}, Kn: {kn:.4f}, Py(bestAsk): {py:.4f}, "
-                f"Pn: {pn:.4f}, TD: {close - now:.2f}[/white]"
-            )
-            print(
-                f"[white]Gross edge YES-Kalshi/NO-Poly: {gross_edge_yes:.4f}, "
-                f"NO-Kalshi/YES-Poly: {gross_edge_no:.4f}[/white]"
-            )
+    async def run(self, poly_ws_url=POLY_MARKET_WS):
+        """
+        Stream both books and re-check the edge on every quote update.
 
-            # strat 1: buy YES Kalshi, buy NO Poly
-            if gross_edge_yes >= self.threshold:
-                kalshi_est = ky + self.pad
-                max_pn_poly = 1.0 - self.min_edge - kalshi_est
+        Kalshi top of book comes from the Feed ticker channel, Polymarket
+        from the CLOB market websocket. Updates only set an event, the loop
+        below coalesces bursts and evaluates the latest quotes.
+        """
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
 
-                # base price is before pad
-                poly_base_price = max_pn_poly - self.pad
+        # startup: the Polymarket clients and the Kalshi market lookup run
+        # on threads while Feed.start() below blocks on the websocket handshake
+        connecting = self.connect()
+        kalshi_market = loop.run_in_executor(None, self._kalshi_market)
 
-                print(
-                    f"[green]Arb YES-Kalshi / NO-Poly found[/green]\n"
-                    f"  gross_edge={gross_edge_yes:.4f} (threshold={self.threshold:.4f})\n"
-                    f"  kalshi_est={kalshi_est:.4f}, max_pn_poly={max_pn_poly:.4f}, "
-                    f"poly_base_price={poly_base_price:.4f}"
-                )
+        # Kalshi YES/NO ask and bid for the current ticker, t = when it arrived
+        kq = {"ky": None, "kn": None, "ky_bid": None, "kn_bid": None, "t": None}
+        book = PolyBook(poly_ws_url, on_update=changed.set)
+        asyncio.create_task(book.run())
 
-                if poly_base_price <= 0:
-                    print("[red]Computed Poly base price non positive, skipping[/red]")
-                else:
-                    kalshi_filled, poly_filled = await self.execute_arb_pair(
-                        "YES-Kalshi_NO-Poly",
-                        ticker,
-                        Side.YES,
-                        ky,               # base price for Kalshi
-                        no_id,
-                        poly_base_price,
-                        condition_id,
+        entered = False
+        unwind = None  # LegRisk.resolve task while a pair is naked
+        last_print = 0.0
+        last_hb = utime()
+
+        with Feed(self.kalshi) as feed:
+            ticker, close = await kalshi_market
+
+            @feed.on("ticker")
+            @self.lat.timed("tick")
+            def handle_ticker(msg: TickerMessage):
+                if msg.market_ticker != ticker:
+                    return
+                if msg.yes_bid is None or msg.yes_ask is None:
+                    return
+                kq["ky"] = msg.yes_ask / 100
+                kq["kn"] = 1 - msg.yes_bid / 100
+                kq["ky_bid"] = msg.yes_bid / 100
+                kq["kn_bid"] = 1 - msg.yes_ask / 100
+                kq["t"] = self.lat.tick_ns
+                loop.call_soon_threadsafe(changed.set)
+
+            feed.subscribe("ticker", market_ticker=ticker)
+            print(f"[cyan]Starting arb loop on ticker {ticker}[/cyan]")
+
+            # the Poly side needs both clients, which have had the Feed handshake to finish
+            await connecting
+            yes_id, no_id, condition_id = await loop.run_in_executor(None, self._poly_market, close)
+            book.subscribe([yes_id, no_id])
+
+            while True:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=max(0.1, close - utime()))
+                except asyncio.TimeoutError:
+                    pass
+                changed.clear()
+
+                now = utime()
+                # Feed thread -> this loop, only for wake ups caused by a Kalshi quote
+                self.lat.record("wake", kq["t"])
+                kq["t"] = None
+
+                if now - last_hb >= self.HB_SEC:
+                    last_hb = now
+                    print(f"[HB] {ticker} {self.legs.summary()} {self.lat.summary()}")
+
+                if now > close:
+                    print("[yellow]Market closed, resetting...[/yellow]")
+                    feed.unsubscribe("ticker", market_ticker=ticker)
+                    # redeemed in the background once the condition had time to resolve
+                    self.redeemer.submit(condition_id, delay=90)
+                    print("[yellow]Sleeping for 90 seconds...[/yellow]")
+                    await asyncio.sleep(90)
+
+                    # no unwind may keep trading the old market
+                    await self.legs.settle(ticker, yes_id, no_id)
+                    unwind = None
+                    # REST lookups, off the loop so the Poly reader and pings keep running
+                    ticker, close, yes_id, no_id, condition_id = await loop.run_in_executor(None, self.load_market)
+                    for k in kq:
+                        kq[k] = None
+                    book.subscribe([yes_id, no_id])
+                    feed.subscribe("ticker", market_ticker=ticker)
+                    entered = False
+
+                    print(f"[cyan]New market detected: {ticker}[/cyan]")
+                    continue
+
+                # a one sided fill is being completed or flattened
+                if unwind is not None:
+                    if not unwind.done():
+                        continue
+                    try:
+                        # stop trading this market while a leg is stuck naked
+                        entered = unwind.result() in ("completed", "stuck")
+                    except Exception as e:
+                        print(f"[red]Unwind failed: {e}. {self.legs.summary()}[/red]")
+                    unwind = None
+
+                if entered:
+                    continue
+
+                t_detect = perf_counter()
+                ky, kn = kq["ky"], kq["kn"]
+                py = book.ask(yes_id)          # YES on Poly
+                pn = book.ask(no_id)           # NO on Poly
+                if ky is None or kn is None or py is None:
+                    continue
+                if pn is None:
+                    pn = 1.0 - py              # NO synthetic price
+
+                gross_edge_yes = 1.0 - (ky + pn)   # YES Kalshi, NO Poly
+                gross_edge_no = 1.0 - (kn + py)    # NO Kalshi, YES Poly
+
+                # quotes tick many times a second, print at most once per second
+                if now - last_print >= 1.0:
+                    last_print = now
+                    print(
+                        f"[white]Ky: {ky:.4f}, Kn: {kn:.4f}, Py(bestAsk): {py:.4f}, "
+                        f"Pn: {pn:.4f}, TD: {close - now:.2f}[/white]"
+                    )
+                    print(
+                        f"[white]Gross edge YES-Kalshi/NO-Poly: {gross_edge_yes:.4f}, "
+                        f"NO-Kalshi/YES-Poly: {gross_edge_no:.4f}[/white]"
                     )
 
-                    if kalshi_filled and poly_filled:
-                        entered = True
-
-            # strat 2: buy NO Kalshi, buy YES Poly
-            elif gross_edge_no >= self.threshold:
-                kalshi_est = kn + self.pad
-                max_py_poly = 1.0 - self.min_edge - kalshi_est
-                poly_base_price = max_py_poly - self.pad
+                # strat 1: buy YES Kalshi, buy NO Poly
+                if gross_edge_yes >= self.threshold:
+                    kalshi_est = ky + self.pad
+                    max_pn_poly = 1.0 - self.min_edge - kalshi_est
 
-                print(
-                    f"[green]Arb NO-Kalshi / YES-Poly found[/green]\n"
-                    f"  gross_edge={gross_edge_no:.4f} (threshold={self.threshold:.4f})\n"
-                    f"  kalshi_est={kalshi_est:.4f}, max_py_poly={max_py_poly:.4f}, "
-                    f"poly_base_price={poly_base_price:.4f}"
-                )
+                    # base price is before pad
+                    poly_base_price = max_pn_poly - self.pad
 
-                if poly_base_price <= 0:
-                    print("[red]Computed Poly base price non positive, skipping[/red]")
-                else:
-                    kalshi_filled, poly_filled = await self.execute_arb_pair(
-                        "NO-Kalshi_YES-Poly",
-                        ticker,
-                        Side.NO,
-                        kn,               # base price for Kalshi
-                        yes_id,
-                        poly_base_price,
-                        condition_id,
+                    print(
+                        f"[green]Arb YES-Kalshi / NO-Poly found[/green]\n"
+                        f"  gross_edge={gross_edge_yes:.4f} (threshold={self.threshold:.4f})\n"
+                        f"  kalshi_est={kalshi_est:.4f}, max_pn_poly={max_pn_poly:.4f}, "
+                        f"poly_base_price={poly_base_price:.4f}"
                     )
 
-                    if kalshi_filled and poly_filled:
-                        entered = True
+                    if poly_base_price <= 0:
+                        print("[red]Computed Poly base price non positive, skipping[/red]")
+                    else:
+                        kalshi_filled, poly_filled = await self.execute_arb_pair(
+                            "YES-Kalshi_NO-Poly",
+                            ticker,
+                            Side.YES,
+                            ky,               # base price for Kalshi
+                            no_id,
+                            poly_base_price,
+                            condition_id,
+                            t_detect,
+                        )
+
+                        if kalshi_filled and poly_filled:
+                            entered = True
+                        elif kalshi_filled or poly_filled:
+                            unwind = self.legs.start(
+                                "kalshi" if kalshi_filled else "poly",
+                                ticker, Side.YES, no_id, ky, poly_base_price,
+                                condition_id, kq, book,
+                            )
+
+                # strat 2: buy NO Kalshi, buy YES Poly
+                elif gross_edge_no >= self.threshold:
+                    kalshi_est = kn + self.pad
+                    max_py_poly = 1.0 - self.min_edge - kalshi_est
+                    poly_base_price = max_py_poly - self.pad
+
+                    print(
+                        f"[green]Arb NO-Kalshi / YES-Poly found[/green]\n"
+                        f"  gross_edge={gross_edge_no:.4f} (threshold={self.threshold:.4f})\n"
+                        f"  kalshi_est={kalshi_est:.4f}, max_py_poly={max_py_poly:.4f}, "
+                        f"poly_base_price={poly_base_price:.4f}"
+                    )
 
-            await asyncio.sleep(1)
+                    if poly_base_price <= 0:
+                        print("[red]Computed Poly base price non positive, skipping[/red]")
+                    else:
+                        kalshi_filled, poly_filled = await self.execute_arb_pair(
+                            "NO-Kalshi_YES-Poly",
+                            ticker,
+                            Side.NO,
+                            kn,               # base price for Kalshi
+                            yes_id,
+                            poly_base_price,
+                            condition_id,
+                            t_detect,
+                        )
+
+                        if kalshi_filled and poly_filled:
+                            entered = True
+                        elif kalshi_filled or poly_filled:
+                            unwind = self.legs.start(
+                                "kalshi" if kalshi_filled else "poly",
+                                ticker, Side.NO, yes_id, kn, poly_base_price,
+                                condition_id, kq, book,
+                            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+"""
+Offline backtest of the strategy_yes_only entry/SL rules over recorded
+KXBTC15M ticks (crypto_data output).
+
+    python backtest.py                      # legacy CSVs in ../data
+    python backtest.py ../data/ticks        # columnar tick store
+
+Rules mirrored from Kalshi.strategy_yes_only, per market:
+    - YES entry: spread <= 0.10, L_LIMIT <= yes_ask <= U_LIMIT and
+      _approaching_from_below (>= 6 ticks in the last 12s, one of them
+      under L_LIMIT, slope first->last >= 0.002/s). Limit = yes_ask + 0.01.
+    - otherwise NO entry: same spread and band on no_ask = 1 - yes_bid.
+    - SL: sell when the held side's bid < SL, at that bid.
+    - at most one trade per market (the live bot unsubscribes after exit).
+    - no SL: held to resolution, pays 1 or 0.
+
+Fill assumptions (recorded in run().summary):
+    fill="limit"   entry at the limit price, what the live bot books
+    fill="ask"     entry at the ask the order met (limit price improvement)
+    latency_ticks  orders meet the quote that many ticks later. An entry
+                   whose later ask is above the limit is a miss, an SL sells
+                   at whatever the later bid is.
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from ticks import BTC_PRICE_COLUMNS, KALSHI_TICK_COLUMNS, load_ticks
+
+WINDOW_SEC = 12      # Kalshi._px_hist_secs
+MIN_TICKS = 6        # Kalshi._min_ticks
+MIN_SLOPE = 0.002    # dollars per second, _approaching_from_below
+MAX_SPREAD = 0.10
+
+# per tick arrays every simulation reads, see Backtest.arrays
+ARRAY_FIELDS = ("ts", "bid", "ask", "start", "mstart", "mend", "result")
+
+
+def load_data(kalshi="./../data/KXBTC15M_data.csv", btc="./../data/btc_prices.csv"):
+    """
+    Load Kalshi ticks and CFB prices as DataFrames.
+
+    kalshi and btc are either the headerless CSVs crypto_data used to write,
+    or a tick store root (see ticks.py), in which case both come from it.
+    """
+    if os.path.isdir(kalshi):
+        t = load_ticks(kalshi, "KXBTC15M")
+        b = load_ticks(kalshi, "BTC")
+        return (
+            t.to_pandas() if t is not None else pd.DataFrame(columns=[c for c, _ in KALSHI_TICK_COLUMNS]),
+            b.to_pandas() if b is not None else None,
+        )
+
+    ticks = pd.read_csv(kalshi, header=None, names=[c for c, _ in KALSHI_TICK_COLUMNS])
+    prices = None
+    if btc and os.path.exists(btc):
+        prices = pd.read_csv(btc, header=None, names=[c for c, _ in BTC_PRICE_COLUMNS])
+    return ticks, prices
+
+
+class Backtest:
+    """
+    Precomputes everything that does not depend on CONFIG once, so run()
+    only does a handful of vectorized passes plus a walk over the sparse
+    entry candidates.
+    """
+
+    def __init__(self, ticks: pd.DataFrame, btc: pd.DataFrame | None = None,
+                 fill: str = "limit", latency_ticks: int = 0):
+        if fill not in ("limit", "ask"):
+            raise ValueError(f"fill must be 'limit' or 'ask', got {fill!r}")
+        self.fill = fill
+        self.latency_ticks = latency_ticks
+
+        df = ticks.dropna(subset=["yes_bid", "yes_ask"])
+        df = df.sort_values(["market_ticker", "timestamp"], kind="stable").reset_index(drop=True)
+        codes, markets = pd.factorize(df["market_ticker"])
+        self.markets = np.asarray(markets)
+
+        ts = df["timestamp"].to_numpy(np.float64)
+        bid = df["yes_bid"].to_numpy(np.float64) / 100
+        ask = df["yes_ask"].to_numpy(np.float64) / 100
+
+        # lay markets end to end on one time axis, so a single searchsorted
+        # finds the start of every tick's 12s window without crossing markets
+        span = (ts.max() - ts.min() + WINDOW_SEC + 1) if len(ts) else 1.0
+        key = ts + codes * span
+        start = np.searchsorted(key, key - WINDOW_SEC, side="left")
+
+        mstart = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], int)
+        mend = np.r_[mstart[1:], len(codes)]
+
+        self.arrays = {
+            "ts": ts,
+            "bid": bid,
+            "ask": ask,
+            "start": start,
+            "mstart": mstart,
+            "mend": mend,
+            "result": self._results(df, mend, btc),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, markets, fill="limit", latency_ticks=0):
+        """
+        Rebuild from prepared arrays (e.g. memory mapped views) without
+        touching pandas.
+        """
+        bt = cls.__new__(cls)
+        bt.fill = fill
+        bt.latency_ticks = latency_ticks
+        bt.markets = markets
+        bt.arrays = arrays
+        return bt
+
+    def save(self, path: str):
+        """
+        Write the prepared arrays as .npy files under path, see load().
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAY_FIELDS:
+            np.save(os.path.join(path, name + ".npy"), self.arrays[name])
+        np.save(os.path.join(path, "markets.npy"), self.markets.astype(str))
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str | None = "r", **kwargs):
+        """
+        Open arrays written by save(). With the default mmap_mode every
+        process that loads the same path shares one copy in the page cache.
+        """
+        arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode) for name in ARRAY_FIELDS}
+        markets = np.load(os.path.join(path, "markets.npy"))
+        return cls.from_arrays(arrays, markets, **kwargs)
+
+    @staticmethod
+    def _results(df, mend, btc):
+        """
+        1.0 if the market settled YES, 0.0 if NO, nan if unknown.
+
+        Settles on the CFB synthetic price at expiry versus the strike
+        (btc_prices if given, else the last recorded tick price), and falls
+        back to the last YES mid when neither is available.
+        """
+        last = df.iloc[mend - 1] if len(mend) else df.iloc[:0]
+        target = last["target"].to_numpy(np.float64)
+        settle = last["price"].to_numpy(np.float64)
+
+        if btc is not None and len(btc) and len(last):
+            prices = btc[["timestamp", "price_synth"]].dropna().sort_values("timestamp")
+            # merge_asof needs matching key dtypes, a CSV with whole second stamps parses as int64
+            prices["timestamp"] = prices["timestamp"].astype(np.float64)
+            exp = pd.DataFrame({"exp": last["exp"].to_numpy(np.float64), "i": np.arange(len(last))})
+            at_exp = pd.merge_asof(
+                exp.sort_values("exp"), prices, left_on="exp", right_on="timestamp", direction="backward"
+            ).sort_values("i")
+            synth = at_exp["price_synth"].to_numpy(np.float64)
+            settle = np.where(np.isnan(synth), settle, synth)
+
+        mid = (last["yes_bid"].to_numpy(np.float64) + last["yes_ask"].to_numpy(np.float64)) / 200
+        result = np.where(settle > target, 1.0, 0.0)
+        return np.where(np.isnan(settle) | np.isnan(target), np.where(mid >= 0.5, 1.0, 0.0), result)
+
+    def signals(self, config):
+        """
+        Per tick YES and NO entry masks for one CONFIG.
+        """
+        a = self.arrays
+        ts, bid, ask, start = a["ts"], a["bid"], a["ask"], a["start"]
+        L, U = config.L_LIMIT, config.U_LIMIT
+        no_ask = 1 - bid
+
+        spread_ok = (ask - bid) <= MAX_SPREAD + 1e-9
+        idx = np.arange(len(ts))
+
+        # _approaching_from_below over each tick's window start..idx
+        below = np.r_[0, np.cumsum(ask < L)]
+        below_any = below[idx + 1] - below[start] > 0
+        dt = ts - ts[start]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(dt > 0, (ask - ask[start]) / dt, -np.inf)
+        approaching = (idx - start + 1 >= MIN_TICKS) & below_any & (slope >= MIN_SLOPE)
+
+        yes = spread_ok & (L <= ask) & (ask <= U) & approaching
+        no = ~yes & spread_ok & (L <= no_ask) & (no_ask <= U)
+        return yes, no
+
+    def run(self, config):
+        """
+        Simulate one CONFIG. Returns SimpleNamespace(trades=DataFrame, summary=dict).
+        """
+        a = self.arrays
+        ts, bid, ask = a["ts"], a["bid"], a["ask"]
+        mstart, mend, result = a["mstart"], a["mend"], a["result"]
+        lat = self.latency_ticks
+        SL = config.SL
+        qty = getattr(config, "QTY", 1)
+
+        yes, no = self.signals(config)
+        cand = np.flatnonzero(yes | no)
+
+        recs = []
+        for m in range(len(mstart)):
+            s, e = mstart[m], mend[m]
+            c = np.searchsorted(cand, s, side="left")
+            if c >= len(cand) or cand[c] >= e:
+                continue
+
+            # work on this market's slice only, indices below are relative to s
+            m_bid, m_ask, m_ts = bid[s:e], ask[s:e], ts[s:e]
+            n = e - s
+
+            while c < len(cand) and cand[c] < e:
+                i = cand[c] - s
+                is_yes = bool(yes[cand[c]])
+                side_ask = m_ask if is_yes else 1 - m_bid
+                side_bid = m_bid if is_yes else 1 - m_ask
+
+                limit = min(1.0, max(0.01, round(side_ask[i] + 0.01, 2)))
+                f = i + lat
+                if f >= n:
+                    break
+                if side_ask[f] > limit + 1e-9:
+                    # missed, the next candidate after the fill window gets a go
+                    c = np.searchsorted(cand, s + f + 1, side="left")
+                    continue
+                entry = limit if self.fill == "limit" else side_ask[f]
+
+                hits = np.flatnonzero(side_bid[f + 1:] < SL)
+                if len(hits):
+                    k = min(f + 1 + hits[0] + lat, n - 1)
+                    exit_px, exit_ts, reason = side_bid[k], m_ts[k], "sl"
+                else:
+                    won = result[m] == (1.0 if is_yes else 0.0)
+                    exit_px, exit_ts, reason = (1.0 if won else 0.0), m_ts[-1], "resolved"
+
+                recs.append((
+                    self.markets[m], "YES" if is_yes else "NO", m_ts[f], entry,
+                    exit_ts, exit_px, reason, (exit_px - entry) * qty, n,
+                ))
+                break
+
+        trades = pd.DataFrame(recs, columns=[
+            "market_ticker", "side", "entry_ts", "entry_px",
+            "exit_ts", "exit_px", "reason", "pnl", "ticks",
+        ])
+        return SimpleNamespace(trades=trades, summary=self._summary(trades))
+
+    def _summary(self, trades):
+        pnl = trades.sort_values("exit_ts")["pnl"].to_numpy(np.float64)
+        equity = np.cumsum(pnl)
+        drawdown = float((np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity).max()) if len(pnl) else 0.0
+
+        return {
+            "markets": len(self.arrays["mstart"]),
+            "ticks": len(self.arrays["ts"]),
+            "trades": len(pnl),
+            "pnl": float(pnl.sum()),
+            "avg_pnl": float(pnl.mean()) if len(pnl) else 0.0,
+            "hit_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+            "max_drawdown": drawdown,
+            "sl_exits": int((trades["reason"] == "sl").sum()),
+            "fill": self.fill,
+            "latency_ticks": self.latency_ticks,
+        }
+
+
+if __name__ == "__main__":
+    from time import perf_counter
+
+    from rich import print
+
+    from conf import CONFIG
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "./../data/KXBTC15M_data.csv"
+    ticks, prices = load_data(src)
+
+    t0 = perf_counter()
+    bt = Backtest(ticks, prices)
+    t1 = perf_counter()
+    res = bt.run(CONFIG)
+    t2 = perf_counter()
+
+    print(res.summary)
+    print(res.trades.tail(20))
+    print(f"prepare {t1 - t0:.3f}s, run {t2 - t1:.3f}s over {len(ticks)} ticks")
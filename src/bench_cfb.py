@@ -0,0 +1,232 @@
+"""
+CPU cost per message for the CFB websocket parsers, and per quote for the
+aggregation behind them.
+
+Compares the old decode-everything path (json.loads, then filter) against
+the parse_* functions in CFB.py on representative payloads for each venue.
+Then replays bursts of quotes for four assets through the old scalar
+recompute (one asset per quote, dicts and lists) and through CFB, once
+per quote and coalesced per event loop iteration, and checks that the
+column loop and the matrix pass publish the same snapshots.
+
+    python bench_cfb.py
+"""
+import asyncio
+import json
+import math
+import random
+import time
+import timeit
+from statistics import median
+
+from CFB import CFB, VENUES, parse_bitstamp, parse_coinbase, parse_kraken, loads
+
+COINBASE_TICKER = json.dumps({
+    "type": "ticker", "sequence": 98374623, "product_id": "BTC-USD", "price": "67012.34",
+    "open_24h": "66000.00", "volume_24h": "12345.678", "low_24h": "65000.00",
+    "high_24h": "68000.00", "volume_30d": "345678.9", "best_bid": "67012.33",
+    "best_bid_size": "0.12", "best_ask": "67012.34", "best_ask_size": "0.40",
+    "side": "buy", "time": "2026-10-17T12:00:00.000000Z", "trade_id": 123456789,
+    "last_size": "0.001",
+}, separators=(",", ":"))
+
+COINBASE_HEARTBEAT = json.dumps({
+    "type": "heartbeat", "last_trade_id": 123456789, "product_id": "BTC-USD",
+    "sequence": 98374624, "time": "2026-10-17T12:00:00.000000Z",
+}, separators=(",", ":"))
+
+KRAKEN_TICKER = json.dumps([
+    340, {
+        "a": ["67012.40000", 0, "0.50000000"], "b": ["67012.30000", 1, "1.00000000"],
+        "c": ["67012.30000", "0.00100000"], "v": ["1000.0", "2000.0"],
+        "p": ["67000.0", "66900.0"], "t": [1000, 2000], "l": ["65000.0", "65000.0"],
+        "h": ["68000.0", "68000.0"], "o": ["66000.0", "66000.0"],
+    }, "ticker", "XBT/USD",
+], separators=(",", ":"))
+
+KRAKEN_HEARTBEAT = '{"event":"heartbeat"}'
+
+BITSTAMP_BOOK = json.dumps({
+    "data": {
+        "timestamp": "1792216000", "microtimestamp": "1792216000000000",
+        "bids": [[f"{67012 - i * 0.5:.2f}", "0.10000000"] for i in range(100)],
+        "asks": [[f"{67013 + i * 0.5:.2f}", "0.10000000"] for i in range(100)],
+    },
+    "channel": "order_book_btcusd", "event": "data",
+}, separators=(",", ":"))
+
+
+def legacy_coinbase(raw):
+    msg = json.loads(raw)
+    if msg.get("type") != "ticker" or msg.get("product_id") != "BTC-USD":
+        return None
+    return float(msg["best_bid"]), float(msg["best_ask"])
+
+
+def legacy_kraken(raw):
+    msg = json.loads(raw)
+    if isinstance(msg, list) and len(msg) >= 4 and msg[2] == "ticker" and msg[3] == "XBT/USD":
+        return float(msg[1]["b"][0]), float(msg[1]["a"][0])
+    return None
+
+
+def legacy_bitstamp(raw):
+    msg = json.loads(raw)
+    if msg.get("event") != "data" or msg.get("channel") != "order_book_btcusd":
+        return None
+    data = msg["data"]
+    return float(data["bids"][0][0]), float(data["asks"][0][0])
+
+
+CASES = [
+    ("coinbase ticker", legacy_coinbase, parse_coinbase, COINBASE_TICKER),
+    ("coinbase heartbeat", legacy_coinbase, parse_coinbase, COINBASE_HEARTBEAT),
+    ("kraken ticker", legacy_kraken, parse_kraken, KRAKEN_TICKER),
+    ("kraken heartbeat", legacy_kraken, parse_kraken, KRAKEN_HEARTBEAT),
+    ("bitstamp book", legacy_bitstamp, parse_bitstamp, BITSTAMP_BOOK),
+]
+
+
+def per_msg_ns(fn, raw, n):
+    return min(timeit.repeat(lambda: fn(raw), number=n, repeat=5)) / n * 1e9
+
+
+# ------------- aggregation -------------
+
+def legacy_synth(mids, pct=CFB.OUTLIER_PCT):
+    if not mids:
+        return None
+    if len(mids) == 1:
+        return mids[0]
+    med = median(mids)
+    allowed = [m for m in mids if abs(m - med) / med <= pct] or mids
+    if len(allowed) <= 2:
+        return sum(allowed) / len(allowed)
+    vals = sorted(allowed)[1:-1]
+    return sum(vals) / len(vals)
+
+
+class LegacyAggregator:
+    """
+    The single asset CFB update, one instance per asset: dict per venue,
+    full rescan and snapshot dict on every changed quote.
+    """
+
+    def __init__(self):
+        self.latest = {v: {"mid": None, "spread": None, "ts": 0.0} for v in VENUES}
+        self.snap = {}
+
+    def set_mid(self, venue, bid, ask):
+        rec = self.latest[venue]
+        rec["mid"], rec["spread"], rec["ts"] = (bid + ask) / 2, ask - bid, time.time()
+        now = time.time()
+        mids = [
+            r["mid"] for r in self.latest.values()
+            if r["mid"] is not None and now - r["ts"] <= CFB.STALE_SEC
+            and 0 < r["spread"] and r["spread"] / r["mid"] <= CFB.MAX_SPREAD_PCT
+        ]
+        snap = {f"price_{v}": r["mid"] for v, r in self.latest.items()}
+        snap["price_synth"] = legacy_synth(mids)
+        vs = list(self.latest)
+        for i, a in enumerate(vs):
+            for b in vs[i + 1:]:
+                ma, mb = self.latest[a]["mid"], self.latest[b]["mid"]
+                snap[f"spread_{a}_{b}"] = None if ma is None or mb is None else ma - mb
+        self.snap = snap
+
+
+BASE = {"BTC": 67000.0, "ETH": 3100.0, "SOL": 140.0, "XRP": 0.52}
+
+
+def quote_bursts(n_bursts, per_burst):
+    """
+    Quotes as the readers see them, per_burst per event loop iteration.
+    Every variant below yields to the loop after each burst, so the loop's
+    own overhead is in all three columns.
+    """
+    rng = random.Random(3)
+    out = []
+    for _ in range(n_bursts):
+        burst = []
+        for _ in range(per_burst):
+            asset = rng.choice(list(BASE))
+            mid = BASE[asset] * (1 + rng.gauss(0, 0.0005))
+            half = BASE[asset] * 0.00005
+            burst.append((rng.choice(VENUES), asset, mid - half, mid + half))
+        out.append(burst)
+    return out
+
+
+def bench_legacy(bursts):
+    async def run():
+        aggs = {a: LegacyAggregator() for a in BASE}
+        t0 = time.perf_counter()
+        for burst in bursts:
+            for venue, asset, bid, ask in burst:
+                aggs[asset].set_mid(venue, bid, ask)
+            await asyncio.sleep(0)
+        return time.perf_counter() - t0, {a: g.snap["price_synth"] for a, g in aggs.items()}
+    return asyncio.run(run())
+
+
+def verify_paths(bursts):
+    """
+    Every quote through the column loop, then the same state through the
+    matrix pass: the published snapshots must agree.
+    """
+    cfb = CFB()
+    for burst in bursts:
+        for quote in burst:
+            cfb._set_mid(*quote)
+    cols = tuple(range(len(cfb.assets)))
+    cfb._recompute(cols)
+    col_snaps = [dict(zip(s.keys(), (s[k] for k in s.keys()))) for s in cfb._snap]
+    cfb._recompute_matrix(cols)
+    for want, snap in zip(col_snaps, cfb._snap):
+        for k, v in want.items():
+            if k != "timestamp" and v is not None:
+                assert math.isclose(v, snap[k], rel_tol=1e-12, abs_tol=1e-9), (snap.asset, k, v, snap[k])
+
+
+def bench_cfb(bursts, coalesce):
+    async def run():
+        cfb = CFB()
+        if coalesce:
+            cfb._loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        for burst in bursts:
+            for quote in burst:
+                cfb._set_mid(*quote)
+            await asyncio.sleep(0)
+        return time.perf_counter() - t0, cfb.prices()
+    return asyncio.run(run())
+
+
+def bench_aggregation():
+    print()
+    print(f"{'quotes/iter':<12}{'legacy us':>12}{'cfb us':>12}{'coalesced us':>14}   per quote")
+    for per_burst in (1, 4, 16, 64):
+        n = 20000
+        bursts = quote_bursts(n // per_burst, per_burst)
+        old, old_px = bench_legacy(bursts)
+        verify_paths(bursts[:50])
+        eager, px = bench_cfb(bursts, coalesce=False)
+        lazy, lazy_px = bench_cfb(bursts, coalesce=True)
+        for a in BASE:
+            assert math.isclose(old_px[a], px[a], rel_tol=1e-12), a
+            assert math.isclose(px[a], lazy_px[a], rel_tol=1e-12), a
+        print(f"{per_burst:<12}{old / n * 1e6:>12.1f}{eager / n * 1e6:>12.1f}{lazy / n * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    n = 20000
+    print(f"decoder: {loads.__module__}.{loads.__name__}")
+    print(f"{'message':<20}{'legacy ns':>12}{'fast ns':>12}{'speedup':>10}")
+    for name, legacy, fast, raw in CASES:
+        want = legacy(raw)
+        assert (want and ("BTC",) + want) == fast(raw), name
+        old = per_msg_ns(legacy, raw, n)
+        new = per_msg_ns(fast, raw, n)
+        print(f"{name:<20}{old:>12.0f}{new:>12.0f}{old / new:>9.1f}x")
+
+    bench_aggregation()
@@ -0,0 +1,109 @@
+"""
+CPU cost of the per ticker price history behind _approaching_from_below.
+
+Compares the old deque of (ts, px) tuples, which scanned the whole window
+for the min on every entry check, against pxring.PriceRing, and checks
+that both give the same answer on every tick of a random walk.
+
+    python bench_ring.py
+"""
+import random
+import timeit
+from collections import deque
+
+import numpy as np
+
+from pxring import PriceRing
+
+WINDOW = 12.0
+LOWER = 0.60
+MIN_TICKS = 6
+
+
+class LegacyHist:
+    def __init__(self, window):
+        self.window = window
+        self.dq = deque()
+
+    def push(self, ts, px):
+        dq = self.dq
+        dq.append((ts, px))
+        cutoff = ts - self.window
+        while dq and dq[0][0] < cutoff:
+            dq.popleft()
+
+    def check(self, lower):
+        dq = self.dq
+        if len(dq) < MIN_TICKS:
+            return False
+        if not any(px < lower for _, px in dq):
+            return False
+        t0, p0 = dq[0]
+        t1, p1 = dq[-1]
+        if t1 <= t0:
+            return False
+        return (p1 - p0) / (t1 - t0) >= 0.002
+
+
+def ring_check(ring, lower):
+    if len(ring) < MIN_TICKS:
+        return False
+    if ring.min >= lower:
+        return False
+    slope = ring.slope
+    if slope is None:
+        return False
+    return slope >= 0.002
+
+
+def walk(n, rate):
+    """
+    n ticks around LOWER, rate ticks per second on average.
+    """
+    rng = random.Random(7)
+    ts, px, out = 1_792_216_000.0, LOWER, []
+    for _ in range(n):
+        ts += rng.expovariate(rate)
+        px = min(0.99, max(0.01, round(px + rng.choice((-0.01, 0, 0, 0.01)), 2)))
+        out.append((ts, px))
+    return out
+
+
+def verify(ticks):
+    old, ring = LegacyHist(WINDOW), PriceRing(WINDOW, capacity=4096)
+    for i, (ts, px) in enumerate(ticks):
+        old.push(ts, px)
+        ring.push(ts, px)
+        assert old.check(LOWER) == ring_check(ring, LOWER), i
+        if i % 97 == 0:
+            t = np.array([t for t, _ in old.dq])
+            p = np.array([p for _, p in old.dq])
+            assert ring.min == p.min() and ring.max == p.max(), i
+            if len(t) > 1 and np.ptp(t) > 0:
+                ls = np.polyfit(t - t[0], p, 1)[0]
+                assert abs(ring.lstsq_slope - ls) < 1e-9, (i, ring.lstsq_slope, ls)
+
+
+def run(hist, push, check, ticks):
+    for ts, px in ticks:
+        push(ts, px)
+        check(hist, LOWER)
+
+
+if __name__ == "__main__":
+    print(f"{'ticks/s':>8}{'window':>8}{'deque us':>10}{'ring us':>10}{'speedup':>10}")
+    for rate in (1, 10, 50, 200):
+        ticks = walk(20000, rate)
+        verify(ticks)
+
+        def legacy():
+            h = LegacyHist(WINDOW)
+            run(h, h.push, LegacyHist.check, ticks)
+
+        def ring():
+            r = PriceRing(WINDOW, capacity=4096)
+            run(r, r.push, ring_check, ticks)
+
+        old = min(timeit.repeat(legacy, number=1, repeat=5)) / len(ticks) * 1e6
+        new = min(timeit.repeat(ring, number=1, repeat=5)) / len(ticks) * 1e6
+        print(f"{rate:>8}{int(rate * WINDOW):>8}{old:>10.2f}{new:>10.2f}{old / new:>9.1f}x")
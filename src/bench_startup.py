@@ -0,0 +1,56 @@
+"""
+Import cost of the bot's entry modules, each in a fresh interpreter.
+
+A restart after a crash pays this before anything else happens, so the
+heavy libraries are only imported where they are used (see the top of
+kalshi.py and arb.py). For every module this prints the best of N cold
+imports and which of the heavy libraries the import still pulled in.
+
+    python bench_startup.py [runs]
+"""
+import json
+import subprocess
+import sys
+
+MODULES = ("kalshi", "arb", "shard", "orders", "latency", "redeem", "CFB", "replay")
+
+# the libraries that are worth keeping off the startup path
+HEAVY = (
+    "pandas", "numpy", "pyarrow", "aiohttp", "websockets", "httpx", "web3",
+    "eth_account", "py_clob_client", "pmxt", "dateutil", "pytz",
+)
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+ms = (time.perf_counter() - t0) * 1000
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"ms": ms, "heavy": heavy}}))
+"""
+
+
+def cold_import(module: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+        capture_output=True, text=True,
+    )
+    if out.returncode:
+        err = out.stderr.strip().splitlines()
+        return {"ms": None, "heavy": [], "error": err[-1] if err else f"exit {out.returncode}"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    base = min(cold_import("rich")["ms"] for _ in range(runs))
+    print(f"{'module':<10}{'import ms':>10}   heavy libraries loaded")
+    print(f"{'(rich)':<10}{base:>10.0f}   baseline, every module imports it")
+    for module in MODULES:
+        samples = [cold_import(module) for _ in range(runs)]
+        if samples[0]["ms"] is None:
+            print(f"{module:<10}{'-':>10}   {samples[0]['error']}")
+            continue
+        best = min(s["ms"] for s in samples)
+        print(f"{module:<10}{best:>10.0f}   {', '.join(samples[0]['heavy']) or '-'}")
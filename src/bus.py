@@ -0,0 +1,155 @@
+import json
+import os
+import select
+import socket
+import threading
+from collections import deque
+from time import time as utime
+
+from rich import print
+
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=str)
+except ImportError:  # optional, stdlib json is fine at these rates
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), default=str).encode()
+
+
+BUS_PATH = "/tmp/kalshi-bot.sock"
+
+
+class Publisher:
+    """
+    Local pub/sub from the bot to the dashboard over a Unix socket.
+
+    Every event is one JSON object per line with a "type" and "ts":
+        log   {"event": n, "row": [ticker, dir, action, price, effect]}
+              n is the row's 1 based position in log.csv
+        tick  {"ticker", "yes_bid", "yes_ask"}, at most 1/s per ticker
+        hb    strategy heartbeat, once per main loop iteration
+
+    publish() only appends to a bounded buffer, so it is safe on the Feed
+    thread. A background thread accepts subscribers and fans the buffer out.
+    A subscriber whose socket buffer is full gets dropped, it never slows the bot.
+    If the socket cannot be bound the publisher stays silent and publish() is a no-op.
+    """
+
+    SNDBUF = 1 << 20
+
+    def __init__(self, path: str = BUS_PATH, capacity: int = 10000):
+        self.path = path
+        self._buf = deque(maxlen=capacity)
+        self._clients = []
+        self._closed = False
+        self._srv = None
+
+        try:
+            if os.path.exists(path):
+                os.unlink(path)
+            self._srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._srv.bind(path)
+            self._srv.listen(8)
+            self._srv.setblocking(False)
+        except OSError as e:
+            print(f"[WARN][BUS] cannot listen on {path}: {e}, live events disabled")
+            self._srv = None
+            return
+
+        # publish() pokes the writer through this pair instead of a timed wait
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._poked = False
+
+        self._thread = threading.Thread(target=self._run, name="bot-bus", daemon=True)
+        self._thread.start()
+
+    # ------------- public API -------------
+
+    def publish(self, kind: str, **fields):
+        if self._srv is None or not self._clients:
+            return
+        fields["type"] = kind
+        fields.setdefault("ts", utime())
+        self._buf.append(fields)
+
+        if not self._poked:
+            self._poked = True
+            try:
+                self._wake_w.send(b"\0")
+            except BlockingIOError:
+                pass
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._clients)
+
+    def close(self):
+        if self._srv is None or self._closed:
+            return
+        self._closed = True
+        self._wake_w.send(b"\0")
+        self._thread.join(timeout=2)
+        for c in self._clients:
+            c.close()
+        self._srv.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    # ------------- writer -------------
+
+    def _run(self):
+        while not self._closed:
+            ready, _, _ = select.select([self._srv, self._wake_r], [], [], 1.0)
+
+            if self._srv in ready:
+                self._accept()
+            if self._wake_r in ready:
+                try:
+                    self._wake_r.recv(4096)
+                except BlockingIOError:
+                    pass
+                self._poked = False
+
+            try:
+                self._fan_out()
+            except Exception as e:
+                print(f"[ERR][BUS] {type(e).__name__}: {e}")
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._srv.accept()
+            except BlockingIOError:
+                return
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.SNDBUF)
+            conn.setblocking(False)
+            self._clients.append(conn)
+            print(f"[BUS] subscriber connected ({len(self._clients)})")
+
+    def _fan_out(self):
+        if not self._buf:
+            return
+
+        lines = []
+        while self._buf:
+            lines.append(dumps(self._buf.popleft()))
+        data = b"\n".join(lines) + b"\n"
+
+        alive = []
+        for c in self._clients:
+            try:
+                # a partial write would split a line, treat it like a dead reader
+                if c.send(data) == len(data):
+                    alive.append(c)
+                    continue
+            except OSError:
+                pass
+            c.close()
+            print("[BUS] dropped a subscriber")
+        self._clients = alive
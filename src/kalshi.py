@@ -2,62 +2,145 @@ from pykalshi import MarketStatus, CandlestickPeriod, KalshiClient
 from rich import print
 from dotenv import load_dotenv
 from os import getenv
-import requests
 import json
 from types import SimpleNamespace
-from csv import writer
-from pandas import read_csv
-from time import sleep
 from time import time as utime
 from datetime import datetime, time
-from dateutil import parser
-import pytz
-from pykalshi import Feed, TickerMessage, Action, Side, OrderType, TimeInForce
+from functools import cached_property
+from pykalshi import Feed, TickerMessage, Side, OrderType
 import asyncio
 import logging
-from collections import deque
-from CFB import CFB
+import atexit
+from orders import OrderEngine
+from tradelog import TradeLog
+from bus import Publisher, BUS_PATH
+from positions import PositionStore
+from pxring import PriceRing
+from latency import Latency
+from account import Account
+from concurrent.futures import ThreadPoolExecutor
+
+# pandas, pytz, dateutil, httpx (transport), websockets and aiohttp (CFB)
+# and pyarrow (ticks) are imported where they are used, none of them is on
+# the path from process start to a subscribed Feed. bench_startup.py
+# measures that path.
+
+
+def isoparse(ts: str) -> datetime:
+    from dateutil.parser import isoparse as parse
+
+    return parse(ts)
 
 
 class Kalshi:
-    def __init__(self, config):
+    METRICS_PORT = 9101        # /metrics scrape endpoint, LATENCY_PORT overrides
+    MIN_BALANCE = 800          # kill switch floor, cents
+
+    def __init__(self, config, client=None, feed=Feed, shard=None):
         load_dotenv(".env")
-        self.client = KalshiClient.from_env(demo=False)
+        self.client = client if client is not None else KalshiClient.from_env(demo=False)
 
-        self.events = None
-        self.positions = {}
-        #self.load_positions()
-        self.CONFIG = config
+        # shard.py runs one Kalshi per worker process, each with its own
+        # positions db, bus socket and metrics port. log.csv has a single
+        # writer, in shard.py that is the coordinator (see _trade_log).
+        self.shard = shard
+        sfx = "" if shard is None else f".{shard}"
+
+        # tick -> decision -> order ack -> fill timings, LATENCY=0 turns them off
+        self.lat = Latency("kalshi").serve(self.METRICS_PORT + (0 if shard is None else 100 + shard))
+        self.orders = OrderEngine(self.client, lat=self.lat)
+
+        # balance, exposure and kill switch, fed by our fills and reconciled over REST off the tick path
+        self.account = self._make_account()
+        atexit.register(self.account.close)
+
+        # swapped out by replay.Replay to run the strategies on recorded ticks
+        self.Feed = feed
+        self.clock = utime
+        self.sleep = asyncio.sleep
 
-        self.pt = pytz.timezone("America/Los_Angeles")
+        # live events for the dashboard, log rows go out through the trade log
+        self.bus = Publisher(BUS_PATH + sfx)
+        self.trade_log = self._trade_log()
+        atexit.register(self.trade_log.close)
+        atexit.register(self.bus.close)
 
-        self._bal_cache = None
-        self._bal_cache_ts = 0.0
-        self._bal_cache_ttl = 10.0  # seconds, adjust if you want
+        self.events = None
+        # every open/close is committed as it happens, restarts pick them up
+        self.positions = PositionStore(
+            f"./../data/positions{sfx}.db",
+            legacy_json="./../data/positions.json" if shard is None else None,
+        )
+        atexit.register(self.positions.close)
+        self.CONFIG = config
 
-        self._px_hist = {}  # ticker -> deque[(ts, yes_ask)]
+        self._px_hist = {}  # ticker -> PriceRing of (ts, yes_ask)
         self._px_hist_secs = 12  # window length
+        self._px_hist_cap = 512  # samples per ticker, the ring never grows
         self._min_ticks = 6      # minimum samples before decisions
 
 
 
+    @cached_property
+    def http(self):
+        # pooled REST transport for quotes, built on first use
+        from transport import Transport
+
+        return Transport()
+
+    @cached_property
+    def pt(self):
+        import pytz
+
+        return pytz.timezone("America/Los_Angeles")
+
     def get_balance_cached(self) -> float:
-        now = utime()
-        if self._bal_cache is None or (now - self._bal_cache_ts) >= self._bal_cache_ttl:
-            bal = self.client.portfolio.get_balance()
-            self._bal_cache = bal.portfolio_value + bal.balance
-            self._bal_cache_ts = now
-        return float(self._bal_cache)
+        # portfolio value + cash as of the last fill or reconcile, no network
+        return float(self.account.total)
 
     def get_markets(self, limit=1, series= "KXNBAGAME", mve_filter = "exclude"):
         self.series = self.client.get_markets(limit=limit, mve_filter=mve_filter, status=MarketStatus.OPEN, series_ticker=series)
         print(f"Got {len(self.series)} markets from {series}")
         return self.series
     
+    @staticmethod
+    def _markets_params(limit, series, mve_filter):
+        # what client.get_markets sends for one page of open markets
+        return {"limit": limit, "mve_filter": mve_filter, "status": MarketStatus.OPEN.value, "series_ticker": series}
+
+    def _to_markets(self, r):
+        from pykalshi import Market, MarketModel
+
+        return [Market(self.client, MarketModel.model_validate(m)) for m in r["markets"]]
+
     def get_mulitple_markets(self, limit=1, series=["KXNBAGAME"], mve_filter="exclude"):
+        # series are independent, fetch them side by side on the shared pool
+        def one(s):
+            markets = self._to_markets(self.http.get_json("/markets", self._markets_params(limit, s, mve_filter)))
+            print(f"Got {len(markets)} markets from {s}")
+            return markets
+
+        with ThreadPoolExecutor(max_workers=min(max(1, len(series)), self.http.max_inflight)) as pool:
+            merged = []
+            for markets in pool.map(one, series):
+                merged.extend(markets)
+        return merged
+
+    async def get_markets_many(self, series, limit=1, mve_filter="exclude"):
+        """
+        Async version of get_mulitple_markets. Every series is requested at
+        once through the transport, so max_inflight and the 429 retries apply.
+        """
+        series = list(series)
+        results = await asyncio.gather(
+            *(self.http.aget_json("/markets", self._markets_params(limit, s, mve_filter)) for s in series)
+        )
+
         merged = []
-        for s in series:
-            merged.extend(self.get_markets(limit, s, mve_filter))
+        for s, r in zip(series, results):
+            markets = self._to_markets(r)
+            print(f"Got {len(markets)} markets from {s}")
+            merged.extend(markets)
         return merged
 
     def get_unique_events(self, markets, save = False):
@@ -82,7 +165,7 @@ class Kalshi:
             exp_str = market.expected_expiration_time
 
             # fully timezone aware, handles Z, +00:00, +05:30, whatever
-            dt_utc = parser.isoparse(exp_str)
+            dt_utc = isoparse(exp_str)
 
             # convert to Pacific
             dt_pt = dt_utc.astimezone(pt)
@@ -104,10 +187,8 @@ class Kalshi:
         print(f"Loaded {len(self.events)} events")
         return self.events
     
-    def get_quote(self, event_ticker):
-        url = f"https://api.elections.kalshi.com/trade-api/v2/events/{event_ticker}"
-
-        r = json.loads(requests.get(url).text)
+    @staticmethod
+    def _parse_quote(r):
         return {
             "title": r['event']["sub_title"],
             "event_ticker": r['markets'][0]["event_ticker"],
@@ -121,15 +202,33 @@ class Kalshi:
             "yes_ask_dollars": float(r['markets'][0]["yes_ask_dollars"]),
             "yes_bid_dollars": float(r['markets'][0]["yes_bid_dollars"]),
         }
-    
+
+    def get_quote(self, event_ticker):
+        return self._parse_quote(self.http.get_json(f"/events/{event_ticker}"))
+
+    async def get_quotes(self, event_tickers):
+        """
+        Fetch quotes for many events concurrently. Returns {event_ticker: quote}
+        and skips (with a log line) any event whose request failed.
+        """
+        event_tickers = list(event_tickers)
+        results = await self.http.gather_json([f"/events/{e}" for e in event_tickers])
+
+        quotes = {}
+        for event, r in zip(event_tickers, results):
+            if isinstance(r, Exception):
+                print(f"[ERR][quote] {event}: {type(r).__name__}: {r}")
+                continue
+            quotes[event] = self._parse_quote(r)
+        return quotes
+
     def load_positions(self):
-        with open("./../data/positions.json", "r") as f:
-            self.positions = json.load(f)
+        self.positions.reload()
         print(f"Loaded {len(self.positions)} positions")
         return self.positions
     
     def dump_positions(self):
-        json.dump(self.positions, open("./../data/positions.json", "w"))
+        self.positions.checkpoint()
     
     def open_position(self, msg, direction, price):
         self.positions[msg.market_ticker] = {
@@ -154,81 +253,149 @@ class Kalshi:
         ])
         print(f"[green]Closed position:\n\t{msg.market_ticker} is a {pos['dir'].upper()} @ ${price}\t=>\t${diff} P&L")
 
+    def _make_account(self):
+        return Account(self.client, floor=self.MIN_BALANCE, orders=self.orders)
+
+    def _trade_log(self):
+        return TradeLog("./../data/log.csv", bus=self.bus)
+
     def logger(self, message):
-        writer(open("./../data/log.csv", "a")).writerow(message)
+        # buffered, the trade log thread does the disk write
+        self.trade_log.write(message)
 
     def gen_financials(self):
+        from pandas import read_csv
+
+        self.trade_log.flush()
         pnl = read_csv("./../data/log.csv")["effect"].astype(float).sum()
         print(f"Profit/Loss assuming {self.CONFIG.QTY} contracts were brought for each event: ${pnl * self.CONFIG.QTY}")
     
     def checkpoint(self):
-        json.dump(self.positions, open("./../data/checkpoint.json", "w"), indent=1)
-        json.dump(list(self.events), open("./../data/checkpoint.json", "a"), indent=1)
+        # positions are already on disk, this only stores the event list and trims the WAL
+        self.positions.checkpoint(events=self.events)
     
-    def strategy_high(self):
+    async def strategy_high(self):
+        """
+        Paper trade the L_LIMIT/U_LIMIT entry and SL exit on live ticker updates.
+
+        The latest (yes_bid, yes_ask) per ticker is kept in self.quotes and a
+        ticker is only re-evaluated when that quote changes. Resolution of
+        open positions is reconciled over REST every RESOLVE_SEC, with at
+        most REST_CONCURRENCY requests in flight.
+        """
+        RESOLVE_SEC = 30
+        REST_CONCURRENCY = 4
+
         self.events = list(self.events)
-        while len(self.events) > 0:
-            for event in self.events:
-                quote = self.get_quote(event)
-                ticker = quote["ticker"]
-                #print(ticker, quote["yes_ask_dollars"], quote["no_ask_dollars"])
-                
-                if ticker not in self.positions:
-                    print(f"ticker: {ticker}\t positions: {self.positions}")
-                    if quote['yes_ask_dollars'] >= self.CONFIG.L_LIMIT and quote['yes_ask_dollars'] <= self.CONFIG.U_LIMIT:
-                        self.open_position(quote, "yes")
-                        pass
-                    elif quote['no_ask_dollars'] >= self.CONFIG.L_LIMIT and quote['no_ask_dollars'] <= self.CONFIG.U_LIMIT:
-                        self.open_position(quote, "no")
-                        pass
-                else:
-                    pos = self.positions[ticker]["dir"]
-                    if quote["status"] != "active":
-                        self.events.remove(event)
-                        if quote["result"] == self.positions[ticker]["dir"]:
-                            self.close_position(ticker, 1)
-                        else:
-                            self.close_position(ticker, 0)
-                    elif quote[f"{pos}_bid_dollars"] < self.CONFIG.SL:
-                        if (quote[f"{pos}_bid_dollars"] + quote[f"{pos}_ask_dollars"]) < self.CONFIG.SL:
-                            self.close_position(ticker, quote[f"{pos}_bid_dollars"])
-
-            if round(utime()) % 60 == 0:
-                self.checkpoint()
-
-    def buy(self, ticker, side, max):
-        if side == Side.NO:
-            order = self.client.portfolio.place_order(ticker, Action.BUY, side, count=10, no_price=int(max*100), time_in_force=TimeInForce.GTC, )
-        else:
-            order = self.client.portfolio.place_order(ticker, Action.BUY, side, count=10, yes_price=int(max*100), time_in_force=TimeInForce.GTC)
-        
-        if order.status == "executed":
-            return order
-        
-        sleep(1)
-        order = self.client.portfolio.cancel_order(order_id=order.order_id)
-        if order.status == "executed":
-            return order
-        
-        order = self.client.portfolio.cancel_order(order_id=order.order_id)
-        return order
+        self.quotes = {}  # ticker -> (yes_bid, yes_ask) in cents
 
-    def sell(self, ticker, side, max):
-        if side == Side.NO:
-            order = self.client.portfolio.place_order(ticker, Action.SELL, side, count = 10,no_price=int(max*100), time_in_force=TimeInForce.GTC)
-        else: 
-            order = self.client.portfolio.place_order(ticker, Action.SELL, side, count = 10, yes_price=int(max*100), time_in_force=TimeInForce.GTC)
+        print(f"[START] strategy_high | events={len(self.events)}")
 
-        if order.status == "executed":
-            return order
-        
-        sleep(1)
-        order = self.client.portfolio.get_order(order_id=order.order_id)
-        if order.status == "executed":
-            return order
-        
-        order = self.client.portfolio.cancel_order(order_id=order.order_id)
-        return order
+        def evaluate(msg: TickerMessage):
+            ticker = msg.market_ticker
+            yes_bid = msg.yes_bid / 100
+            yes_ask = msg.yes_ask / 100
+            no_bid = 1 - yes_ask
+            no_ask = 1 - yes_bid
+
+            if ticker not in self.positions:
+                if self.CONFIG.L_LIMIT <= yes_ask <= self.CONFIG.U_LIMIT:
+                    self.open_position(msg, Side.YES, yes_ask)
+                elif self.CONFIG.L_LIMIT <= no_ask <= self.CONFIG.U_LIMIT:
+                    self.open_position(msg, Side.NO, no_ask)
+                return
+
+            pos = self.positions[ticker]["dir"]
+            bid, ask = (yes_bid, yes_ask) if pos == "yes" else (no_bid, no_ask)
+            if bid < self.CONFIG.SL and (bid + ask) < self.CONFIG.SL:
+                self.close_position(msg, bid, pos.upper())
+
+        async def resolve(feed, sem, ticker):
+            async with sem:
+                market = await asyncio.to_thread(self.client.get_market, ticker)
+
+            if getattr(market, "status", None) == "active":
+                return
+
+            pos = self.positions.get(ticker)
+            if pos is None:
+                return
+
+            payout = 1 if getattr(market, "result", None) == pos["dir"] else 0
+            print(f"[LIFE] {ticker} | RESOLVED result={getattr(market, 'result', None)}")
+            self.close_position(SimpleNamespace(market_ticker=ticker), payout, pos["dir"].upper())
+            self._maybe_remove_event(ticker)
+            self.quotes.pop(ticker, None)
+            feed.unsubscribe("ticker", market_ticker=ticker)
+
+        with self.Feed(self.client) as feed:
+
+            @feed.on("ticker")
+            @self.lat.timed("tick")
+            def handle_ticker(msg: TickerMessage):
+                try:
+                    if msg.yes_bid is None or msg.yes_ask is None:
+                        return
+
+                    # only re-evaluate on a changed top of book
+                    quote = (msg.yes_bid, msg.yes_ask)
+                    if self.quotes.get(msg.market_ticker) == quote:
+                        return
+                    self.quotes[msg.market_ticker] = quote
+
+                    evaluate(msg)
+                except Exception as e:
+                    print(f"[ERR][ticker] {type(e).__name__}: {e}")
+
+            feed.subscribe("ticker", market_tickers=self.events)
+
+            for _ in range(20):
+                if feed.is_connected:
+                    break
+                await asyncio.sleep(0.5)
+
+            print(f"[WS] connected={feed.is_connected} reconnects={feed.reconnect_count}")
+
+            sem = asyncio.Semaphore(REST_CONCURRENCY)
+            last_resolve = self.clock()
+
+            while self.events:
+                now = self.clock()
+                if now - last_resolve >= RESOLVE_SEC and self.positions:
+                    last_resolve = now
+                    results = await asyncio.gather(
+                        *(resolve(feed, sem, t) for t in list(self.positions)),
+                        return_exceptions=True,
+                    )
+                    for r in results:
+                        if isinstance(r, Exception):
+                            print(f"[ERR][lifecycle] {type(r).__name__}: {r}")
+
+                if round(now) % 60 == 0:
+                    print(
+                        f"[HB] connected={feed.is_connected} msgs={feed.messages_received} "
+                        f"last={feed.seconds_since_last_message} quotes={len(self.quotes)} "
+                        f"{self.lat.summary()}"
+                    )
+                    self.checkpoint()
+                self._publish_hb("strategy_high", feed)
+                await self.sleep(1)
+
+        print("[EXIT] strategy_high")
+
+    def buy(self, ticker, side, max, then=None):
+        """
+        Send a GTC buy through the order engine. Returns a Future that
+        resolves to the final order (filled, or cancelled after the fill window).
+        then(order) runs before the ticker stops being busy, see _then().
+        """
+        return self.orders.buy(ticker, side, max, t0=self.lat.tick_ns, then=then)
+
+    def sell(self, ticker, side, max, then=None):
+        """
+        Send a GTC sell through the order engine. Returns a Future like buy().
+        """
+        return self.orders.sell(ticker, side, max, t0=self.lat.tick_ns, then=then)
 
     def test(self):
         bal = self.client.portfolio.get_balance()
@@ -256,14 +423,18 @@ class Kalshi:
             if now - last_tick_print.get(ticker, 0) >= 1.0:
                 last_tick_print[ticker] = now
                 print(f"[TICK] {ticker} | YES bid/ask={yes_bid:.2f}/{yes_ask:.2f}")
+                self.bus.publish("tick", ticker=ticker, yes_bid=yes_bid, yes_ask=yes_ask)
 
-        with Feed(self.client) as feed:
+        with self.Feed(self.client) as feed:
+            # wake order workers on fills instead of polling get_order
+            self.orders.attach(feed)
 
             @feed.on("ticker")
+            @self.lat.timed("tick")
             def handle_ticker(msg: TickerMessage):
                 #print(msg)
-                if self.test() < 800:
-                    print(f"[red bold]{self.test()}  -  BALANCE ERROR EXITING....")
+                if self.account.killed:
+                    print(f"[red bold]{self.account.total}  -  BALANCE ERROR EXITING....")
                     exit()
                 try:
                     ticker = msg.market_ticker
@@ -284,26 +455,34 @@ class Kalshi:
 
                     # ENTRY
                     if ticker not in self.positions and ticker not in self.seen:
+                        # an entry order is already working for this ticker
+                        if self.orders.busy(ticker):
+                            return
+
                         if self.CONFIG.L_LIMIT <= yes_ask <= self.CONFIG.U_LIMIT:
                             px = yes_ask + 0.01
-                            print(f"[ENTRY] BUY YES {ticker} @ {px:.2f}")
-                            order = self.buy(ticker, Side.YES, px)
-                            if getattr(order, "status", None) == "executed":
+
+                            def filled_yes(order):
                                 fill_px = float(order.yes_price / 100)
                                 print(f"[FILL] YES {ticker} @ {fill_px:.2f}")
                                 self.open_position(msg, Side.YES, fill_px)
                                 self.seen.add(ticker)
 
+                            # send first, a rich print costs ~0.4ms on the tick path
+                            self.buy(ticker, Side.YES, px, then=self._then(filled_yes))
+                            print(f"[ENTRY] BUY YES {ticker} @ {px:.2f}")
+
                         elif self.CONFIG.L_LIMIT <= no_ask <= self.CONFIG.U_LIMIT:
                             px = no_ask + 0.01
-                            print(f"[ENTRY] BUY NO  {ticker} @ {px:.2f}")
-                            order = self.buy(ticker, Side.NO, px)
-                            if getattr(order, "status", None) == "executed":
+
+                            def filled_no(order):
                                 fill_px = float(order.no_price / 100)
                                 print(f"[FILL] NO  {ticker} @ {fill_px:.2f}")
                                 self.open_position(msg, Side.NO, fill_px)
                                 self.seen.add(ticker)
 
+                            self.buy(ticker, Side.NO, px, then=self._then(filled_no))
+                            print(f"[ENTRY] BUY NO  {ticker} @ {px:.2f}")
 
                         return
 
@@ -313,8 +492,8 @@ class Kalshi:
 
                     if dir_str == "yes":
                         if yes_bid < self.CONFIG.SL:
-                            print(f"[SL] SELL YES {ticker} @ {yes_bid:.2f}")
                             self.sell(ticker, Side.YES, yes_bid)
+                            print(f"[SL] SELL YES {ticker} @ {yes_bid:.2f}")
                             self.close_position(msg, yes_bid, "YES")
                             if ticker in self.events:
                                 self.events.remove(ticker)
@@ -352,13 +531,15 @@ class Kalshi:
 
             # Heartbeat every 5s
             while self.events:
-                if round(utime()) % 60 == 0:
+                if round(self.clock()) % 60 == 0:
                     print(
                         f"[HB] connected={feed.is_connected} msgs={feed.messages_received} "
-                        f"last={feed.seconds_since_last_message}"
+                        f"last={feed.seconds_since_last_message} {self.orders.stats_str()} "
+                        f"log_pending={self.trade_log.pending} {self.account.summary()} {self.lat.summary()}"
                     )
                     self.checkpoint()
-                await asyncio.sleep(1)
+                self._publish_hb("strategy_high_trade", feed)
+                await self.sleep(1)
 
         print("[EXIT] strategy_high_trade")
 
@@ -400,41 +581,72 @@ class Kalshi:
             f"[green]Closed position:\n\t{msg.market_ticker} NO @ ${price:.2f}\t=>\t${diff} P&L"
         )
 
+    def _publish_hb(self, strategy: str, feed):
+        self.bus.publish(
+            "hb",
+            strategy=strategy,
+            connected=feed.is_connected,
+            msgs=feed.messages_received,
+            last=feed.seconds_since_last_message,
+            positions=len(self.positions),
+            orders=self.orders.stats(),
+            log_pending=self.trade_log.pending,
+            balance=self.account.total,
+            exposure=self.account.exposure_total,
+            killed=self.account.killed,
+        )
+
     def _maybe_remove_event(self, ticker: str):
         # self.events is a list here, so guard removal
         if ticker in self.events:
             self.events.remove(ticker)
+
+    def _then(self, on_executed, on_missed=None):
+        """
+        Order callback for buy()/sell(then=...): on_executed(order) for an
+        executed order, on_missed(order) if it was cancelled unfilled. Runs
+        on the order engine thread while the ticker is still busy, so the
+        Feed callback never waits on it and the next tick cannot enter again
+        before the position is recorded.
+        """
+        def done(order):
+            try:
+                if getattr(order, "status", None) == "executed":
+                    on_executed(order)
+                elif on_missed is not None:
+                    on_missed(order)
+            except Exception as e:
+                print(f"[ERR][order] {type(e).__name__}: {e}")
+
+        return done
+
+    def _sl_missed(self, order):
+        print(
+            f"[WARN] SL sell not executed for {getattr(order, 'ticker', None)} "
+            f"(status={getattr(order, 'status', None)}). Keeping position open."
+        )
     
     def _push_px(self, ticker: str, yes_ask: float):
-        now = utime()
-        dq = self._px_hist.get(ticker)
-        if dq is None:
-            dq = deque()
-            self._px_hist[ticker] = dq
-        dq.append((now, float(yes_ask)))
-
-        # drop old
-        cutoff = now - self._px_hist_secs
-        while dq and dq[0][0] < cutoff:
-            dq.popleft()
+        ring = self._px_hist.get(ticker)
+        if ring is None:
+            ring = self._px_hist[ticker] = PriceRing(self._px_hist_secs, self._px_hist_cap)
+        # drops everything older than the window on the way in
+        ring.push(self.clock(), float(yes_ask))
 
     def _approaching_from_below(self, ticker: str, lower: float) -> bool:
-        dq = self._px_hist.get(ticker)
-        if not dq or len(dq) < self._min_ticks:
+        ring = self._px_hist.get(ticker)
+        if ring is None or len(ring) < self._min_ticks:
             return False
 
         # must have been below lower recently
-        was_below = any(px < lower for _, px in dq)
-        if not was_below:
+        if ring.min >= lower:
             return False
 
-        # slope: compare earliest and latest in the deque
-        t0, p0 = dq[0]
-        t1, p1 = dq[-1]
-        if t1 <= t0:
+        # slope: compare earliest and latest in the window
+        slope = ring.slope  # dollars per second, None when no time has passed
+        if slope is None:
             return False
 
-        slope = (p1 - p0) / (t1 - t0)  # dollars per second
         # require a small positive slope so we avoid catching a knife
         return slope >= 0.002  # tune this, see notes below
 
@@ -455,28 +667,19 @@ class Kalshi:
             if not mkts:
                 print("[MKT] No open KXBTC15M markets found, will retry later.")
                 # if nothing is open, push next_exp a bit into the future
-                return [], utime() + 60
+                return [], self.clock() + 60
 
             d = mkts[0]
-            exp_ts = int(parser.isoparse(d.close_time).timestamp())
+            exp_ts = int(isoparse(d.close_time).timestamp())
             # small buffer so we refresh after close
             exp_ts += 90
 
             print(f"[MKT] Using BTC market {d.ticker} close={d.close_time}")
             return [d.ticker], exp_ts
 
-        # initial BTC market pull
-        self.events, next_exp = get_btc_markets()
-
-        # "seen" prevents re entry after fills or restarts
-        self.seen = set(self.positions.keys())
-
-        # if we already have a position, do not subscribe that ticker
-        for t in list(self.seen):
-            if t in self.events:
-                self.events.remove(t)
-
-        print(f"[START] strategy_yes_only | events={len(self.events)} open_pos={len(self.positions)}")
+        # initial BTC market pull, on a thread so the Feed handshake below
+        # (Feed.start blocks until connected) overlaps the REST round trip
+        initial = asyncio.get_running_loop().run_in_executor(None, get_btc_markets)
 
         last_tick_print = {}
 
@@ -493,14 +696,30 @@ class Kalshi:
                     f"YES bid/ask={fmt(yes_bid)}/{fmt(yes_ask)} "
                     f"NO bid/ask={fmt(no_bid)}/{fmt(no_ask)}"
                 )
+                self.bus.publish("tick", ticker=ticker, yes_bid=yes_bid, yes_ask=yes_ask)
 
-        if not self.events:
-            print("[WARN] No BTC events to subscribe to. Exiting strategy_yes_only.")
-            return
+        with self.Feed(self.client) as feed:
+            self.events, next_exp = await initial
+
+            # "seen" prevents re entry after fills or restarts
+            self.seen = set(self.positions.keys())
+
+            # if we already have a position, do not subscribe that ticker
+            for t in list(self.seen):
+                if t in self.events:
+                    self.events.remove(t)
 
-        with Feed(self.client) as feed:
+            print(f"[START] strategy_yes_only | events={len(self.events)} open_pos={len(self.positions)}")
+
+            if not self.events:
+                print("[WARN] No BTC events to subscribe to. Exiting strategy_yes_only.")
+                return
+
+            # wake order workers on fills instead of polling get_order
+            self.orders.attach(feed)
 
             @feed.on("ticker")
+            @self.lat.timed("tick")
             def handle_ticker(msg: TickerMessage):
                 nonlocal next_exp
 
@@ -514,10 +733,8 @@ class Kalshi:
                     if ticker not in self.events and ticker not in self.positions:
                         return
 
-                    # quick balance check, but do not call twice
-                    bal = self.get_balance_cached()
-                    if bal < 800:
-                        print(f"[red bold]{bal}  -  BALANCE ERROR EXITING....")
+                    if self.account.killed:
+                        print(f"[red bold]{self.account.total}  -  BALANCE ERROR EXITING....")
                         raise SystemExit
 
                     # require at least YES prices to do anything
@@ -543,8 +760,13 @@ class Kalshi:
                         side = pos.get("side") or pos.get("dir") or "YES"
 
                     # ENTRY LOGIC: can open either YES or NO, but only if no existing position
+                    # orders for this ticker are still working, fills are
+                    # handled by the callbacks below
+                    if self.orders.busy(ticker):
+                        return
+
                     if pos is None:
-                        entered = False
+                        sent = False
 
                         # 1) Try YES entry
                         # skip wide YES spreads for entry
@@ -552,27 +774,27 @@ class Kalshi:
                             if self.CONFIG.L_LIMIT <= yes_ask <= self.CONFIG.U_LIMIT:
                                 if self._approaching_from_below(ticker, self.CONFIG.L_LIMIT):
                                     px = min(1.00, max(0.01, round(yes_ask + 0.01, 2)))
-                                    print(f"[ENTRY] BUY YES {ticker} @ {px:.2f}")
-                                    order = self.buy(ticker, Side.YES, px)
 
-                                    if getattr(order, "status", None) == "executed":
+                                    def filled_yes(order):
                                         fill_px = float(order.yes_price / 100)
                                         print(f"[FILL] YES {ticker} @ {fill_px:.2f}")
                                         self.open_position_yes(msg, fill_px)
                                         self.seen.add(ticker)
-                                        entered = True
 
-                        # 2) If we did not enter YES, try NO side
-                        if not entered and no_bid is not None and no_ask is not None:
+                                    # send first, a rich print costs ~0.4ms on the tick path
+                                    self.buy(ticker, Side.YES, px, then=self._then(filled_yes))
+                                    print(f"[ENTRY] BUY YES {ticker} @ {px:.2f}")
+                                    sent = True
+
+                        # 2) If we did not send a YES order, try NO side
+                        if not sent and no_bid is not None and no_ask is not None:
                             # skip wide NO spreads for entry
                             if (no_ask - no_bid) <= 0.10:
                                 if self.CONFIG.L_LIMIT <= no_ask <= self.CONFIG.U_LIMIT:
                                     # add your own "approaching" logic for NO if you want
                                     px = min(1.00, max(0.01, round(no_ask + 0.01, 2)))
-                                    print(f"[ENTRY] BUY NO {ticker} @ {px:.2f}")
-                                    order = self.buy(ticker, Side.NO, px)
 
-                                    if getattr(order, "status", None) == "executed":
+                                    def filled_no(order):
                                         # Kalshi returns yes_price, for NO you usually look at no_price
                                         fill_px = None
                                         if getattr(order, "no_price", None) is not None:
@@ -587,10 +809,13 @@ class Kalshi:
                                         print(f"[FILL] NO {ticker} @ {fill_px:.2f}")
                                         self.open_position_no(msg, fill_px)
                                         self.seen.add(ticker)
-                                        entered = True
 
-                        # after entry attempt we are done with this tick
-                        if entered:
+                                    self.buy(ticker, Side.NO, px, then=self._then(filled_no))
+                                    print(f"[ENTRY] BUY NO {ticker} @ {px:.2f}")
+                                    sent = True
+
+                        # after an entry attempt we are done with this tick
+                        if sent:
                             return
 
                     # refresh position info, since we might have just opened one
@@ -604,10 +829,8 @@ class Kalshi:
                     if side == "YES":
                         if yes_bid < self.CONFIG.SL:
                             px = round(yes_bid, 2)
-                            print(f"[SL] SELL YES {ticker} @ {px:.2f}")
-                            order = self.sell(ticker, Side.YES, px)
 
-                            if getattr(order, "status", None) == "executed":
+                            def sold_yes(order):
                                 fill_px = px
                                 if getattr(order, "yes_price", None) is not None:
                                     fill_px = float(order.yes_price / 100)
@@ -615,12 +838,9 @@ class Kalshi:
                                 self.close_position_yes(msg, fill_px, reason="sl")
                                 self._maybe_remove_event(ticker)
                                 feed.unsubscribe("ticker", market_ticker=ticker)
-                            else:
-                                print(
-                                    f"[WARN] SL sell not executed for {ticker} "
-                                    f"(status={getattr(order, 'status', None)}). Keeping position open."
-                                )
 
+                            self.sell(ticker, Side.YES, px, then=self._then(sold_yes, self._sl_missed))
+                            print(f"[SL] SELL YES {ticker} @ {px:.2f}")
                             return
 
                     elif side == "NO":
@@ -628,10 +848,8 @@ class Kalshi:
                         # Stop if NO bid drops below SL
                         if no_bid is not None and no_bid < self.CONFIG.SL:
                             px = round(no_bid, 2)
-                            print(f"[SL] SELL NO {ticker} @ {px:.2f}")
-                            order = self.sell(ticker, Side.NO, px)
 
-                            if getattr(order, "status", None) == "executed":
+                            def sold_no(order):
                                 fill_px = px
                                 if getattr(order, "no_price", None) is not None:
                                     fill_px = float(order.no_price / 100)
@@ -639,12 +857,9 @@ class Kalshi:
                                 self.close_position_no(msg, fill_px, reason="sl")
                                 self._maybe_remove_event(ticker)
                                 feed.unsubscribe("ticker", market_ticker=ticker)
-                            else:
-                                print(
-                                    f"[WARN] SL sell not executed for {ticker} "
-                                    f"(status={getattr(order, 'status', None)}). Keeping position open."
-                                )
 
+                            self.sell(ticker, Side.NO, px, then=self._then(sold_no, self._sl_missed))
+                            print(f"[SL] SELL NO {ticker} @ {px:.2f}")
                             return
 
                     # LIFECYCLE AND RESOLUTION
@@ -691,13 +906,15 @@ class Kalshi:
 
             # keep running, BTC markets will auto refresh
             while True:
-                if round(utime()) % 60 == 0:
+                if round(self.clock()) % 60 == 0:
                     print(
                         f"[HB] connected={feed.is_connected} msgs={feed.messages_received} "
-                        f"last={feed.seconds_since_last_message}"
+                        f"last={feed.seconds_since_last_message} {self.orders.stats_str()} "
+                        f"log_pending={self.trade_log.pending} {self.account.summary()} {self.lat.summary()}"
                     )
                     self.checkpoint()
-                if utime() > next_exp:
+                self._publish_hb("strategy_yes_only", feed)
+                if self.clock() > next_exp:
                     print("[REFRESH] Refreshing BTC market list...")
                     try:
                         if self.events:
@@ -722,118 +939,109 @@ class Kalshi:
                     else:
                         print("[REFRESH] No BTC events to subscribe to after refresh.")
                         return
-                await asyncio.sleep(1)
+                await self.sleep(1)
 
         print("[EXIT] strategy_yes_only")
 
 
-    async def crypto_data(self):
+    async def crypto_data(self, sink="parquet", assets=None):
         """
-        Collect data for BTC 15 minute Kalshi markets, plus a continuous BTC price log.
+        Collect data for the 15 minute crypto Kalshi markets (BTC, ETH, SOL
+        and XRP by default), plus a continuous price log per asset, all from
+        one CFB and one Feed.
+
+        Rows go to typed tick sinks (see ticks.py), partitioned by series and UTC date:
+        - Continuous prices (from CFB) go to: ./../data/ticks/series=<asset>/...
+        - Kalshi ticks go to:                 ./../data/ticks/series=<KX...15M>/...
 
-        - Continuous BTC prices (from CFB) go to: ./../data/btc_prices.csv
-        - Kalshi KXBTC15M ticks go to:           ./../data/KXBTC15M_data.csv
+        sink is "parquet", "arrow" or "csv". Load the columnar ones with ticks.load_ticks.
         """
 
-        series_code = "KXBTC15M"
+        from CFB import CFB, ASSETS
+        from ticks import make_sink, KALSHI_TICK_COLUMNS, CRYPTO_PRICE_COLUMNS
+        from utils import series as SERIES
 
-        # File for Kalshi ticks
-        #timestamp,market_ticker,series,yes_bid,yes_ask,no_bid,no_ask,price,target,exp,time_d,price_d,volume,open_interest,dollar_volume,dollar_open_interest
-        kalshi_path = "./../data/KXBTC15M_data.csv"
-        kalshi_file = open(kalshi_path, "a", buffering=128)
+        assets = assets or ASSETS
+        # series code -> asset, e.g. KXETH15M -> ETH
+        series_assets = {getattr(SERIES, f"{a}15"): a for a in assets}
+        tick_root = "./../data/ticks"
 
-        # File for continuous BTC prices
-        #timestamp,price_coinbase,price_kraken,price_bitstamp,price_cryptocom,price_gemini,price_synth,spread_cb_bs,spread_cb_kr,spread_cb_cc,spread_cb_gm,spread_kr_bs,spread_kr_cc,spread_kr_gm,spread_bs_cc,spread_bs_gm,spread_cc_gm
-        btc_price_path = "./../data/btc_prices.csv"
-        btc_price_file = open(btc_price_path, "a")
+        kalshi_sinks = {code: make_sink(sink, tick_root, code, KALSHI_TICK_COLUMNS) for code in series_assets}
+        price_sinks = {a: make_sink(sink, tick_root, a, CRYPTO_PRICE_COLUMNS) for a in assets}
+        for tick_sink in (*kalshi_sinks.values(), *price_sinks.values()):
+            atexit.register(tick_sink.close)
 
         # Start CFB aggregator (continuous crypto prices)
-        cfb = CFB()
+        cfb = CFB(assets)
         asyncio.create_task(cfb.run(log_sampler=True))
 
         # Give it a moment to connect and fill
         await asyncio.sleep(3)
 
-        async def log_btc_prices():
+        async def log_prices():
             """
-            Always on BTC price logger, independent of Kalshi ticks.
-            One row per second into btc_prices.csv with all fields from CFB.get_btc():
-
-            timestamp,price_coinbase,price_kraken,price_bitstamp,price_cryptocom,price_gemini,
-            price_synth,spread_cb_bs,spread_cb_kr,spread_cb_cc,spread_cb_gm,
-            spread_kr_bs,spread_kr_cc,spread_kr_gm,spread_bs_cc,spread_bs_gm,spread_cc_gm
+            Always on price logger, independent of Kalshi ticks.
+            One row per second per asset into its sink with all fields from CFB.get().
             """
             while True:
-                try:
-                    info = cfb.get_btc()
-                except Exception as e:
-                    print(f"[ERR][log_btc_prices] {type(e).__name__}: {e}")
-                    await asyncio.sleep(1)
-                    continue
-
-                if info is not None:
-                    row = [
-                        round(info["timestamp"], 2),
-                        info["price_coinbase"],
-                        info["price_kraken"],
-                        info["price_bitstamp"],
-                        info["price_cryptocom"],
-                        info["price_gemini"],
-                        info["price_synth"],
-                        info["spread_cb_bs"],
-                        info["spread_cb_kr"],
-                        info["spread_cb_cc"],
-                        info["spread_cb_gm"],
-                        info["spread_kr_bs"],
-                        info["spread_kr_cc"],
-                        info["spread_kr_gm"],
-                        info["spread_bs_cc"],
-                        info["spread_bs_gm"],
-                        info["spread_cc_gm"],
-                    ]
-                    btc_price_file.write(",".join(str(v) for v in row) + "\n")
+                now_ts = round(utime(), 2)
+                for asset, price_sink in price_sinks.items():
+                    try:
+                        info = cfb.get(asset)
+                    except Exception as e:
+                        print(f"[ERR][log_prices] {asset} {type(e).__name__}: {e}")
+                        continue
 
-                await asyncio.sleep(1)
+                    if info.price_synth is not None:
+                        # snapshot timestamp is when prices last changed, log the sample time
+                        row = dict(info)
+                        row["timestamp"] = now_ts
+                        price_sink.write(row)
 
-        # Start the continuous BTC price logger
-        asyncio.create_task(log_btc_prices())
+                await asyncio.sleep(1)
 
-        def get_ticker():
-            """
-            Fetch the current top BTC 15M market and build a ticker dict.
-            Returns:
-                tickers: dict keyed by series_code
-                sub: list of market_tickers to subscribe to
-            """
-            tickers = {}
-            sub = []
+        # Start the continuous price logger
+        asyncio.create_task(log_prices())
 
+        def get_series_ticker(code):
             markets = self.client.get_markets(
                 limit=100,
                 mve_filter="exclude",
                 status=MarketStatus.OPEN,
-                series_ticker=series_code,
+                series_ticker=code,
             )
-
             if not markets:
-                raise RuntimeError("No open markets returned for series KXBTC15M")
+                print(f"[WARN] No open markets returned for series {code}")
+                return None
 
             d = markets[0]
-            sub.append(d.ticker)
             print(d)
-
-            tickers[series_code] = {
-                "series": series_code,
+            return {
+                "series": code,
                 "ticker": d.ticker,
                 "yes_bid": d.yes_bid,
                 "yes_ask": d.yes_ask,
                 "no_bid": d.no_bid,
                 "no_ask": d.no_ask,
-                "exp": int(parser.isoparse(d.close_time).timestamp()),
+                "exp": int(isoparse(d.close_time).timestamp()),
                 "target": float(d.yes_sub_title.split("$")[1].replace(",", "")),
             }
 
-            return tickers, sub
+        def get_ticker():
+            """
+            Fetch the current top market of every series and build a ticker dict.
+            Returns:
+                tickers: dict keyed by series code
+                sub: list of market_tickers to subscribe to
+            """
+            # series are independent, fetch them side by side
+            with ThreadPoolExecutor(max_workers=len(series_assets)) as pool:
+                found = dict(zip(series_assets, pool.map(get_series_ticker, series_assets)))
+
+            tickers = {code: t for code, t in found.items() if t is not None}
+            if not tickers:
+                raise RuntimeError(f"No open markets returned for series {', '.join(series_assets)}")
+            return tickers, [t["ticker"] for t in tickers.values()]
 
         # Initial fetch of market and subscription list
         tickers, sub = get_ticker()
@@ -845,32 +1053,35 @@ class Kalshi:
         next_exp = compute_next_exp()
         print(next_exp)
 
-        with Feed(self.client) as feed:
+        with self.Feed(self.client) as feed:
 
             @feed.on("ticker")
+            @self.lat.timed("tick")
             def handle_ticker(msg: TickerMessage):
                 try:
                     nonlocal tickers, sub, next_exp
 
-                    # Ensure this is our BTC series
+                    # Ensure this is one of our crypto series
                     code = msg.market_ticker.split("-")[0]
-                    if code != series_code:
+                    asset = series_assets.get(code)
+                    ticker = tickers.get(code)
+                    if asset is None or ticker is None:
                         return
 
-                    this_exp = tickers[series_code]["exp"]
+                    this_exp = ticker["exp"]
                     now_ts = round(utime(), 2)
 
                     line = {
                         "timestamp": now_ts,
                         "market_ticker": msg.market_ticker,
-                        "series": series_code,
+                        "series": code,
                         "yes_bid": msg.yes_bid,
                         "yes_ask": msg.yes_ask,
                         # Synthetic no side from yes quotes
                         "no_bid": 100 - msg.yes_ask,
                         "no_ask": 100 - msg.yes_bid,
                         "price": None,  # filled from CFB
-                        "target": tickers[series_code]["target"],
+                        "target": ticker["target"],
                         "exp": this_exp,
                         "time_d": round(this_exp - now_ts, 2),
                         "price_d": None,
@@ -880,16 +1091,14 @@ class Kalshi:
                         "dollar_open_interest": msg.dollar_open_interest,
                     }
 
-                    btc_info = cfb.get_btc()
-                    if btc_info is None:
+                    price_synth = cfb.get(asset).price_synth
+                    if price_synth is None:
                         return
 
-                    price_synth = btc_info["price_synth"]
-
                     line["price"] = price_synth
                     line["price_d"] = price_synth - line["target"]
 
-                    kalshi_file.write(",".join(str(v) for v in line.values()) + "\n")
+                    kalshi_sinks[code].write(line)
 
                 except Exception as e:
                     print(f"[ERR][ticker] {type(e).__name__}: {e}")
@@ -908,7 +1117,7 @@ class Kalshi:
                 f"msgs={feed.messages_received} next_exp={next_exp - utime()} "
                 f"last={feed.seconds_since_last_message}"
             )
-            print(f"[START] crypto_data | subscribed={len(sub)}")
+            print(f"[START] crypto_data | series={len(tickers)} subscribed={len(sub)}")
 
             # Main keep alive loop
             while True:
@@ -916,7 +1125,7 @@ class Kalshi:
                     print(
                         f"[HB] connected={feed.is_connected} "
                         f"msgs={feed.messages_received} next_exp={next_exp - utime()} "
-                        f"last={feed.seconds_since_last_message}"
+                        f"last={feed.seconds_since_last_message} {self.lat.summary()}"
                     )
 
                 if utime() > next_exp:
@@ -927,4 +1136,4 @@ class Kalshi:
                     next_exp = compute_next_exp()
                     print("New earliest expiry:", datetime.fromtimestamp(next_exp))
 
-                await asyncio.sleep(1)
\ No newline at end of file
+                await asyncio.sleep(1)
@@ -0,0 +1,250 @@
+import json
+import threading
+from functools import wraps
+from os import getenv
+from time import perf_counter_ns
+
+from rich import print
+
+
+class Histogram:
+    """
+    HDR style log-linear histogram of nanosecond values.
+
+    Values under 2**SUB_BITS get one bucket each. Above that every power of
+    two is split into 2**(SUB_BITS - 1) buckets, so any recorded value is
+    within 1/128 of its bucket and the whole range up to MAX_NS fits in a
+    few thousand ints. record() is a bit_length, a shift and a list increment.
+
+    Counts are plain ints bumped without a lock. A rare increment can be
+    lost when two threads record into the same bucket at the same instant,
+    which does not move a percentile.
+    """
+
+    SUB_BITS = 8
+    MAX_NS = 60_000_000_000      # larger values are clamped to 60s
+
+    def __init__(self):
+        self._n_buckets = self._index(self.MAX_NS) + 1
+        self.counts = [0] * self._n_buckets
+        self.max = 0
+
+    def record(self, ns: int):
+        if ns > self.max:
+            if ns > self.MAX_NS:
+                ns = self.MAX_NS
+            self.max = ns
+        elif ns < 0:
+            ns = 0
+        shift = ns.bit_length() - self.SUB_BITS
+        if shift > 0:
+            ns = (shift << (self.SUB_BITS - 1)) + (ns >> shift)
+        self.counts[ns] += 1
+
+    def _index(self, ns: int) -> int:
+        shift = ns.bit_length() - self.SUB_BITS
+        if shift <= 0:
+            return ns
+        return (shift << (self.SUB_BITS - 1)) + (ns >> shift)
+
+    def _values(self):
+        """
+        Midpoint of every bucket, in nanoseconds.
+        """
+        import numpy as np  # export side only, recording never needs it
+
+        s = 1 << self.SUB_BITS
+        half = s >> 1
+        idx = np.arange(self._n_buckets)
+        out = idx.astype(np.float64)
+        k = idx[s:] - s
+        shift = k // half + 1
+        lo = (k % half + half) << shift
+        out[s:] = lo + (1 << shift) / 2
+        return out
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentiles(self, qs=(0.5, 0.9, 0.99, 0.999)) -> list:
+        import numpy as np
+
+        counts = np.asarray(self.counts, dtype=np.int64)
+        total = counts.sum()
+        if not total:
+            return [None] * len(qs)
+        cum = np.cumsum(counts)
+        vals = self._values()
+        idx = np.searchsorted(cum, np.ceil(np.asarray(qs) * total), side="left")
+        return [min(float(vals[i]), float(self.max)) for i in idx]
+
+    def reset(self):
+        self.counts = [0] * self._n_buckets
+        self.max = 0
+
+
+class Latency:
+    """
+    Named latency histograms for one process, plus the export side.
+
+    Stamps are perf_counter_ns() readings. record(stage, t0) stores the
+    time from t0 until now (or t1) under stage. With enabled=False record()
+    returns at once, now() returns 0 and timed() hands the function back
+    unwrapped, so leaving the calls in the hot path costs a method call.
+
+    timed(stage) wraps a Feed handler: it records the whole handler under
+    stage and leaves its start stamp in self.tick_ns, so code the handler
+    calls (order submit) can measure from the moment the message arrived.
+
+    Exports:
+        summary()      one line of p50/p99 per stage for the [HB] print
+        snapshot()     dict for the bus / JSON
+        prometheus()   text format, served by serve() on /metrics
+    """
+
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(self, name: str, enabled: bool | None = None):
+        if enabled is None:
+            enabled = getenv("LATENCY", "1") != "0"
+        self.name = name
+        self.enabled = enabled
+        self.hists = {}
+        self.tick_ns = 0
+        self._server = None
+
+    # ------------- recording -------------
+
+    def now(self) -> int:
+        return perf_counter_ns() if self.enabled else 0
+
+    def record(self, stage: str, t0: int, t1: int | None = None):
+        if not self.enabled or not t0:
+            return
+        if t1 is None:
+            t1 = perf_counter_ns()
+        h = self.hists.get(stage)
+        if h is None:
+            h = self.hists[stage] = Histogram()
+        h.record(t1 - t0)
+
+    def record_us(self, stage: str, us):
+        if not self.enabled:
+            return
+        h = self.hists.get(stage)
+        if h is None:
+            h = self.hists[stage] = Histogram()
+        h.record(int(us * 1000))
+
+    def timed(self, stage: str):
+        def deco(fn):
+            if not self.enabled:
+                return fn
+
+            h = self.hists.setdefault(stage, Histogram())
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                t0 = self.tick_ns = perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    h.record(perf_counter_ns() - t0)
+            return wrapper
+        return deco
+
+    # ------------- export -------------
+
+    def snapshot(self) -> dict:
+        out = {}
+        for stage, h in list(self.hists.items()):
+            n = h.count
+            if not n:
+                continue
+            # stored in ns, exported in us
+            ps = [p / 1000 for p in h.percentiles(self.QUANTILES)]
+            out[stage] = {"n": n, "max": h.max / 1000, **{f"p{q * 100:g}": p for q, p in zip(self.QUANTILES, ps)}}
+        return out
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "lat=off"
+        parts = []
+        for stage, s in self.snapshot().items():
+            parts.append(f"{stage} p50/p99={_fmt_us(s['p50'])}/{_fmt_us(s['p99'])}")
+        # no square brackets, rich would take them for markup
+        return "lat(" + ", ".join(parts) + ")"
+
+    def prometheus(self) -> str:
+        metric = f"{self.name}_latency_us"
+        lines = [f"# TYPE {metric} summary"]
+        for stage, s in self.snapshot().items():
+            for q in self.QUANTILES:
+                lines.append(f'{metric}{{stage="{stage}",quantile="{q:g}"}} {s[f"p{q * 100:g}"]:.3f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {s["n"]}')
+            lines.append(f'{metric}_max{{stage="{stage}"}} {s["max"]:.3f}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for h in self.hists.values():
+            h.reset()
+
+    def serve(self, port: int | None = None, host: str = "127.0.0.1"):
+        """
+        Serve /metrics (Prometheus text) and /latency (JSON) on a daemon thread.
+        A port that cannot be bound only disables the endpoint.
+        """
+        if not self.enabled or self._server is not None:
+            return self
+        port = int(getenv("LATENCY_PORT", port or 0))
+        if not port:
+            return self
+
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        lat = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics"):
+                    body, ctype = lat.prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path.startswith("/latency"):
+                    body, ctype = json.dumps(lat.snapshot()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"[WARN][LAT] cannot serve on {host}:{port}: {e}")
+            return self
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=f"{self.name}-metrics", daemon=True).start()
+        print(f"[LAT] metrics on http://{host}:{port}/metrics")
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _fmt_us(us) -> str:
+    if us is None:
+        return "-"
+    if us >= 1000:
+        return f"{us / 1000:.1f}ms"
+    if us < 10:
+        return f"{us:.1f}us"
+    return f"{us:.0f}us"
@@ -0,0 +1,168 @@
+import asyncio
+from functools import partial
+from time import time as utime
+
+from pykalshi import Side
+from rich import print
+
+
+class LegRisk:
+    """
+    Exposure book and unwind logic for arb pairs that filled on one venue only.
+
+    resolve() runs as its own task next to the quote loop:
+        1. For up to COMPLETE_SEC, buy the missing leg FOK whenever its ask
+           (plus pad) is at or under the bound. The bound is the padded
+           limit the leg was first sent at plus MAX_SLIP, capped so the pair
+           still costs at most $1.
+        2. If the pair is still naked, sell the filled leg FOK into the bid,
+           up to FLATTEN_TRIES times.
+
+    Exposure is tracked per leg as (venue, instrument) -> contracts held.
+    self.naked only holds legs that are currently unhedged.
+
+    start() runs resolve() as a task and keeps it, so settle() can wait for
+    (or after SETTLE_SEC cancel) the unwinds of a market before the caller
+    moves on to the next one.
+    """
+
+    COMPLETE_SEC = 5.0     # how long to try completing the pair
+    MAX_SLIP = 0.03        # max extra paid for the missing leg, in dollars
+    FLATTEN_TRIES = 3
+    POLL_SEC = 0.2
+    SETTLE_SEC = 10.0      # how long settle() waits for running unwinds
+
+    def __init__(self, arb):
+        self.arb = arb
+        self.exposure = {}  # (venue, instrument) -> contracts
+        self.naked = {}     # (venue, instrument) -> contracts without a hedge
+        self._tasks = set()  # running resolve() tasks
+
+    # ------------- exposure book -------------
+
+    def add(self, venue: str, instrument, qty: int):
+        key = (venue, instrument)
+        self.exposure[key] = self.exposure.get(key, 0) + qty
+        if self.exposure[key] == 0:
+            del self.exposure[key]
+
+    async def settle(self, *instruments):
+        """
+        Drop every leg on the given instruments, e.g. once a market resolved.
+        Unwinds still running are awaited first and cancelled after
+        SETTLE_SEC, so none of them keeps trading the old market.
+        """
+        if self._tasks:
+            tasks = list(self._tasks)
+            _, pending = await asyncio.wait(tasks, timeout=self.SETTLE_SEC)
+            for t in pending:
+                t.cancel()
+            if pending:
+                await asyncio.wait(pending)
+                print(f"[red][LEG] cancelled {len(pending)} unwind(s) at rollover. {self.summary()}[/red]")
+
+        for key in [k for k in self.exposure if k[1] in instruments]:
+            del self.exposure[key]
+        for key in [k for k in self.naked if k[1] in instruments]:
+            del self.naked[key]
+
+    def summary(self) -> str:
+        legs = ", ".join(f"{v}:{i}={q}" for (v, i), q in self.exposure.items()) or "flat"
+        naked = ", ".join(f"{v}:{i}={q}" for (v, i), q in self.naked.items()) or "none"
+        return f"exposure[{legs}] naked[{naked}]"
+
+    # ------------- unwind -------------
+
+    def start(self, *args) -> asyncio.Task:
+        """
+        resolve(*args) as a tracked task.
+        """
+        task = asyncio.create_task(self.resolve(*args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def resolve(self, filled_venue, ticker, kalshi_side, token_id, kalshi_base, poly_base,
+                      condition_id, kq, book):
+        """
+        Complete or flatten one naked pair.
+
+        filled_venue is "kalshi" or "poly". kalshi_base/poly_base are the
+        base prices (without pad) the pair was sent at. kq is the live Kalshi
+        quote dict and book the PolyBook from Arb.run.
+
+        Returns "completed", "flattened" or "stuck".
+        """
+        arb = self.arb
+        qty = arb.qty
+        loop = asyncio.get_running_loop()
+
+        if filled_venue == "kalshi":
+            filled_key, missing_key = ("kalshi", ticker), ("poly", token_id)
+            filled_final, missing_final = kalshi_base + arb.pad, poly_base + arb.pad
+        else:
+            filled_key, missing_key = ("poly", token_id), ("kalshi", ticker)
+            filled_final, missing_final = poly_base + arb.pad, kalshi_base + arb.pad
+
+        self.add(*filled_key, qty)
+        self.naked[filled_key] = qty
+
+        # MAX_SLIP past the padded limit the missing leg was sent at
+        bound = min(missing_final + self.MAX_SLIP, 1.0 - filled_final)
+        print(f"[red][LEG] naked {filled_key}, completing up to {bound:.4f} for {self.COMPLETE_SEC}s[/red]")
+
+        # 1) complete the pair at a worse but bounded price
+        deadline = utime() + self.COMPLETE_SEC
+        while utime() < deadline:
+            if filled_venue == "kalshi":
+                ask = book.ask(token_id)
+            else:
+                ask = kq["ky"] if kalshi_side == Side.YES else kq["kn"]
+
+            if ask is not None and ask + arb.pad <= bound:
+                if filled_venue == "kalshi":
+                    resp = await loop.run_in_executor(
+                        arb.executor, partial(arb.buy_poly, token_id, ask, condition_id, fok=True)
+                    )
+                    done = arb.poly_filled(resp)
+                else:
+                    order = await loop.run_in_executor(
+                        arb.executor, arb.buy_kalshi, ticker, kalshi_side, ask
+                    )
+                    done = getattr(order, "status", None) == "executed"
+
+                if done:
+                    self.add(*missing_key, qty)
+                    self.naked.pop(filled_key, None)
+                    print(f"[green][LEG] completed pair with {missing_key} @ {ask + arb.pad:.4f}[/green]")
+                    return "completed"
+
+            await asyncio.sleep(self.POLL_SEC)
+
+        # 2) could not hedge in time, get out of the filled leg
+        for attempt in range(self.FLATTEN_TRIES):
+            if filled_venue == "kalshi":
+                bid = kq["ky_bid"] if kalshi_side == Side.YES else kq["kn_bid"]
+            else:
+                bid = book.bid(token_id)
+
+            if bid is not None:
+                if filled_venue == "kalshi":
+                    order = await loop.run_in_executor(
+                        arb.executor, arb.sell_kalshi, ticker, kalshi_side, bid
+                    )
+                    done = getattr(order, "status", None) == "executed"
+                else:
+                    resp = await loop.run_in_executor(arb.executor, arb.sell_poly, token_id, bid)
+                    done = arb.poly_filled(resp)
+
+                if done:
+                    self.add(*filled_key, -qty)
+                    self.naked.pop(filled_key, None)
+                    print(f"[yellow][LEG] flattened {filled_key} @ ~{bid:.4f}[/yellow]")
+                    return "flattened"
+
+            await asyncio.sleep(self.POLL_SEC)
+
+        print(f"[red bold][LEG] STILL NAKED {filled_key}, manual action needed. {self.summary()}[/red bold]")
+        return "stuck"
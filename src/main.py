@@ -8,7 +8,7 @@ from pykalshi import Side
 async def main(CONFIG):
     kalshi = Kalshi(CONFIG)
 
-    #markets = kalshi.get_mulitple_markets(500, series=[series.NBA, series.NCAA_BB_M, series.NCAA_BB_W])
+    #markets = await kalshi.get_markets_many([series.NBA, series.NCAA_BB_M, series.NCAA_BB_W], 500)
     #print(markets[0])
     #markets = kalshi.filter_by_today(markets, True)
     #events = kalshi.get_unique_events(markets, save=True)
@@ -0,0 +1,240 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from time import perf_counter
+
+from pykalshi import Action, Side, TimeInForce
+from rich import print
+
+from latency import Latency
+
+
+class OrderEngine:
+    """
+    Non blocking order placement for Kalshi.
+
+    The pykalshi client is synchronous, so every order runs on a small
+    worker pool instead of inside the Feed callback. submit() returns a
+    concurrent.futures.Future that resolves to the final order object once
+    it has filled or the fill window has expired and it was cancelled.
+
+    Fill tracking:
+        - If attach(feed) was called, "fill" messages wake the worker as soon
+          as Kalshi reports a fill for the order.
+        - Otherwise the worker polls get_order every POLL_SEC.
+
+    Only one order per ticker is in flight at a time. A second submit for a
+    busy ticker returns the existing future instead of sending a duplicate.
+    The ticker stays busy until on_done and the order's own then(order)
+    callback have run, so a strategy that records its position in then()
+    never sees a gap where the ticker is neither busy nor held.
+
+    With a latency.Latency, submit(t0=tick stamp) records per order:
+        decide       tick received -> submit()
+        queue        submit() -> a worker picks it up
+        ack          place_order round trip
+        tick_to_ack  tick received -> place_order returned
+        fill         ack -> executed, for orders that filled
+
+    Callables in on_done get (ticker, action, side, cents, count, order) with
+    the final order, on the worker thread, e.g. account.Account.on_order.
+    """
+
+    FILL_WINDOW = 1.0  # seconds a GTC order may rest before it gets cancelled
+    POLL_SEC = 0.2     # get_order poll interval when no fill channel is attached
+    HIST_LEN = 1000    # latency samples kept for stats()
+
+    def __init__(self, client, workers: int = 4, fill_window: float = FILL_WINDOW, lat=None):
+        self.client = client
+        self.fill_window = fill_window
+        self.lat = lat if lat is not None else Latency("orders", enabled=False)
+        self.on_done = []
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="kalshi-orders"
+        )
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}        # ticker -> future
+        self._fill_events: dict[str, threading.Event] = {}  # order_id -> event
+        self._fills_attached = False
+        # fills that arrived before their worker registered an event, a fill
+        # can beat the place_order response back
+        self._early_fills = deque(maxlen=256)
+
+        # (ack_ms, done_ms) per order: ack = place_order round trip,
+        # done = submit until filled or cancelled
+        self.latency = deque(maxlen=self.HIST_LEN)
+
+    # ------------- public API -------------
+
+    def attach(self, feed):
+        """
+        Listen to the private fill channel on feed so workers stop waiting as
+        soon as an order fills.
+        """
+        feed.on("fill", self._on_fill)
+        feed.subscribe("fill")
+        self._fills_attached = True
+
+    def submit(self, ticker: str, action: Action, side: Side, price: float, count: int = 10,
+               t0: int = 0, then=None) -> Future:
+        """
+        then(order), if given, runs on the worker with the final order after
+        the on_done callbacks and before the ticker is released.
+        """
+        with self._lock:
+            fut = self._inflight.get(ticker)
+            if fut is not None:
+                return fut
+
+            t_submit = self.lat.now()
+            self.lat.record("decide", t0, t_submit)
+            # claim the ticker before the worker can start, it may finish
+            # (and release under this lock) before submit() returns
+            self._inflight[ticker] = None
+            fut = self._pool.submit(self._run, ticker, action, side, price, count, t0, t_submit, then)
+            self._inflight[ticker] = fut
+        return fut
+
+    def buy(self, ticker: str, side: Side, price: float, count: int = 10, t0: int = 0,
+            then=None) -> Future:
+        return self.submit(ticker, Action.BUY, side, price, count, t0, then)
+
+    def sell(self, ticker: str, side: Side, price: float, count: int = 10, t0: int = 0,
+             then=None) -> Future:
+        return self.submit(ticker, Action.SELL, side, price, count, t0, then)
+
+    def busy(self, ticker: str) -> bool:
+        return ticker in self._inflight
+
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> dict:
+        """
+        Latency summary in milliseconds over the last HIST_LEN orders.
+        """
+        samples = list(self.latency)
+        if not samples:
+            return {"n": 0, "ack_p50": None, "ack_p99": None, "done_p50": None, "done_p99": None}
+
+        acks = sorted(s[0] for s in samples)
+        dones = sorted(s[1] for s in samples)
+
+        def pct(vals, q):
+            return vals[min(len(vals) - 1, int(q * len(vals)))]
+
+        return {
+            "n": len(samples),
+            "ack_p50": pct(acks, 0.50),
+            "ack_p99": pct(acks, 0.99),
+            "done_p50": pct(dones, 0.50),
+            "done_p99": pct(dones, 0.99),
+        }
+
+    def stats_str(self) -> str:
+        s = self.stats()
+        if not s["n"]:
+            return f"orders=0 inflight={self.pending()}"
+        return (
+            f"orders={s['n']} inflight={self.pending()} "
+            f"ack p50/p99={s['ack_p50']:.0f}/{s['ack_p99']:.0f}ms "
+            f"done p50/p99={s['done_p50']:.0f}/{s['done_p99']:.0f}ms"
+        )
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    # ------------- internals -------------
+
+    def _run(self, ticker, action, side, price, count, t_tick, t_submit, then):
+        try:
+            order = self._work(ticker, action, side, price, count, t_tick, t_submit)
+            if then is not None:
+                try:
+                    then(order)
+                except Exception as e:
+                    print(f"[ERR][orders] then {ticker}: {type(e).__name__}: {e}")
+            return order
+        except Exception as e:
+            print(f"[ERR][orders] {ticker}: {type(e).__name__}: {e}")
+            raise
+        finally:
+            self._release(ticker)
+
+    def _work(self, ticker, action, side, price, count, t_tick=0, t_submit=0):
+        lat = self.lat
+        lat.record("queue", t_submit)
+        n0 = lat.now()
+        t0 = perf_counter()
+        cents = int(round(price * 100))
+
+        if side == Side.NO:
+            order = self.client.portfolio.place_order(
+                ticker, action, side, count=count, no_price=cents, time_in_force=TimeInForce.GTC
+            )
+        else:
+            order = self.client.portfolio.place_order(
+                ticker, action, side, count=count, yes_price=cents, time_in_force=TimeInForce.GTC
+            )
+        t_ack = perf_counter()
+        n_ack = lat.now()
+        lat.record("ack", n0, n_ack)
+        lat.record("tick_to_ack", t_tick, n_ack)
+
+        if order.status != "executed":
+            order = self._wait_fill(order, t_ack + self.fill_window)
+
+        if order.status != "executed":
+            try:
+                order = self.client.portfolio.cancel_order(order_id=order.order_id)
+            except Exception as e:
+                print(f"[ERR][orders] cancel {ticker}: {type(e).__name__}: {e}")
+
+        if order.status == "executed":
+            lat.record("fill", n_ack)
+        self.latency.append(((t_ack - t0) * 1000, (perf_counter() - t0) * 1000))
+
+        for cb in self.on_done:
+            try:
+                cb(ticker, action, side, cents, count, order)
+            except Exception as e:
+                print(f"[ERR][orders] on_done {ticker}: {type(e).__name__}: {e}")
+        return order
+
+    def _wait_fill(self, order, deadline):
+        ev = threading.Event()
+        self._fill_events[order.order_id] = ev
+        if order.order_id in self._early_fills:
+            ev.set()
+        try:
+            while order.status != "executed":
+                remaining = deadline - perf_counter()
+                if remaining <= 0:
+                    break
+                if self._fills_attached:
+                    # nothing to do until a fill arrives or the window closes
+                    if not ev.wait(remaining):
+                        # one last look before the caller cancels, in case
+                        # the fill message was missed
+                        order = self.client.portfolio.get_order(order_id=order.order_id)
+                        break
+                    ev.clear()
+                else:
+                    ev.wait(min(self.POLL_SEC, remaining))
+                order = self.client.portfolio.get_order(order_id=order.order_id)
+        finally:
+            self._fill_events.pop(order.order_id, None)
+        return order
+
+    def _on_fill(self, msg):
+        order_id = getattr(msg, "order_id", None)
+        ev = self._fill_events.get(order_id)
+        if ev is not None:
+            ev.set()
+        else:
+            self._early_fills.append(order_id)
+
+    def _release(self, ticker):
+        with self._lock:
+            self._inflight.pop(ticker, None)
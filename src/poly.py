@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+
+import websockets
+from rich import print
+
+POLY_MARKET_WS = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+
+
+def _f(v):
+    try:
+        return float(v) if v is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class PolyBook:
+    """
+    Top of book for Polymarket CLOB tokens from the public market websocket.
+
+    Public API:
+        run()                  -> reader loop, start it as a task
+        subscribe(asset_ids)   -> replace the tracked tokens (reconnects)
+        bid(asset_id) / ask(asset_id) -> float | None
+
+    Handles "book" snapshots, "price_change" updates (best_bid/best_ask per
+    change) and "best_bid_ask" messages. on_update() is called after every
+    change to a tracked token, from the event loop thread.
+
+    Quotes only come from the live socket: every tracked token reads None
+    from the moment the connection drops (or subscribe() swaps the tokens)
+    until the new connection sends fresh prices, so nothing trades on a
+    book that may have moved while we were away.
+
+    url can point at a local stand-in that speaks the same message shape.
+    """
+
+    PING_SEC = 10.0
+
+    def __init__(self, url: str = POLY_MARKET_WS, on_update=None):
+        self.url = url
+        self.on_update = on_update
+
+        # asset_id -> {"bid": float | None, "ask": float | None, "ts": float}
+        self.best = {}
+
+        self._assets: list[str] = []
+        self._ws = None
+        self._stopped = False
+
+    # ------------- public API -------------
+
+    def subscribe(self, asset_ids):
+        self._assets = list(asset_ids)
+        self.best = {a: {"bid": None, "ask": None, "ts": 0.0} for a in self._assets}
+
+        # drop the current socket, the reader ignores whatever it still has
+        # buffered and reconnects with the new assets
+        if self._ws is not None:
+            asyncio.create_task(self._ws.close())
+            self._ws = None
+
+    def bid(self, asset_id):
+        rec = self.best.get(asset_id)
+        return rec["bid"] if rec else None
+
+    def ask(self, asset_id):
+        rec = self.best.get(asset_id)
+        return rec["ask"] if rec else None
+
+    async def stop(self):
+        self._stopped = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def run(self):
+        while not self._stopped:
+            if not self._assets:
+                await asyncio.sleep(0.1)
+                continue
+
+            ws = None
+            failed = False
+            try:
+                async with websockets.connect(
+                    self.url, ping_interval=20, ping_timeout=20
+                ) as ws:
+                    self._ws = ws
+                    await ws.send(json.dumps({"assets_ids": self._assets, "type": "market"}))
+
+                    pinger = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for raw in ws:
+                            if self._ws is not ws:
+                                break  # subscribe() replaced the assets
+                            self._handle(raw)
+                    finally:
+                        pinger.cancel()
+            except Exception as e:
+                print("poly reconnect:", e)
+                failed = True
+            finally:
+                if self._ws is ws:
+                    self._ws = None
+                    self._clear()
+
+            # the book is already cleared, back off only after that
+            if failed:
+                await asyncio.sleep(1.0)
+
+    # ------------- internals -------------
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.PING_SEC)
+            await ws.send("PING")
+
+    def _handle(self, raw):
+        if raw == "PONG":
+            return
+
+        msg = json.loads(raw)
+        for m in msg if isinstance(msg, list) else [msg]:
+            et = m.get("event_type")
+
+            if et == "book":
+                bids = [_f(b.get("price")) for b in m.get("bids") or []]
+                asks = [_f(a.get("price")) for a in m.get("asks") or []]
+                bids = [b for b in bids if b is not None]
+                asks = [a for a in asks if a is not None]
+                self._set(
+                    m.get("asset_id"),
+                    max(bids) if bids else None,
+                    min(asks) if asks else None,
+                )
+
+            elif et == "price_change":
+                for c in m.get("price_changes") or []:
+                    if "best_bid" in c or "best_ask" in c:
+                        self._set(c.get("asset_id"), _f(c.get("best_bid")), _f(c.get("best_ask")))
+
+            elif et == "best_bid_ask":
+                self._set(m.get("asset_id"), _f(m.get("best_bid")), _f(m.get("best_ask")))
+
+    def _clear(self):
+        for rec in self.best.values():
+            rec["bid"] = rec["ask"] = None
+            rec["ts"] = 0.0
+
+    def _set(self, asset_id, bid, ask):
+        rec = self.best.get(asset_id)
+        if rec is None:
+            return
+
+        rec["bid"] = bid
+        rec["ask"] = ask
+        rec["ts"] = time.time()
+
+        if self.on_update is not None:
+            self.on_update()
@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from time import perf_counter, time as utime
+
+from rich import print
+
+
+class PositionStore(MutableMapping):
+    """
+    Open positions kept in a dict and mirrored to SQLite in WAL mode.
+
+    Reads never touch the database. Every assignment or pop writes just
+    that one row and commits, so a crash loses at most the mutation in
+    flight and a restart rebuilds the dict with a single SELECT.
+
+    Values must be JSON serializable dicts, e.g. {"dir": "YES", "price": 0.93}.
+    A value is only persisted when it is assigned, mutating it in place is
+    not seen by the store.
+
+    synchronous=NORMAL means commits append to the WAL without an fsync.
+    That survives the process dying, a power cut can lose the last commits.
+    checkpoint() folds the WAL back into the main file, its cost depends on
+    the writes since the last one and not on how many positions are open.
+
+    Safe to use from the Feed thread and the event loop at the same time.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS positions (
+            ticker  TEXT PRIMARY KEY,
+            data    TEXT NOT NULL,
+            ts      REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key     TEXT PRIMARY KEY,
+            value   TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, legacy_json: str | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+
+        self._data = {}
+        self._events = None
+        self.writes = 0
+
+        t0 = perf_counter()
+        self.reload()
+        if not self._data and legacy_json and os.path.exists(legacy_json):
+            self._import_json(legacy_json)
+        if self._data:
+            print(f"[POS] recovered {len(self._data)} positions from {path} "
+                  f"in {(perf_counter() - t0) * 1000:.1f}ms")
+
+    # ------------- mapping -------------
+
+    def __getitem__(self, ticker):
+        return self._data[ticker]
+
+    def __setitem__(self, ticker, pos):
+        row = (ticker, json.dumps(pos), utime())
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO positions VALUES (?, ?, ?)", row)
+            self._data[ticker] = pos
+            self.writes += 1
+
+    def __delitem__(self, ticker):
+        with self._lock:
+            del self._data[ticker]
+            self._db.execute("DELETE FROM positions WHERE ticker = ?", (ticker,))
+            self.writes += 1
+
+    def pop(self, ticker, *default):
+        # one lock for the lookup and the delete, close paths race on the Feed thread
+        with self._lock:
+            if ticker not in self._data:
+                if default:
+                    return default[0]
+                raise KeyError(ticker)
+            pos = self._data.pop(ticker)
+            self._db.execute("DELETE FROM positions WHERE ticker = ?", (ticker,))
+            self.writes += 1
+        return pos
+
+    def __contains__(self, ticker):
+        return ticker in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, ticker, default=None):
+        return self._data.get(ticker, default)
+
+    def __repr__(self):
+        return f"PositionStore({self.path!r}, {self._data!r})"
+
+    # ------------- persistence -------------
+
+    def reload(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT ticker, data FROM positions").fetchall()
+            self._data = {t: json.loads(d) for t, d in rows}
+        return self._data
+
+    def save_events(self, events):
+        """
+        Store the watched event list, only if it changed since the last call.
+        """
+        events = list(events or [])
+        if events == self._events:
+            return
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('events', ?)", (json.dumps(events),))
+        self._events = events
+
+    def load_events(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'events'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def checkpoint(self, events=None):
+        if events is not None:
+            self.save_events(events)
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        with self._lock:
+            if self._db is None:
+                return
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.close()
+            self._db = None
+
+    def _import_json(self, path):
+        try:
+            with open(path) as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN][POS] cannot import {path}: {e}")
+            return
+        if not isinstance(legacy, dict):
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?)",
+                [(t, json.dumps(p), utime()) for t, p in legacy.items()],
+            )
+            self._db.execute("COMMIT")
+        self.reload()
+        print(f"[POS] imported {len(self._data)} positions from {path}")
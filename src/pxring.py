@@ -0,0 +1,168 @@
+from array import array
+from collections import deque
+from math import exp
+
+
+class PriceRing:
+    """
+    Time windowed price history for one ticker in two fixed size
+    array('d') rings, with the window statistics kept up to date on push.
+
+    push(ts, px) appends and then drops every sample older than
+    ts - window, the same rule Kalshi._push_px used on its deque. If more
+    than capacity samples land inside one window the oldest go early, so
+    memory per ticker is fixed at 16 bytes * capacity.
+
+    Maintained on every push, all O(1) to read:
+        min, max      monotonic queues of sample numbers, amortized O(1)
+        first, last   (ts, px) of the oldest and newest sample
+        slope         endpoint slope, (last - first) / dt, dollars per second
+        lstsq_slope   least squares slope over the whole window, from
+                      running sums of t, p, t*t and t*p
+        ewma          time decayed mean, half of the weight is older than
+                      ewma_sec * ln 2
+
+    The running sums subtract evicted samples, so they are rebuilt from the
+    arrays once per capacity evictions to keep float drift bounded.
+    """
+
+    def __init__(self, window: float, capacity: int = 512, ewma_sec: float | None = None):
+        self.window = window
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.px = array("d", bytes(8 * capacity))
+        self._start = 0       # sample number of the oldest sample held
+        self._end = 0         # one past the newest
+
+        self._minq = deque()  # sample numbers, prices increasing
+        self._maxq = deque()  # sample numbers, prices decreasing
+
+        # least squares sums over t = ts - _anchor
+        self._anchor = 0.0
+        self._st = self._sp = self._stt = self._stp = 0.0
+        self._dropped = 0
+
+        self.ewma_sec = ewma_sec if ewma_sec is not None else window / 2
+        self.ewma = None
+
+    def __len__(self):
+        return self._end - self._start
+
+    def push(self, ts: float, px: float):
+        cap = self.capacity
+        tss, pxs = self.ts, self.px
+        n = self._end
+        if n - self._start == cap:
+            self._drop()
+
+        if n == self._start:
+            self._anchor = ts
+            if self.ewma is None:
+                self.ewma = px
+        else:
+            dt = ts - tss[(n - 1) % cap]
+            self.ewma += (1.0 - exp(-dt / self.ewma_sec)) * (px - self.ewma)
+        i = n % cap
+        tss[i] = ts
+        pxs[i] = px
+
+        q = self._minq
+        while q and pxs[q[-1] % cap] >= px:
+            q.pop()
+        q.append(n)
+        q = self._maxq
+        while q and pxs[q[-1] % cap] <= px:
+            q.pop()
+        q.append(n)
+
+        t = ts - self._anchor
+        self._st += t
+        self._sp += px
+        self._stt += t * t
+        self._stp += t * px
+        self._end = n + 1
+
+        cutoff = ts - self.window
+        while tss[self._start % cap] < cutoff:
+            self._drop()
+
+    def _drop(self):
+        s = self._start
+        i = s % self.capacity
+        t = self.ts[i] - self._anchor
+        p = self.px[i]
+        self._st -= t
+        self._sp -= p
+        self._stt -= t * t
+        self._stp -= t * p
+        if self._minq[0] == s:
+            self._minq.popleft()
+        if self._maxq[0] == s:
+            self._maxq.popleft()
+        self._start = s + 1
+
+        self._dropped += 1
+        if self._dropped >= self.capacity:
+            self._resum()
+
+    def _resum(self):
+        self._dropped = 0
+        cap = self.capacity
+        idx = [k % cap for k in range(self._start, self._end)]
+        if not idx:
+            self._st = self._sp = self._stt = self._stp = 0.0
+            return
+        self._anchor = self.ts[idx[0]]
+        ts = [self.ts[i] - self._anchor for i in idx]
+        px = [self.px[i] for i in idx]
+        self._st = sum(ts)
+        self._sp = sum(px)
+        self._stt = sum(t * t for t in ts)
+        self._stp = sum(t * p for t, p in zip(ts, px))
+
+    # ------------- window statistics -------------
+
+    @property
+    def first(self):
+        i = self._start % self.capacity
+        return self.ts[i], self.px[i]
+
+    @property
+    def last(self):
+        i = (self._end - 1) % self.capacity
+        return self.ts[i], self.px[i]
+
+    @property
+    def min(self) -> float:
+        return self.px[self._minq[0] % self.capacity]
+
+    @property
+    def max(self) -> float:
+        return self.px[self._maxq[0] % self.capacity]
+
+    @property
+    def slope(self) -> float | None:
+        cap = self.capacity
+        i, j = self._start % cap, (self._end - 1) % cap
+        dt = self.ts[j] - self.ts[i]
+        if dt <= 0:
+            return None
+        return (self.px[j] - self.px[i]) / dt
+
+    @property
+    def lstsq_slope(self) -> float | None:
+        n = self._end - self._start
+        denom = n * self._stt - self._st * self._st
+        if n < 2 or denom <= 1e-12:
+            return None
+        return (n * self._stp - self._st * self._sp) / denom
+
+    def window_arrays(self):
+        """
+        Copies of the (ts, px) samples in the window, oldest first.
+        """
+        cap = self.capacity
+        a, b = self._start % cap, self._end % cap
+        if len(self) and b <= a:
+            return self.ts[a:] + self.ts[:b], self.px[a:] + self.px[:b]
+        return self.ts[a:b], self.px[a:b]
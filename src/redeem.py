@@ -1,55 +1,323 @@
-from web3 import Web3
-from web3.middleware import ExtraDataToPOAMiddleware
-from dotenv import load_dotenv
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from os import getenv
+from time import time as utime
+
+from dotenv import load_dotenv
+from rich import print
+
+# same failover order as tmp.get_web3
+RPC_URLS = [
+    "https://polygon-rpc.com",
+    "https://1rpc.io/matic",
+    "https://rpc.ankr.com/polygon",
+]
+CHAIN_ID = 137
+
+CTF_ADDRESS = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+USDC_E_ADDRESS = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+
+CTF_ABI = [
+    {
+        "name": "redeemPositions",
+        "type": "function",
+        "stateMutability": "nonpayable",
+        "inputs": [
+            {"name": "collateralToken", "type": "address"},
+            {"name": "parentCollectionId", "type": "bytes32"},
+            {"name": "conditionId", "type": "bytes32"},
+            {"name": "indexSets", "type": "uint256[]"},
+        ],
+        "outputs": [],
+    }
+]
+
+
+class Redeemer:
+    """
+    Long lived CTF redemption worker.
+
+    Condition ids are queued with submit() and redeemed on a background
+    thread, so nothing here runs on the trading loop. Each pass:
+        1. collects every due condition id, plus whatever is in IDS.txt
+           and not yet in the receipts file
+        2. simulates every redeemPositions with eth_call, so a condition
+           that has not resolved yet is skipped instead of reverting on chain
+           and paying gas
+        3. reads the gas price once and sends one redeemPositions per id
+           that passed, with consecutive nonces from the local counter
+        4. waits for all receipts at once, and appends the mined ones to
+           the receipts file. Failed or unmined ids stay pending.
+
+    A failed id is retried after RETRY_SEC, doubling up to MAX_RETRY_SEC,
+    and dropped after MAX_TRIES. It is still in IDS.txt, so the next start
+    picks it up again.
+
+    Providers are built once, on the first batch, so importing and starting
+    this costs nothing until there is something to redeem (web3 alone takes
+    longer to import than the rest of arb.py). They are reused after that.
+    A call that fails on one RPC is retried on the next, and the last good
+    one is used first next time.
+    Pass w3 (e.g. Web3(EthereumTesterProvider()) or an anvil endpoint) to
+    run against a local chain instead.
+    """
+
+    RECEIPT_TIMEOUT = 180
+    RECEIPT_WORKERS = 8
+    RETRY_SEC = 300            # how long a failed id waits before the next try, doubled per failure
+    MAX_RETRY_SEC = 3600
+    MAX_TRIES = 8              # ~4h of backoff, then the id waits for the next start
+    GAS_LIMIT = 300_000        # fixed so a batch needs no estimateGas per id, unused gas is not charged
+
+    def __init__(self, rpc_urls=RPC_URLS, w3=None, account=None, private_key=None,
+                 ctf_address=CTF_ADDRESS, collateral=USDC_E_ADDRESS, chain_id=CHAIN_ID,
+                 ids_path="IDS.txt", receipts_path="reciept.txt"):
+        load_dotenv(".env")
+
+        self.rpc_urls = rpc_urls
+        self.providers = [w3] if w3 is not None else None   # built by _connect()
+        self._active = 0
+
+        self.account = account or getenv("WALLET_ADDRESS")
+        self._key = private_key or getenv("PRIVATE_KEY")
+        self.chain_id = chain_id
+        self.collateral = collateral
+        self.ctf_address = ctf_address
+        self.ctf = None
+
+        self.ids_path = ids_path
+        self.receipts_path = receipts_path
+
+        self._nonce = None         # next nonce to use, None until read from the chain
+        self._due = {}             # condition id -> earliest redeem time
+        self._tries = {}           # condition id -> failed attempts so far
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._waiters = ThreadPoolExecutor(max_workers=self.RECEIPT_WORKERS, thread_name_prefix="redeem-rcpt")
+
+        self.sent = 0
+        self.redeemed = 0
+        self.failed = 0
+
+    # ------------- worker -------------
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="redeemer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, condition_id: str, delay: float = 0):
+        """
+        Queue a condition for redemption in `delay` seconds. Never blocks.
+        """
+        with self._lock:
+            self._due[condition_id] = utime() + delay
+        self._wake.set()
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._waiters.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        # pick up whatever earlier sessions left in IDS.txt
+        for cid in self.pending():
+            self._due.setdefault(cid, 0)
+
+        while not self._closed:
+            with self._lock:
+                now = utime()
+                ready = [c for c, t in self._due.items() if t <= now]
+                nxt = min(self._due.values(), default=now + 60)
+            if not ready:
+                self._wake.wait(timeout=max(0.5, nxt - now))
+                self._wake.clear()
+                continue
+
+            try:
+                done = self.redeem_batch(ready)
+            except Exception as e:
+                print(f"[ERR][REDEEM] {type(e).__name__}: {e}")
+                done = {}
+
+            with self._lock:
+                for cid in ready:
+                    if cid in done:
+                        self._due.pop(cid, None)
+                        self._tries.pop(cid, None)
+                        continue
+                    n = self._tries.get(cid, 0) + 1
+                    if n >= self.MAX_TRIES:
+                        print(f"[WARN][REDEEM] giving up on {cid} after {n} tries")
+                        self._due.pop(cid, None)
+                        self._tries.pop(cid, None)
+                    else:
+                        self._tries[cid] = n
+                        self._due[cid] = utime() + min(self.RETRY_SEC * 2 ** (n - 1), self.MAX_RETRY_SEC)
+
+    # ------------- batch -------------
+
+    def _connect(self):
+        if self.ctf is not None:
+            return
+        from web3 import Web3
+        from web3.middleware import ExtraDataToPOAMiddleware
+
+        if self.providers is None:
+            providers = []
+            for url in self.rpc_urls:
+                p = Web3(Web3.HTTPProvider(url, request_kwargs={"timeout": 30}))
+                p.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+                providers.append(p)
+            self.providers = providers
+
+        self.account = Web3.to_checksum_address(self.account)
+        self.collateral = Web3.to_checksum_address(self.collateral)
+        self.ctf = self.providers[0].eth.contract(address=Web3.to_checksum_address(self.ctf_address), abi=CTF_ABI)
+
+    def pending(self) -> list:
+        """
+        Condition ids in IDS.txt without a mined redeem in the receipts file.
+        """
+        done = set()
+        try:
+            with open(self.receipts_path) as f:
+                for line in f:
+                    parts = line.strip().split(" - ")
+                    if len(parts) >= 2:
+                        done.add(parts[-2])
+        except FileNotFoundError:
+            pass
+
+        try:
+            with open(self.ids_path) as f:
+                ids = [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+        return [c for c in dict.fromkeys(ids) if c not in done]
+
+    def redeem_batch(self, condition_ids) -> dict:
+        """
+        Send one redeem per id and wait for all receipts.
+        Returns {condition_id: tx_hex} for the ids that were mined successfully.
+        """
+        condition_ids = list(dict.fromkeys(condition_ids))
+        if not condition_ids:
+            return {}
+        self._connect()
+
+        # a redeem that would revert (condition not resolved yet) is not sent
+        checks = {cid: self._waiters.submit(self._simulate, cid) for cid in condition_ids}
+        ok_ids = []
+        for cid, fut in checks.items():
+            try:
+                fut.result()
+                ok_ids.append(cid)
+            except Exception as e:
+                print(f"[WARN][REDEEM] skip {cid}, would revert: {type(e).__name__}: {e}")
+        if not ok_ids:
+            return {}
+
+        gas_price = self._call(lambda w3: w3.eth.gas_price)
+        sent = {}
+        for cid in ok_ids:
+            try:
+                sent[cid] = self._send(cid, gas_price)
+            except Exception as e:
+                print(f"[ERR][REDEEM] {cid}: {type(e).__name__}: {e}")
+                if "nonce" in str(e).lower():
+                    self._nonce = None
+        self.sent += len(sent)
+        print(f"[REDEEM] sent {len(sent)}/{len(condition_ids)} at {gas_price / 1e9:.1f} gwei")
+
+        futures = {cid: self._waiters.submit(self._wait, txh) for cid, txh in sent.items()}
+        done = {}
+        for cid, fut in futures.items():
+            try:
+                ok = fut.result()
+            except Exception as e:
+                print(f"[ERR][REDEEM] no receipt for {cid}: {type(e).__name__}: {e}")
+                ok = False
+            if ok:
+                done[cid] = sent[cid]
+            else:
+                # whatever happened, the chain decides the next nonce
+                self._nonce = None
+
+        if done:
+            with open(self.receipts_path, "a") as f:
+                f.writelines(f"{cid} - {txh}\n" for cid, txh in done.items())
+        self.redeemed += len(done)
+        self.failed += len(sent) - len(done)
+        print(f"[REDEEM] mined {len(done)}/{len(sent)}")
+        return done
+
+    def _redeem_args(self, condition_id: str) -> list:
+        return [
+            self.collateral,
+            b"\x00" * 32,
+            bytes.fromhex(condition_id.removeprefix("0x")),
+            [1, 2],       # redeem both Up (1) and Down (2) if you hold any
+        ]
+
+    def _simulate(self, condition_id: str):
+        """
+        eth_call the redeem against the latest block, raises if it would revert.
+        """
+        data = self.ctf.encode_abi("redeemPositions", args=self._redeem_args(condition_id))
+        self._call(lambda w3: w3.eth.call({"from": self.account, "to": self.ctf.address, "data": data}))
+
+    def _send(self, condition_id: str, gas_price: int) -> str:
+        if self._nonce is None:
+            self._nonce = self._call(lambda w3: w3.eth.get_transaction_count(self.account, "pending"))
+
+        tx = self.ctf.functions.redeemPositions(*self._redeem_args(condition_id)).build_transaction({
+            "from": self.account,
+            "nonce": self._nonce,
+            "chainId": self.chain_id,
+            "gasPrice": gas_price,
+            "gas": self.GAS_LIMIT,
+        })
+        signed = self.providers[0].eth.account.sign_transaction(tx, private_key=self._key)
+        txh = self._call(lambda w3: w3.eth.send_raw_transaction(signed.raw_transaction))
+        self._nonce += 1
+        return txh.to_0x_hex()
+
+    def _wait(self, txh: str) -> bool:
+        receipt = self._call(lambda w3: w3.eth.wait_for_transaction_receipt(txh, timeout=self.RECEIPT_TIMEOUT))
+        return receipt.status == 1
+
+    def _call(self, fn):
+        """
+        Run fn(w3) on the last good provider, then on the others in order.
+        """
+        last = None
+        n = len(self.providers)
+        for i in range(n):
+            idx = (self._active + i) % n
+            try:
+                out = fn(self.providers[idx])
+                self._active = idx
+                return out
+            except (OSError, ConnectionError) as e:
+                last = e
+            except Exception as e:
+                # rpc errors (bad nonce, revert) are the same on every node
+                if type(e).__name__ in ("Web3RPCError", "ContractLogicError", "TimeExhausted"):
+                    raise
+                last = e
+            print(f"[WARN][REDEEM] rpc {idx} failed: {type(last).__name__}: {last}")
+        raise last
 
 
 def redeem(condition_id_hex):
-    load_dotenv(".env")
-    RPC_URL = "https://1rpc.io/matic"
-    CHAIN_ID = 137
-
-    CTF_ADDRESS = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
-    USDC_E_ADDRESS = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
-
-    ctf_abi = [
-        {
-            "name": "redeemPositions",
-            "type": "function",
-            "stateMutability": "nonpayable",
-            "inputs": [
-                {"name": "collateralToken", "type": "address"},
-                {"name": "parentCollectionId", "type": "bytes32"},
-                {"name": "conditionId", "type": "bytes32"},
-                {"name": "indexSets", "type": "uint256[]"},
-            ],
-            "outputs": [],
-        }
-    ]
-
-    w3 = Web3(Web3.HTTPProvider(RPC_URL))
-    w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-
-    acct = w3.to_checksum_address(getenv("WALLET_ADDRESS"))
-    priv = getenv("PRIVATE_KEY")
-
-    ctf = w3.eth.contract(address=w3.to_checksum_address(CTF_ADDRESS), abi=ctf_abi)
-
-    condition_id = bytes.fromhex(condition_id_hex[2:])
-
-    tx = ctf.functions.redeemPositions(
-        w3.to_checksum_address(USDC_E_ADDRESS),
-        b"\x00" * 32,
-        condition_id,
-        [1, 2]        # redeem both Up (1) and Down (2) if you hold any
-    ).build_transaction({
-        "from": acct,
-        "nonce": w3.eth.get_transaction_count(acct),
-        "chainId": CHAIN_ID,
-        "gasPrice": w3.eth.gas_price,
-    })
-
-    signed = w3.eth.account.sign_transaction(tx, private_key=priv)
-    txh = w3.eth.send_raw_transaction(signed.raw_transaction)
-    print("Redeem tx:", txh.hex())
-    return txh.hex()
\ No newline at end of file
+    """
+    Redeem one condition and wait for it. Kept for scripts, the bot uses Redeemer.
+    """
+    done = Redeemer().redeem_batch([condition_id_hex])
+    return done.get(condition_id_hex)
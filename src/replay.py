@@ -0,0 +1,439 @@
+"""
+Deterministic replay of recorded Kalshi ticks through the real strategy code.
+
+    python replay.py                                   # strategy_yes_only, legacy CSV
+    python replay.py strategy_high_trade ../data/ticks
+
+Replay owns a virtual clock. Kalshi.Feed, Kalshi.clock and Kalshi.sleep are
+pointed at it, so the strategy coroutine runs unchanged. Each
+`await self.sleep(1)` in its main loop hands every recorded tick up to one
+virtual second later to the registered handlers, in order, on the calling
+thread. Orders go to SimOrders and fill against the replayed top of book
+before the next tick, so a given tape and CONFIG always give the same trades.
+
+Files the strategy writes (log.csv, positions.db) go to a throwaway
+./../data, see sandbox().
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from array import array
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import count
+from time import perf_counter, perf_counter_ns
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from pykalshi import Action, Side
+from rich import print
+
+from backtest import Backtest, load_data
+from orders import OrderEngine
+from account import Account
+
+
+class ReplayDone(Exception):
+    """
+    Raised out of Replay.sleep once the tape is exhausted, ending the strategy.
+    """
+
+
+class ReplayTicker:
+    """
+    The TickerMessage fields the strategies read, prebuilt per recorded row
+    so dispatch cost is the handler's and not the model's.
+    """
+
+    __slots__ = (
+        "market_ticker", "yes_bid", "yes_ask", "volume", "open_interest",
+        "dollar_volume", "dollar_open_interest", "ts",
+    )
+
+    def __init__(self, market_ticker, yes_bid, yes_ask, volume=None, open_interest=None,
+                 dollar_volume=None, dollar_open_interest=None, ts=None):
+        self.market_ticker = market_ticker
+        self.yes_bid = yes_bid
+        self.yes_ask = yes_ask
+        self.volume = volume
+        self.open_interest = open_interest
+        self.dollar_volume = dollar_volume
+        self.dollar_open_interest = dollar_open_interest
+        self.ts = ts
+
+
+class ReplayFeed:
+    """
+    Stand-in for pykalshi.Feed: on, subscribe, unsubscribe, is_connected and
+    the heartbeat counters. Only "ticker" messages for subscribed markets
+    reach the handlers, like on the live socket.
+    """
+
+    def __init__(self, replay):
+        self.replay = replay
+        self._handlers = {}
+        self._tickers = set()
+        self._connected = False
+        self._message_count = 0
+        self._last_message_at = None
+
+    def on(self, channel, handler=None):
+        if handler is not None:
+            self._handlers.setdefault(channel, []).append(handler)
+            return handler
+
+        def decorator(fn):
+            self._handlers.setdefault(channel, []).append(fn)
+            return fn
+
+        return decorator
+
+    def subscribe(self, channel, *, market_ticker=None, market_tickers=None):
+        if channel != "ticker":
+            return  # fills come back synchronously from SimOrders
+        if market_ticker is not None:
+            self._tickers.add(market_ticker.upper())
+        for t in market_tickers or ():
+            self._tickers.add(t.upper())
+
+    def unsubscribe(self, channel, *, market_ticker=None, market_tickers=None):
+        if channel != "ticker":
+            return
+        if market_ticker is not None:
+            self._tickers.discard(market_ticker.upper())
+        for t in market_tickers or ():
+            self._tickers.discard(t.upper())
+
+    def start(self):
+        self._connected = True
+
+    def stop(self):
+        self._connected = False
+
+    @property
+    def is_connected(self):
+        return self._connected
+
+    @property
+    def messages_received(self):
+        return self._message_count
+
+    @property
+    def seconds_since_last_message(self):
+        if self._last_message_at is None:
+            return None
+        return self.replay.now - self._last_message_at
+
+    @property
+    def reconnect_count(self):
+        return 0
+
+    @property
+    def latency_ms(self):
+        return None
+
+    def _dispatch(self, msg):
+        if not self._connected or msg.market_ticker not in self._tickers:
+            return
+        handlers = self._handlers.get("ticker")
+        if not handlers:
+            return
+
+        self._message_count += 1
+        self._last_message_at = msg.ts
+
+        t0 = perf_counter_ns()
+        for handler in handlers:
+            handler(msg)
+        self.replay.handler_ns.append(perf_counter_ns() - t0)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class SimPortfolio:
+    """
+    Order gateway behind SimOrders. A limit order fills at its limit price
+    if it crosses the current replayed quote, otherwise it rests and gets
+    cancelled by the engine. Balances are in cents like the API.
+    """
+
+    def __init__(self, replay, balance: int):
+        self.replay = replay
+        self.balance = balance
+        self.orders = {}
+        self._ids = count(1)
+
+    def place_order(self, ticker, action, side, count=1, yes_price=None, no_price=None, **_):
+        yes_bid, yes_ask = self.replay.book.get(ticker, (None, None))
+        if side == Side.NO:
+            cents = no_price
+            bid = None if yes_ask is None else 100 - yes_ask
+            ask = None if yes_bid is None else 100 - yes_bid
+        else:
+            cents = yes_price
+            bid, ask = yes_bid, yes_ask
+
+        if action == Action.BUY:
+            filled = ask is not None and ask <= cents
+        else:
+            filled = bid is not None and bid >= cents
+
+        if filled:
+            self.balance += (-cents if action == Action.BUY else cents) * count
+
+        order = SimpleNamespace(
+            order_id=f"sim-{next(self._ids)}",
+            ticker=ticker,
+            action=action,
+            side=side,
+            count=count,
+            status="executed" if filled else "resting",
+            yes_price=cents if side != Side.NO else 100 - cents,
+            no_price=cents if side == Side.NO else 100 - cents,
+        )
+        self.orders[order.order_id] = order
+        return order
+
+    def get_order(self, order_id):
+        return self.orders[order_id]
+
+    def cancel_order(self, order_id):
+        order = self.orders[order_id]
+        if order.status != "executed":
+            order.status = "canceled"
+        return order
+
+    def get_balance(self):
+        return SimpleNamespace(balance=self.balance, portfolio_value=0)
+
+
+class SimClient:
+    """
+    The KalshiClient calls the strategies make, answered from the tape.
+    A market is open from its first recorded tick until its close.
+    """
+
+    def __init__(self, replay, balance: int):
+        self.replay = replay
+        self.portfolio = SimPortfolio(replay, balance)
+
+    def get_markets(self, limit=100, series_ticker=None, **_):
+        now = self.replay.now
+        out = []
+        for ticker, m in self.replay.markets.items():
+            if series_ticker is not None and ticker.split("-")[0] != series_ticker:
+                continue
+            if m.open <= now < m.close:
+                out.append(self._market(ticker, m, "active"))
+        out.sort(key=lambda mk: mk.close_time)
+        return out[:limit]
+
+    def get_market(self, ticker):
+        m = self.replay.markets[ticker]
+        return self._market(ticker, m, "active" if self.replay.now < m.close else "finalized")
+
+    def _market(self, ticker, m, status):
+        yes_bid, yes_ask = self.replay.book.get(ticker, (None, None))
+        return SimpleNamespace(
+            ticker=ticker,
+            status=status,
+            result=(m.result if status != "active" else ""),
+            close_time=datetime.fromtimestamp(m.close, timezone.utc).isoformat().replace("+00:00", "Z"),
+            expected_expiration_time=datetime.fromtimestamp(m.close, timezone.utc).isoformat().replace("+00:00", "Z"),
+            yes_bid=yes_bid,
+            yes_ask=yes_ask,
+            no_bid=None if yes_ask is None else 100 - yes_ask,
+            no_ask=None if yes_bid is None else 100 - yes_bid,
+            yes_sub_title=f"Price to beat: ${m.target:,.2f}",
+        )
+
+
+class SimOrders(OrderEngine):
+    """
+    OrderEngine that runs each order inline against SimPortfolio with no
+    fill window, so the returned future is already done and the fill
+    callbacks run before the next tick.
+    """
+
+    def __init__(self, client, lat=None):
+        super().__init__(client, workers=1, fill_window=0.0, lat=lat)
+
+    def submit(self, ticker, action, side, price, count=10, t0=0, then=None):
+        fut = Future()
+        t_submit = self.lat.now()
+        self.lat.record("decide", t0, t_submit)
+        try:
+            fut.set_result(self._run(ticker, action, side, price, count, t0, t_submit, then))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+
+@contextmanager
+def sandbox():
+    """
+    chdir into a temporary <tmp>/src so the strategies' ./../data paths
+    resolve to a scratch <tmp>/data instead of the real one.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        os.makedirs(os.path.join(tmp, "src"))
+        os.makedirs(os.path.join(tmp, "data"))
+        with open(os.path.join(tmp, "data", "log.csv"), "w") as f:
+            f.write("ticker,dir,action,price,effect\n")
+        os.chdir(os.path.join(tmp, "src"))
+        try:
+            yield tmp
+        finally:
+            os.chdir(cwd)
+
+
+class Replay:
+    """
+    Virtual clock, tape and simulated exchange for one replay run.
+    """
+
+    def __init__(self, ticks: pd.DataFrame, btc: pd.DataFrame | None = None, balance: int = 100_000):
+        df = ticks.dropna(subset=["yes_bid", "yes_ask"]).sort_values("timestamp", kind="stable")
+        self._ts = df["timestamp"].to_numpy(np.float64)
+
+        def col(name):
+            return df[name].tolist() if name in df else [None] * len(df)
+
+        self._msgs = [
+            ReplayTicker(t, int(b), int(a), v, oi, dv, doi, ts)
+            for t, b, a, v, oi, dv, doi, ts in zip(
+                df["market_ticker"].tolist(), col("yes_bid"), col("yes_ask"), col("volume"),
+                col("open_interest"), col("dollar_volume"), col("dollar_open_interest"), self._ts.tolist(),
+            )
+        ]
+
+        # settle the same way the backtester does
+        bt = Backtest(ticks, btc)
+        results = dict(zip(bt.markets, bt.arrays["result"]))
+        first = df.groupby("market_ticker").agg(
+            open=("timestamp", "min"), last=("timestamp", "max"), exp=("exp", "max"), target=("target", "last"),
+        )
+        self.markets = {
+            t: SimpleNamespace(
+                open=r.open,
+                close=float(r.exp) if pd.notna(r.exp) and r.exp > 0 else r.last,
+                target=float(r.target) if pd.notna(r.target) else 0.0,
+                result="yes" if results.get(t) == 1.0 else "no",
+            )
+            for t, r in first.iterrows()
+        }
+
+        self.now = float(self._ts[0]) if len(self._ts) else 0.0
+        self._i = 0
+        self.book = {}  # ticker -> (yes_bid, yes_ask) in cents
+        self.feeds = []
+        self.handler_ns = array("q")
+        self.client = SimClient(self, balance)
+        self._account = None
+
+    # ------------- hooks for Kalshi -------------
+
+    def clock(self):
+        return self.now
+
+    def feed(self, client):
+        f = ReplayFeed(self)
+        self.feeds.append(f)
+        return f
+
+    async def sleep(self, sec):
+        self.advance(self.now + sec)
+        acct = self._account
+        if acct is not None and self.now - acct.synced_at >= acct.RECONCILE_SEC:
+            acct.reconcile()
+        await asyncio.sleep(0)
+
+    def advance(self, until: float):
+        """
+        Dispatch every tick with timestamp <= until, then move the clock there.
+        """
+        if self._i >= len(self._msgs):
+            raise ReplayDone
+
+        end = int(np.searchsorted(self._ts, until, side="right"))
+        msgs, feeds = self._msgs, self.feeds
+        while self._i < end:
+            msg = msgs[self._i]
+            self._i += 1
+            self.now = msg.ts
+            self.book[msg.market_ticker] = (msg.yes_bid, msg.yes_ask)
+            for f in feeds:
+                f._dispatch(msg)
+        self.now = max(self.now, until)
+
+    # ------------- running -------------
+
+    def attach(self, kalshi):
+        kalshi.client = self.client
+        kalshi.orders = SimOrders(self.client, lat=kalshi.lat)
+        kalshi.Feed = self.feed
+        kalshi.clock = self.clock
+        kalshi.sleep = self.sleep
+
+        # reconciled from sleep() on the virtual clock instead of a thread
+        kalshi.account.close()
+        kalshi.account = Account(self.client, floor=kalshi.MIN_BALANCE, orders=kalshi.orders,
+                                 clock=self.clock, background=False)
+        kalshi.account.reconcile()
+        self._account = kalshi.account
+        if kalshi.events is None:
+            kalshi.events = list(self.markets)
+
+    async def run(self, kalshi, strategy: str = "strategy_yes_only") -> dict:
+        self.attach(kalshi)
+        t0 = perf_counter()
+        try:
+            await getattr(kalshi, strategy)()
+        except ReplayDone:
+            pass
+        wall = perf_counter() - t0
+        kalshi.trade_log.flush()
+        return self.stats(wall, kalshi)
+
+    def stats(self, wall: float, kalshi=None) -> dict:
+        lat = np.frombuffer(self.handler_ns, dtype=np.int64) if len(self.handler_ns) else np.zeros(1, np.int64)
+        return {
+            "ticks": self._i,
+            "handled": len(self.handler_ns),
+            "wall_sec": round(wall, 3),
+            "ticks_per_min": round(self._i / wall * 60) if wall > 0 else None,
+            "handler_p50_us": round(float(np.percentile(lat, 50)) / 1000, 1),
+            "handler_p99_us": round(float(np.percentile(lat, 99)) / 1000, 1),
+            "orders": kalshi.orders.stats_str() if kalshi is not None else None,
+            "latency": kalshi.lat.summary() if kalshi is not None else None,
+            "balance": self.client.portfolio.balance,
+        }
+
+
+if __name__ == "__main__":
+    from conf import CONFIG
+    from kalshi import Kalshi
+
+    strategy = sys.argv[1] if len(sys.argv) > 1 else "strategy_yes_only"
+    src = os.path.abspath(sys.argv[2] if len(sys.argv) > 2 else "./../data/KXBTC15M_data.csv")
+    btc = os.path.abspath("./../data/btc_prices.csv")
+
+    ticks, prices = load_data(src, btc)
+    replay = Replay(ticks, prices)
+
+    with sandbox():
+        kalshi = Kalshi(CONFIG, client=replay.client, feed=replay.feed)
+        stats = asyncio.run(replay.run(kalshi, strategy))
+        trades = pd.read_csv("./../data/log.csv")
+
+    print(trades.tail(20))
+    print(f"[REPLAY] {strategy} pnl/contract={trades['effect'].astype(float).sum():.2f} {stats}")
@@ -0,0 +1,399 @@
+"""
+Sharded live runtime: tickers are split across worker processes by a
+stable hash of market_ticker, each worker runs one strategy coroutine on
+its own Feed, client, order engine and positions db.
+
+    python shard.py [workers] [strategy]            # live, ./../data/events.json
+    python shard.py replay <ticks> [workers]        # strategy_high_trade throughput, 1..workers
+
+The parent is the Coordinator. It owns the only balance and positions
+REST calls: the balance is shared with every worker, each worker gets
+the positions of its own tickers, and no worker calls either endpoint
+itself. It also collects a small report from each worker once a second
+and turns those into global risk: when the balance drops under
+MIN_BALANCE or the open positions across all shards reach max_positions,
+new entries are refused in every worker until it clears.
+Exits and stop losses are never blocked.
+
+The coordinator is also the only writer of ./../data/log.csv. Workers send
+their trade log rows over a queue, so rows from different processes never
+interleave and the "log" events on the coordinator's bus (bus.BUS_PATH)
+are numbered by their position in the file, as logview.LogTail expects.
+
+A ticker always hashes to the same shard for a given worker count, and a
+worker recovers its positions from ./../data/positions.<shard>.db, so keep
+the worker count fixed across restarts while positions are open.
+"""
+import asyncio
+import json
+import os
+import queue
+import sys
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from time import perf_counter, sleep, time as utime
+from types import SimpleNamespace
+
+from rich import print
+
+from account import Account, rest_positions
+from bus import Publisher, BUS_PATH
+from kalshi import Kalshi
+from tradelog import TradeLog
+
+
+def shard_of(ticker: str, n: int) -> int:
+    # crc32 rather than hash(), which is salted per process
+    return zlib.crc32(ticker.upper().encode()) % n
+
+
+def partition(tickers, n: int) -> list:
+    shards = [[] for _ in range(n)]
+    for t in tickers:
+        shards[shard_of(t, n)].append(t)
+    return shards
+
+
+class ShardLog:
+    """
+    Trade log of a worker: every row goes to the coordinator, which writes
+    it to log.csv. Same write/flush/pending/close surface as TradeLog.
+    """
+
+    pending = 0
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def write(self, row):
+        # multiprocessing queues pickle on a feeder thread, this never blocks
+        self._rows.put(list(row))
+
+    def flush(self, sync: bool = False):
+        pass
+
+    def close(self):
+        pass
+
+
+class ShardKalshi(Kalshi):
+    """
+    Kalshi for one shard. The account's balance and positions come from the
+    coordinator instead of REST, entries are refused while the coordinator has halted them, and
+    every main loop heartbeat also reports to the coordinator. Trade log
+    rows go to the coordinator as well.
+    """
+
+    REPORT_SEC = 1.0
+
+    def __init__(self, config, shard, balance, positions, halt, reports, rows, **kwargs):
+        # read by the hooks below, which run inside Kalshi.__init__
+        self._rows = rows
+        self._balance = balance
+        self._positions = positions
+        super().__init__(config, shard=shard, **kwargs)
+        self._halt = halt
+        self._reports = reports
+        self._last_report = 0.0
+
+    def _trade_log(self):
+        return ShardLog(self._rows)
+
+    def _make_account(self):
+        return Account(self.client, floor=self.MIN_BALANCE, orders=self.orders,
+                       fetch_balance=lambda: (self._balance.value, 0.0),
+                       fetch_positions=self._latest_positions)
+
+    def _latest_positions(self):
+        # newest slice the coordinator sent, None keeps the fill based figures
+        latest = None
+        while True:
+            try:
+                latest = self._positions.get_nowait()
+            except queue.Empty:
+                return latest
+
+    def buy(self, ticker, side, max, then=None):
+        if self._halt.is_set():
+            # looks like an order that never filled, so no fill callback runs
+            order = SimpleNamespace(status="halted", ticker=ticker)
+            if then is not None:
+                then(order)
+            fut = Future()
+            fut.set_result(order)
+            return fut
+        return super().buy(ticker, side, max, then)
+
+    def _publish_hb(self, strategy: str, feed):
+        super()._publish_hb(strategy, feed)
+
+        now = self.clock()
+        if now - self._last_report < self.REPORT_SEC:
+            return
+        self._last_report = now
+
+        positions = dict(self.positions.items())
+        tick = self.lat.snapshot().get("tick", {})
+        try:
+            self._reports.put_nowait({
+                "shard": self.shard,
+                "pid": os.getpid(),
+                "ts": utime(),
+                "connected": feed.is_connected,
+                "msgs": feed.messages_received,
+                "events": len(self.events or ()),
+                "positions": len(positions),
+                "exposure": sum(float(p["price"]) for p in positions.values()) * self.CONFIG.QTY,
+                "inflight": self.orders.pending(),
+                "tick_p99_us": tick.get("p99"),
+            })
+        except queue.Full:
+            pass
+
+
+def _worker(shard, tickers, config, strategy, balance, positions, halt, reports, rows):
+    kalshi = ShardKalshi(config, shard, balance, positions, halt, reports, rows)
+    kalshi.events = tickers
+    print(f"[SHARD {shard}] pid={os.getpid()} events={len(tickers)} strategy={strategy}")
+    asyncio.run(getattr(kalshi, strategy)())
+
+
+class Coordinator:
+    """
+    Starts one worker process per shard and keeps them supplied with the
+    balance, their positions and the risk switch. run() blocks until every
+    worker is done.
+    """
+
+    BALANCE_SEC = 10.0
+    HB_SEC = 60
+    RESTART_SEC = 10.0     # a crashed worker is restarted at most this often
+    MIN_BALANCE = 800      # same floor the strategies exit on
+
+    def __init__(self, config, events, workers: int | None = None, strategy: str = "strategy_high_trade",
+                 client=None, max_positions: int | None = None):
+        self.config = config
+        self.strategy = strategy
+        self.n = workers or os.cpu_count() or 1
+        self.shards = partition(events, self.n)
+        self.max_positions = max_positions if max_positions is not None else getattr(config, "MAX_POSITIONS", None)
+        self.client = client
+
+        ctx = get_context("spawn")  # the Feed and order pools run threads, do not fork them
+        self._ctx = ctx
+        self.balance = ctx.Value("d", 0.0, lock=False)
+        # per shard {ticker: (contracts, exposure)}, a worker only reads the newest
+        self.positions = [ctx.Queue(maxsize=4) for _ in range(self.n)]
+        self.halt = ctx.Event()
+        self.reports = ctx.Queue(maxsize=10000)
+        self.rows = ctx.Queue()  # trade log rows, unbounded so none are dropped
+        self.bus = None
+        self.trade_log = None
+
+        self.procs = [None] * self.n
+        self.state = [{} for _ in range(self.n)]
+        self._started = [0.0] * self.n
+
+    # ------------- workers -------------
+
+    def _spawn(self, i):
+        p = self._ctx.Process(
+            target=_worker,
+            args=(i, self.shards[i], self.config, self.strategy, self.balance, self.positions[i], self.halt,
+                  self.reports, self.rows),
+            name=f"kalshi-shard-{i}",
+            daemon=True,
+        )
+        p.start()
+        self.procs[i] = p
+        self._started[i] = utime()
+
+    def start(self):
+        if self.client is None:
+            from pykalshi import KalshiClient
+            self.client = KalshiClient.from_env(demo=False)
+        # workers compare against the balance from their first tick on
+        self.refresh_balance()
+        self.refresh_positions()
+
+        self.bus = Publisher(BUS_PATH)
+        self.trade_log = TradeLog("./../data/log.csv", bus=self.bus)
+
+        sizes = [len(s) for s in self.shards]
+        print(f"[COORD] {sum(sizes)} events over {self.n} shards {sizes}")
+        for i, tickers in enumerate(self.shards):
+            if tickers:
+                self._spawn(i)
+        return self
+
+    def stop(self):
+        for p in self.procs:
+            if p is not None and p.is_alive():
+                p.terminate()
+        for p in self.procs:
+            if p is not None:
+                p.join(timeout=5)
+
+        if self.trade_log is not None:
+            self.drain_rows()
+            self.trade_log.close()
+            self.bus.close()
+
+    # ------------- aggregation -------------
+
+    def refresh_balance(self):
+        try:
+            bal = self.client.portfolio.get_balance()
+            self.balance.value = bal.portfolio_value + bal.balance
+        except Exception as e:
+            print(f"[ERR][COORD] balance: {type(e).__name__}: {e}")
+
+    def refresh_positions(self):
+        positions = rest_positions(self.client)
+        if positions is None:
+            return
+        split = [{} for _ in range(self.n)]
+        for ticker, p in positions.items():
+            split[shard_of(ticker, self.n)][ticker] = p
+        for q, part in zip(self.positions, split):
+            try:
+                q.put_nowait(part)
+            except queue.Full:
+                pass  # the worker is behind, it picks up a newer slice next time
+
+    def drain(self):
+        while True:
+            try:
+                r = self.reports.get_nowait()
+            except queue.Empty:
+                return
+            self.state[r["shard"]] = r
+
+    def drain_rows(self):
+        while True:
+            try:
+                row = self.rows.get_nowait()
+            except queue.Empty:
+                return
+            self.trade_log.write(row)
+
+    def totals(self) -> dict:
+        live = [s for s in self.state if s]
+        return {
+            "shards": len(live),
+            "msgs": sum(s["msgs"] for s in live),
+            "positions": sum(s["positions"] for s in live),
+            "exposure": round(sum(s["exposure"] for s in live), 2),
+            "inflight": sum(s["inflight"] for s in live),
+            "disconnected": sum(not s["connected"] for s in live),
+        }
+
+    def check_risk(self, totals: dict):
+        reason = None
+        if self.balance.value < self.MIN_BALANCE:
+            reason = f"balance {self.balance.value:.0f} < {self.MIN_BALANCE}"
+        elif self.max_positions is not None and totals["positions"] >= self.max_positions:
+            reason = f"positions {totals['positions']} >= {self.max_positions}"
+
+        if reason and not self.halt.is_set():
+            self.halt.set()
+            print(f"[RISK] entries halted: {reason}")
+        elif not reason and self.halt.is_set():
+            self.halt.clear()
+            print("[RISK] entries resumed")
+
+    def run(self):
+        last_bal = last_hb = utime()
+        try:
+            while any(p is not None for p in self.procs):
+                sleep(0.5)
+                now = utime()
+                self.drain()
+                self.drain_rows()
+
+                if now - last_bal >= self.BALANCE_SEC:
+                    last_bal = now
+                    self.refresh_balance()
+                    self.refresh_positions()
+
+                totals = self.totals()
+                self.check_risk(totals)
+
+                for i, p in enumerate(self.procs):
+                    if p is None or p.is_alive():
+                        continue
+                    if p.exitcode == 0:
+                        print(f"[COORD] shard {i} finished")
+                        self.procs[i] = None
+                    elif now - self._started[i] >= self.RESTART_SEC:
+                        print(f"[WARN][COORD] shard {i} died (exit {p.exitcode}), restarting")
+                        self._spawn(i)
+
+                if now - last_hb >= self.HB_SEC:
+                    last_hb = now
+                    print(
+                        f"[HB][COORD] balance={self.balance.value:.0f} halted={self.halt.is_set()} "
+                        + " ".join(f"{k}={v}" for k, v in totals.items())
+                    )
+        finally:
+            self.stop()
+
+
+# ------------- replay throughput -------------
+
+def _replay_shard(src, shard, n, strategy):
+    from backtest import load_data
+    from conf import CONFIG
+    from replay import Replay, sandbox
+
+    ticks, prices = load_data(src)
+    ticks = ticks[[shard_of(t, n) == shard for t in ticks["market_ticker"]]]
+    if ticks.empty:
+        return {"ticks": 0, "wall_sec": 0.0}
+
+    replay = Replay(ticks, prices)
+    with sandbox():
+        kalshi = Kalshi(CONFIG, client=replay.client, feed=replay.feed, shard=shard)
+        return asyncio.run(replay.run(kalshi, strategy))
+
+
+def replay_sharded(src, n: int, strategy: str = "strategy_high_trade") -> dict:
+    """
+    Replay the tape split into n shards, one process each. The tape is
+    loaded and filtered in the worker so nothing large gets pickled.
+    """
+    t0 = perf_counter()
+    with ProcessPoolExecutor(max_workers=n, mp_context=get_context("spawn")) as pool:
+        stats = list(pool.map(_replay_shard, [src] * n, range(n), [n] * n, [strategy] * n))
+    wall = perf_counter() - t0
+    ticks = sum(s["ticks"] for s in stats)
+    return {
+        "workers": n,
+        "ticks": ticks,
+        "wall_sec": round(wall, 2),
+        "slowest_shard_sec": max(s["wall_sec"] for s in stats),
+        "ticks_per_sec": round(ticks / wall),
+        # without process start and tape loading
+        "replay_ticks_per_sec": round(ticks / max(s["wall_sec"] for s in stats)),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        src = os.path.abspath(sys.argv[2] if len(sys.argv) > 2 else "./../data/KXBTC15M_data.csv")
+        top = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+        n = 1
+        while n <= top:
+            print(f"[BENCH] {replay_sharded(src, n)}")
+            n *= 2
+        sys.exit()
+
+    from conf import CONFIG
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    strategy = sys.argv[2] if len(sys.argv) > 2 else "strategy_high_trade"
+    with open("./../data/events.json") as f:
+        events = json.load(f)
+
+    Coordinator(CONFIG, events, workers, strategy).start().run()
@@ -0,0 +1,150 @@
+"""
+Parallel CONFIG sweep (L_LIMIT/U_LIMIT/SL/QTY) over recorded ticks.
+
+    python sweep.py grid                          # DEFAULT_GRID, legacy CSVs
+    python sweep.py random 2000 ../data/ticks     # random search, tick store
+
+The Backtest is prepared once in the parent, saved as .npy files and
+memory mapped by every worker, so the tick arrays live in the page cache
+once instead of being pickled to each process. Workers only send back the
+summary dicts.
+"""
+import itertools
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from backtest import Backtest, load_data
+
+PARAMS = ("L_LIMIT", "U_LIMIT", "SL", "QTY")
+
+DEFAULT_GRID = {
+    "L_LIMIT": np.round(np.arange(0.80, 0.96, 0.01), 2),
+    "U_LIMIT": [0.95, 0.97, 0.99],
+    "SL": np.round(np.arange(0.30, 0.80, 0.05), 2),
+    "QTY": [25],
+}
+
+DEFAULT_RANGES = {
+    "L_LIMIT": (0.70, 0.97),
+    "U_LIMIT": (0.90, 0.99),
+    "SL": (0.20, 0.85),
+    "QTY": (25, 25),
+}
+
+
+def _valid(cfg: dict) -> bool:
+    return cfg["SL"] < cfg["L_LIMIT"] <= cfg["U_LIMIT"]
+
+
+def grid(**axes) -> list[dict]:
+    """
+    Every combination of the given values, minus ones that cannot trade
+    (SL at or above L_LIMIT, or L_LIMIT above U_LIMIT).
+    """
+    axes = {**DEFAULT_GRID, **axes}
+    configs = (
+        {k: float(v) if k != "QTY" else int(v) for k, v in zip(PARAMS, combo)}
+        for combo in itertools.product(*(axes[k] for k in PARAMS))
+    )
+    return [c for c in configs if _valid(c)]
+
+
+def random_configs(n: int, seed: int = 0, **ranges) -> list[dict]:
+    """
+    n valid configs drawn uniformly from (lo, hi) per parameter, prices
+    rounded to cents like the exchange.
+    """
+    ranges = {**DEFAULT_RANGES, **ranges}
+    rng = np.random.default_rng(seed)
+    out = []
+    while len(out) < n:
+        cfg = {k: round(float(rng.uniform(*ranges[k])), 2) for k in ("L_LIMIT", "U_LIMIT", "SL")}
+        cfg["QTY"] = int(rng.integers(ranges["QTY"][0], ranges["QTY"][1] + 1))
+        if _valid(cfg):
+            out.append(cfg)
+    return out
+
+
+def rank(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Order by the mean of the PnL, drawdown and hit rate ranks (1 = best),
+    PnL breaks ties.
+    """
+    df = results.copy()
+    df["rank_pnl"] = df["pnl"].rank(ascending=False)
+    df["rank_dd"] = df["max_drawdown"].rank(ascending=True)
+    df["rank_hit"] = df["hit_rate"].rank(ascending=False)
+    df["score"] = df[["rank_pnl", "rank_dd", "rank_hit"]].mean(axis=1)
+    return df.sort_values(["score", "pnl"], ascending=[True, False]).reset_index(drop=True)
+
+
+# ------------- workers -------------
+
+_bt = None
+
+
+def _init_worker(path, fill, latency_ticks):
+    global _bt
+    _bt = Backtest.load(path, fill=fill, latency_ticks=latency_ticks)
+
+
+def _evaluate(cfg: dict) -> dict:
+    return {**cfg, **_bt.run(SimpleNamespace(**cfg)).summary}
+
+
+def sweep(bt: Backtest, configs: list[dict], workers: int | None = None) -> pd.DataFrame:
+    """
+    Evaluate configs across a process pool and return them ranked.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(configs) // (workers * 8))
+
+    with tempfile.TemporaryDirectory(prefix="sweep-") as path:
+        bt.save(path)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(path, bt.fill, bt.latency_ticks),
+        ) as pool:
+            rows = list(pool.map(_evaluate, configs, chunksize=chunksize))
+
+    return rank(pd.DataFrame(rows))
+
+
+if __name__ == "__main__":
+    from rich import print
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else "grid"
+    if mode == "random":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        src = sys.argv[3] if len(sys.argv) > 3 else "./../data/KXBTC15M_data.csv"
+        configs = random_configs(n)
+    else:
+        src = sys.argv[2] if len(sys.argv) > 2 else "./../data/KXBTC15M_data.csv"
+        configs = grid()
+
+    ticks, prices = load_data(src)
+    bt = Backtest(ticks, prices)
+    print(f"[SWEEP] {len(configs)} configs over {len(bt.arrays['ts'])} ticks, {len(bt.markets)} markets")
+
+    # serial baseline on a slice, then the full pool
+    k = min(len(configs), 20)
+    t0 = perf_counter()
+    for cfg in configs[:k]:
+        bt.run(SimpleNamespace(**cfg))
+    serial = k / (perf_counter() - t0)
+
+    t0 = perf_counter()
+    ranked = sweep(bt, configs)
+    parallel = len(configs) / (perf_counter() - t0)
+
+    cols = ["L_LIMIT", "U_LIMIT", "SL", "QTY", "trades", "pnl", "max_drawdown", "hit_rate", "score"]
+    print(ranked[cols].head(20).to_string())
+    print(f"[BENCH] serial {serial:.1f} configs/s | pool({os.cpu_count()}) {parallel:.1f} configs/s")
@@ -0,0 +1,365 @@
+import abc
+import csv
+import glob
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from time import time as utime
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only the csv sink works without it
+    pa = None
+
+
+# column name -> arrow type alias, order is the on disk column order
+KALSHI_TICK_COLUMNS = [
+    ("timestamp", "float64"),
+    ("market_ticker", "string"),
+    ("series", "string"),
+    ("yes_bid", "int64"),
+    ("yes_ask", "int64"),
+    ("no_bid", "int64"),
+    ("no_ask", "int64"),
+    ("price", "float64"),
+    ("target", "float64"),
+    ("exp", "int64"),
+    ("time_d", "float64"),
+    ("price_d", "float64"),
+    ("volume", "int64"),
+    ("open_interest", "int64"),
+    ("dollar_volume", "int64"),
+    ("dollar_open_interest", "int64"),
+]
+
+# CFB snapshot, the same layout for every asset (series=BTC, series=ETH, ...)
+CRYPTO_PRICE_COLUMNS = [("timestamp", "float64")] + [
+    (name, "float64")
+    for name in (
+        "price_coinbase", "price_kraken", "price_bitstamp", "price_cryptocom", "price_gemini",
+        "price_synth",
+        "spread_cb_bs", "spread_cb_kr", "spread_cb_cc", "spread_cb_gm",
+        "spread_kr_bs", "spread_kr_cc", "spread_kr_gm",
+        "spread_bs_cc", "spread_bs_gm",
+        "spread_cc_gm",
+    )
+]
+BTC_PRICE_COLUMNS = CRYPTO_PRICE_COLUMNS
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for parquet/arrow tick files, pip install pyarrow")
+
+
+def _date_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+
+
+def partition_dir(root: str, series: str, date: str) -> str:
+    return os.path.join(root, f"series={series}", f"date={date}")
+
+
+_part_seq = itertools.count()
+
+
+def _part_name(ext: str) -> str:
+    # two flushes can land in the same millisecond, the pid and sequence
+    # number keep one from replacing the other
+    return f"part-{int(utime() * 1000)}-{os.getpid()}-{next(_part_seq)}{ext}"
+
+
+# one background thread merges finished days, see ColumnarTickSink
+_compactor = None
+
+
+def _compact_later(root, series, date, fmt):
+    global _compactor
+    if _compactor is None:
+        _compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tick-compact")
+
+    def run():
+        try:
+            n = compact(root, series, date, fmt)
+            if n:
+                print(f"[TICKS] {series} {date}: {n} parts -> 1")
+        except Exception as e:
+            print(f"[ERR][TICKS] compact {series} {date}: {type(e).__name__}: {e}")
+
+    _compactor.submit(run)
+
+
+class ColumnarTickSink(abc.ABC):
+    """
+    Buffer tick rows column by column and write them as immutable part files.
+
+    Layout (hive style, one directory per series and UTC date):
+        <root>/series=<series>/date=<YYYY-MM-DD>/part-<ms>.<ext>
+
+    A part file is written every flush_rows rows, every flush_sec seconds,
+    and whenever the UTC date rolls over. Files are written under a "_"
+    prefix and renamed into place, so readers never see a partial file.
+
+    flush_sec is short so a crash loses seconds of ticks, not minutes. The
+    small part files that leaves only last for the current day: when the
+    date rolls over, and for any earlier day left over when a sink starts,
+    compact() merges the day into one file on a background thread.
+    """
+
+    EXT = ""
+    FORMAT = ""
+
+    def __init__(self, root: str, series: str, columns, flush_rows: int = 10000, flush_sec: float = 5.0):
+        _require_pyarrow()
+        self.root = root
+        self.series = series
+        self.flush_rows = flush_rows
+        self.flush_sec = flush_sec
+
+        self.schema = pa.schema([(name, pa.type_for_alias(t)) for name, t in columns])
+        self._cols = {name: [] for name, _ in columns}
+        self._n = 0
+        self._date = None
+        self._last_flush = utime()
+
+        # days an earlier run finished (or crashed in) without compacting
+        today = _date_of(utime())
+        for part in sorted(glob.glob(os.path.join(self.root, f"series={series}", "date=*"))):
+            date = os.path.basename(part)[len("date="):]
+            if date < today:
+                _compact_later(root, series, date, self.FORMAT)
+
+    def write(self, row: dict):
+        date = _date_of(row["timestamp"])
+        if self._date is not None and date != self._date:
+            self.flush()
+            _compact_later(self.root, self.series, self._date, self.FORMAT)
+        self._date = date
+
+        for name, col in self._cols.items():
+            col.append(row.get(name))
+        self._n += 1
+
+        if self._n >= self.flush_rows or utime() - self._last_flush >= self.flush_sec:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = utime()
+        if not self._n:
+            return
+
+        table = pa.Table.from_pydict(self._cols, schema=self.schema)
+
+        out_dir = partition_dir(self.root, self.series, self._date)
+        os.makedirs(out_dir, exist_ok=True)
+        name = _part_name(self.EXT)
+        tmp = os.path.join(out_dir, "_" + name)
+        self._write_table(table, tmp)
+        os.replace(tmp, os.path.join(out_dir, name))
+
+        for col in self._cols.values():
+            col.clear()
+        self._n = 0
+
+    def close(self):
+        self.flush()
+
+    @staticmethod
+    @abc.abstractmethod
+    def _write_table(table, path):
+        """
+        Write table to path in the sink's file format.
+        """
+
+
+class ParquetTickSink(ColumnarTickSink):
+    EXT = ".parquet"
+    FORMAT = "parquet"
+
+    @staticmethod
+    def _write_table(table, path):
+        pq.write_table(table, path, compression="zstd")
+
+
+class ArrowTickSink(ColumnarTickSink):
+    """
+    Arrow IPC file format. Uncompressed, so load_ticks can memory map the
+    files and hand back columns without copying or decoding.
+    """
+
+    EXT = ".arrow"
+    FORMAT = "arrow"
+
+    @staticmethod
+    def _write_table(table, path):
+        with pa.OSFile(path, "wb") as f, pa.ipc.new_file(f, table.schema) as w:
+            w.write_table(table)
+
+
+class CsvTickSink:
+    """
+    Plain CSV fallback with a header row, same directory layout as the
+    columnar sinks but one ticks.csv per partition. Load it with pandas.
+    """
+
+    def __init__(self, root: str, series: str, columns, **_):
+        self.root = root
+        self.series = series
+        self.names = [name for name, _ in columns]
+        self._date = None
+        self._fh = None
+        self._w = None
+
+    def write(self, row: dict):
+        date = _date_of(row["timestamp"])
+        if date != self._date:
+            self._open(date)
+        self._w.writerow([row.get(name) for name in self.names])
+
+    def _open(self, date):
+        self.close()
+        out_dir = partition_dir(self.root, self.series, date)
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, "ticks.csv")
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._fh = open(path, "a", newline="")
+        self._w = csv.writer(self._fh)
+        if new:
+            self._w.writerow(self.names)
+        self._date = date
+
+    def flush(self):
+        if self._fh is not None:
+            self._fh.flush()
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+SINKS = {
+    "parquet": ParquetTickSink,
+    "arrow": ArrowTickSink,
+    "csv": CsvTickSink,
+}
+
+
+def make_sink(kind: str, root: str, series: str, columns, **kwargs):
+    try:
+        cls = SINKS[kind]
+    except KeyError:
+        raise ValueError(f"unknown tick sink {kind!r}, expected one of {sorted(SINKS)}")
+    return cls(root, series, columns, **kwargs)
+
+
+def load_ticks(root: str, series: str, start: str | None = None, end: str | None = None,
+               columns: list[str] | None = None, fmt: str = "parquet"):
+    """
+    Load ticks for one series as a pyarrow Table, optionally limited to the
+    UTC dates start..end (inclusive, YYYY-MM-DD) and a subset of columns.
+
+    Only matching date partitions are opened. Arrow IPC files are memory
+    mapped, so the returned columns point straight at the page cache.
+    Returns None when nothing matches. Call .to_pandas() on the result
+    for a DataFrame.
+    """
+    _require_pyarrow()
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"load_ticks reads parquet or arrow, got {fmt!r}")
+
+    base = os.path.join(root, f"series={series}")
+    ext = ArrowTickSink.EXT if fmt == "arrow" else ParquetTickSink.EXT
+
+    # prune by date on the directory names before any file is opened
+    files = []
+    for part in sorted(glob.glob(os.path.join(base, "date=*"))):
+        date = os.path.basename(part)[len("date="):]
+        if (start is not None and date < start) or (end is not None and date > end):
+            continue
+        files.extend(sorted(glob.glob(os.path.join(part, "part-*" + ext))))
+
+    if not files:
+        return None
+
+    dataset = ds.dataset(
+        files,
+        format="ipc" if fmt == "arrow" else "parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+        partition_base_dir=base,
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+    return dataset.to_table(columns=columns)
+
+
+def compact(root: str, series: str, date: str, fmt: str = "parquet") -> int:
+    """
+    Merge the part files of one series/date partition into a single part
+    file. Only for days that are no longer being written.
+
+    The merged file is renamed into place before the old parts are
+    removed, so a reader may see rows twice for a moment but never misses
+    any. A manifest (_compact.json) names the merged file and its sources
+    until they are gone, so a crash half way is finished by the next call
+    instead of leaving the rows in the partition twice.
+    Returns the number of part files merged.
+    """
+    _require_pyarrow()
+    cls = ArrowTickSink if fmt == "arrow" else ParquetTickSink
+    part = partition_dir(root, series, date)
+    manifest = os.path.join(part, "_compact.json")
+
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            m = json.load(f)
+        if os.path.exists(os.path.join(part, m["merged"])):
+            # the merged file made it, only the sources are left to remove
+            for name in m["sources"]:
+                if os.path.exists(os.path.join(part, name)):
+                    os.remove(os.path.join(part, name))
+            os.remove(manifest)
+            return len(m["sources"])
+        # crashed before the merged file was renamed in, start over
+        os.remove(manifest)
+
+    for tmp in glob.glob(os.path.join(part, "_part-*")):
+        os.remove(tmp)
+    files = sorted(glob.glob(os.path.join(part, "part-*" + cls.EXT)))
+    if len(files) < 2:
+        return 0
+
+    table = ds.dataset(files, format="ipc" if fmt == "arrow" else "parquet").to_table()
+    name = _part_name(cls.EXT)
+    tmp = os.path.join(part, "_" + name)
+    cls._write_table(table, tmp)
+
+    with open(manifest + ".tmp", "w") as f:
+        json.dump({"merged": name, "sources": [os.path.basename(p) for p in files]}, f)
+    os.replace(manifest + ".tmp", manifest)
+
+    os.replace(tmp, os.path.join(part, name))
+    for f in files:
+        os.remove(f)
+    os.remove(manifest)
+    return len(files)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python ticks.py <root> [parquet|arrow], compacts every day before today
+    root = sys.argv[1]
+    fmt = sys.argv[2] if len(sys.argv) > 2 else "parquet"
+    today = _date_of(utime())
+    for part in sorted(glob.glob(os.path.join(root, "series=*", "date=*"))):
+        series = os.path.basename(os.path.dirname(part))[len("series="):]
+        date = os.path.basename(part)[len("date="):]
+        if date < today:
+            n = compact(root, series, date, fmt)
+            if n:
+                print(f"[TICKS] {series} {date}: {n} parts -> 1")
@@ -0,0 +1,138 @@
+import csv
+import io
+import os
+import threading
+from collections import deque
+
+from rich import print
+
+
+class TradeLog:
+    """
+    Buffered writer for the trade log CSV (ticker,dir,action,price,effect).
+
+    write() only appends the row to an in-memory buffer and never touches the
+    file, so it is safe to call from the Feed callback. A background thread
+    owns the single file handle and drains the buffer when:
+        - flush_rows rows are pending
+        - flush_sec seconds have passed since the last flush
+        - a row with a DURABLE action arrives (that flush is also fsynced)
+
+    close() drains whatever is left, fsyncs and closes the handle.
+
+    If a bus (bus.Publisher) is given, every row is also published as a
+    "log" event numbered by its position in the file, so a subscriber can
+    tell which rows it already read from disk.
+    """
+
+    DURABLE = {"close", "sl", "resolved", "settle"}
+
+    def __init__(self, path: str, flush_rows: int = 64, flush_sec: float = 1.0, capacity: int = 65536,
+                 bus=None):
+        self.path = path
+        self.bus = bus
+        self.flush_rows = flush_rows
+        self.flush_sec = flush_sec
+        self.capacity = capacity
+
+        self._buf = deque()
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._want_sync = False
+        self._closed = False
+
+        self.rows = self._count_rows(path) if bus is not None else 0
+
+        self._fh = open(path, "a", newline="")
+        self._thread = threading.Thread(target=self._run, name="trade-log", daemon=True)
+        self._thread.start()
+
+    # ------------- public API -------------
+
+    def write(self, row):
+        if self._closed:
+            raise ValueError("write to closed TradeLog")
+
+        with self._lock:
+            self._buf.append(row)
+            n = len(self._buf)
+            self.rows += 1
+            if self.bus is not None:
+                self.bus.publish("log", event=self.rows, row=list(row))
+            durable = len(row) > 2 and str(row[2]).lower() in self.DURABLE
+            if durable:
+                self._want_sync = True
+
+        if n >= self.capacity:
+            # flusher fell behind, apply backpressure instead of dropping rows
+            self.flush()
+        elif durable or n >= self.flush_rows:
+            self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buf)
+
+    def flush(self, sync: bool = False):
+        # _io_lock is held from taking the batch to writing it, so two
+        # flushers cannot write their batches out of order and the file
+        # keeps the row numbers published on the bus
+        with self._io_lock:
+            with self._lock:
+                rows = list(self._buf)
+                self._buf.clear()
+                sync = sync or self._want_sync
+                self._want_sync = False
+
+            if self._fh.closed:
+                return
+            if rows:
+                out = io.StringIO()
+                csv.writer(out).writerows(rows)
+                self._fh.write(out.getvalue())
+            self._fh.flush()
+            if sync:
+                os.fsync(self._fh.fileno())
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush(sync=True)
+        with self._io_lock:
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def _count_rows(path) -> int:
+        """
+        Data rows already in the file, not counting a header line.
+        """
+        if not os.path.exists(path):
+            return 0
+        n, first = 0, b""
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                if not first:
+                    first = chunk.split(b"\n", 1)[0]
+                n += chunk.count(b"\n")
+        return n - (1 if b"action" in first.lower() else 0)
+
+    # ------------- flusher -------------
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERR][trade-log] {type(e).__name__}: {e}")
@@ -0,0 +1,99 @@
+import asyncio
+import importlib.util
+from time import sleep
+
+import httpx
+
+KALSHI_API = "https://api.elections.kalshi.com/trade-api/v2"
+
+# HTTP/2 needs the optional h2 package, fall back to pooled HTTP/1.1 without it
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+class Transport:
+    """
+    Shared HTTP transport for Kalshi REST calls.
+
+    One keep-alive pool is reused for every request, so only the first call
+    to a host pays the TCP and TLS handshake. The sync client serves the
+    existing blocking helpers, the async client serves batch fan out.
+
+    Concurrency is bounded by max_inflight. A 429 response is retried after
+    Retry-After (or an exponential backoff) instead of failing the batch,
+    on the sync client as well as the async one.
+    """
+
+    RETRIES = 4
+    BACKOFF = 0.25  # first retry delay in seconds when Retry-After is missing
+
+    def __init__(self, base_url: str = KALSHI_API, max_inflight: int = 8, timeout: float = 10.0):
+        self.base_url = base_url
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+
+        self._limits = httpx.Limits(
+            max_connections=max_inflight, max_keepalive_connections=max_inflight
+        )
+        self.client = httpx.Client(
+            base_url=base_url, http2=HTTP2, limits=self._limits, timeout=timeout
+        )
+
+        # created on first use so they bind to the running loop
+        self._aclient: httpx.AsyncClient | None = None
+        self._sem: asyncio.Semaphore | None = None
+
+    # ------------- sync -------------
+
+    def get_json(self, path: str, params: dict | None = None):
+        delay = self.BACKOFF
+        for attempt in range(self.RETRIES):
+            r = self.client.get(path, params=params)
+            if r.status_code != 429 or attempt == self.RETRIES - 1:
+                r.raise_for_status()
+                return r.json()
+
+            retry_after = r.headers.get("Retry-After")
+            sleep(float(retry_after) if retry_after else delay)
+            delay *= 2
+
+    # ------------- async -------------
+
+    def _async_client(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                base_url=self.base_url, http2=HTTP2, limits=self._limits, timeout=self.timeout
+            )
+            self._sem = asyncio.Semaphore(self.max_inflight)
+        return self._aclient
+
+    async def aget_json(self, path: str, params: dict | None = None):
+        client = self._async_client()
+        delay = self.BACKOFF
+
+        async with self._sem:
+            for attempt in range(self.RETRIES):
+                r = await client.get(path, params=params)
+                if r.status_code != 429 or attempt == self.RETRIES - 1:
+                    r.raise_for_status()
+                    return r.json()
+
+                retry_after = r.headers.get("Retry-After")
+                await asyncio.sleep(float(retry_after) if retry_after else delay)
+                delay *= 2
+
+    async def gather_json(self, paths: list[str], params: dict | None = None) -> list:
+        """
+        Fetch many paths concurrently. Failed requests come back as the
+        exception instance in their slot so one bad ticker does not sink the batch.
+        """
+        return await asyncio.gather(
+            *(self.aget_json(p, params) for p in paths), return_exceptions=True
+        )
+
+    async def aclose(self):
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
+    def close(self):
+        self.client.close()